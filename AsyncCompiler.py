@@ -0,0 +1,165 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from BuildCache import BuildCache
+from JackCompiler import compileSource
+
+"""
+AsyncCompiler class
+    - asyncio front end to the compiler for services running an event loop: no call blocks
+      the loop
+    - Compiles run on a bounded pool of worker processes (compileSource, in memory); file
+      reads and .vm writes run in the default thread pool (asyncio.to_thread)
+    - At most jobs compiles are handed to the pool at once; the others wait in the event loop,
+      so a cancelled job that has not started never reaches a worker
+    - Batch methods are async generators yielding each result as soon as it is ready; closing
+      or cancelling the consumer cancels the jobs still outstanding
+    - Per-job timeouts: a job that runs longer than its timeout reports an error; its worker
+      cannot be interrupted, so it finishes in the background, keeping its slot until then, and
+      the result is dropped. A job's timeout starts once it has a slot
+    - Results follow compileFiles: (filePath or name, error, value), where error is None on
+      success or the error message
+"""
+
+
+class AsyncCompiler:
+    """
+    Constructor: Creates a compiler running up to jobs compiles at once
+        - timeout: default per-job timeout in seconds (None: no limit)
+        - options: default compile options, as for compileSource
+        - executor: executor to run compiles on instead of a new process pool (not shut down by close)
+    """
+    def __init__(self, jobs: int = None, timeout: float = None, options: dict = None, executor=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.options = options or {}
+        self.ownsExecutor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.jobs)
+        self.slots = asyncio.Semaphore(self.jobs)
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+    """
+    close: Shuts down the worker pool, cancelling compiles that have not started
+    """
+    def close(self) -> None:
+        if self.ownsExecutor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+    """
+    compileSource: Compiles Jack source text and returns its VM code (bytes with the binary option)
+        - Raises RuntimeError if the source does not compile, asyncio.TimeoutError on timeout
+    """
+    async def compileSource(self, source: str, options: dict = None, timeout: float = None):
+        options = {**self.options, **(options or {})}
+        timeout = timeout if timeout is not None else self.timeout
+        loop = asyncio.get_running_loop()
+
+        await self.slots.acquire()
+        try:
+            future = self.executor.submit(compileSource, source, options)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is freed when the worker is done, not when this job stops waiting for it (timeout,
+        # cancellation), so the next job never queues behind a worker still busy with this one
+        future.add_done_callback(lambda _: self.releaseSlot(loop))
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+
+    """
+    releaseSlot: Frees a compile slot once a worker is done (called from the executor's thread)
+    """
+    def releaseSlot(self, loop) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self.slots.release)
+
+
+    """
+    compileFile: Compiles a .jack file to the .vm (or .vmb) file next to it and returns (filePath, error, outputPath)
+        - The output replaces any previous one only once it is complete
+        - outputPath is None on failure, and for an empty file
+    """
+    async def compileFile(self, filePath: str, options: dict = None, timeout: float = None) -> tuple:
+        options = {**self.options, **(options or {})}
+        outputPath = BuildCache.outputPath(filePath, '.vmb' if options.get('binary') else '.vm')
+        try:
+            source = await asyncio.to_thread(readFile, filePath)
+            vmCode = await self.compileSource(source, options, timeout)
+            # Empty files have no output, as with compileFile
+            if not vmCode:
+                return filePath, None, None
+            await asyncio.to_thread(writeFile, outputPath, vmCode)
+        except asyncio.TimeoutError:
+            return filePath, f'Timed out after {timeout if timeout is not None else self.timeout}s', None
+        except Exception as exception:
+            return filePath, str(exception), None
+        return filePath, None, outputPath
+
+
+    """
+    compileFiles: Compiles .jack files, yielding each (filePath, error, outputPath) result as it finishes
+    """
+    async def compileFiles(self, fileArr: list, options: dict = None, timeout: float = None):
+        tasks = [asyncio.ensure_future(self.compileFile(filePath, options, timeout)) for filePath in fileArr]
+        async for result in asCompleted(tasks):
+            yield result
+
+
+    """
+    compileSources: Compiles a dict of name -> Jack source, yielding each (name, error, vmCode) result as it finishes
+    """
+    async def compileSources(self, sources: dict, options: dict = None, timeout: float = None):
+        tasks = [asyncio.ensure_future(self.compileNamed(name, source, options, timeout)) for name, source in sources.items()]
+        async for result in asCompleted(tasks):
+            yield result
+
+
+    """
+    compileNamed: Compiles one source of compileSources, returning (name, error, vmCode)
+    """
+    async def compileNamed(self, name: str, source: str, options: dict, timeout: float) -> tuple:
+        try:
+            return name, None, await self.compileSource(source, options, timeout)
+        except asyncio.TimeoutError:
+            return name, f'Timed out after {timeout if timeout is not None else self.timeout}s', None
+        except Exception as exception:
+            return name, str(exception), None
+
+
+"""
+asCompleted: Yields the results of tasks as they finish, cancelling the unfinished ones if the consumer stops
+"""
+async def asCompleted(tasks: list):
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+"""
+readFile: Returns the text of a file (run in a thread)
+"""
+def readFile(filePath: str) -> str:
+    with open(filePath, 'r') as file:
+        return file.read()
+
+
+"""
+writeFile: Writes text or bytes to a file through a temporary file renamed over it (run in a thread)
+"""
+def writeFile(filePath: str, data) -> None:
+    tmpPath = filePath + '.tmp'
+    with open(tmpPath, 'wb' if isinstance(data, bytes) else 'w') as file:
+        file.write(data)
+    os.replace(tmpPath, filePath)
@@ -0,0 +1,156 @@
+"""
+BuildCache class
+    - Incremental build manifest for directory compiles
+    - Records a content hash of every compiled .jack file, together with a fingerprint
+      of the compiler itself, in a JSON manifest at the top of the directory
+    - A file is skipped when its source hash and the compiler fingerprint match the
+      manifest and its .vm output still exists
+
+    Manifest layout:
+        {
+            "compiler": <fingerprint>,
+            "files": { <path relative to the directory>: {"source": <sha256>, "output": <.vm path>} }
+        }
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = '.jackbuild.json'
+
+
+class BuildCache:
+    """
+    Constructor: Loads the manifest of the given directory, if there is one
+        - options: any extra settings that change the generated code, folded into the fingerprint
+        - extension: extension of the output files ('.vm', or '.vmb' for VM bytecode)
+    """
+    def __init__(self, dirPath: str, options: str = '', extension: str = '.vm'):
+        self.dirPath = dirPath
+        self.extension = extension
+        self.manifestPath = os.path.join(dirPath, MANIFEST_NAME)
+        self.compiler = self.compilerFingerprint(options)
+
+        # Hashes computed by staleFiles, recorded once the files compile
+        self.sourceHashes = {}
+        self.files = {}
+
+        # Entries as loaded, kept so clean can remove outputs of any compiler version
+        self.loadedFiles = {}
+        try:
+            with open(self.manifestPath, 'r') as file:
+                manifest = json.load(file)
+            self.loadedFiles = manifest.get('files', {})
+            # A different compiler invalidates every entry
+            if manifest.get('compiler') == self.compiler:
+                self.files = dict(self.loadedFiles)
+        except (OSError, ValueError):
+            pass
+
+
+    """
+    compilerFingerprint: Returns a hash of the compiler's own source files and the given options
+    """
+    @staticmethod
+    def compilerFingerprint(options: str = '') -> str:
+        digest = hashlib.sha256(options.encode())
+        compilerDir = os.path.dirname(os.path.abspath(__file__))
+        for modulePath in sorted(glob.glob(os.path.join(compilerDir, '*.py'))):
+            with open(modulePath, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+
+    """
+    hashFile: Returns the sha256 hex digest of a file's contents
+    """
+    @staticmethod
+    def hashFile(filePath: str) -> str:
+        with open(filePath, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+
+    """
+    outputPath: Returns the .vm (or other extension) path written for the given .jack path
+    """
+    @staticmethod
+    def outputPath(filePath: str, extension: str = '.vm') -> str:
+        return os.path.splitext(filePath)[0] + extension
+
+
+    """
+    staleFiles: Returns the files that need to be compiled, in their original order
+        - Files no longer present are dropped from the manifest
+    """
+    def staleFiles(self, fileArr: list) -> list:
+        stale = []
+        keys = set()
+
+        for filePath in fileArr:
+            key = os.path.relpath(filePath, self.dirPath)
+            keys.add(key)
+
+            sourceHash = self.hashFile(filePath)
+            self.sourceHashes[filePath] = sourceHash
+
+            entry = self.files.get(key)
+            fresh = (
+                entry is not None
+                and entry['source'] == sourceHash
+                and os.path.exists(os.path.join(self.dirPath, entry['output']))
+            )
+            if not fresh:
+                stale.append(filePath)
+
+        for key in list(self.files):
+            if key not in keys:
+                del self.files[key]
+
+        return stale
+
+
+    """
+    record: Records the result of compiling a file
+        - Successful compiles are stored with the hash computed by staleFiles
+        - Failed compiles are removed so they are retried next time
+    """
+    def record(self, filePath: str, success: bool) -> None:
+        key = os.path.relpath(filePath, self.dirPath)
+        if not success:
+            self.files.pop(key, None)
+            return
+
+        sourceHash = self.sourceHashes.get(filePath) or self.hashFile(filePath)
+        self.files[key] = {'source': sourceHash, 'output': self.outputPath(key, self.extension)}
+
+
+    """
+    save: Writes the manifest, replacing the previous one atomically
+    """
+    def save(self) -> None:
+        manifest = {'compiler': self.compiler, 'files': self.files}
+        tmpPath = self.manifestPath + '.tmp'
+        with open(tmpPath, 'w') as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(tmpPath, self.manifestPath)
+
+
+    """
+    clean: Deletes the manifest and every output it recorded
+        - Returns the list of deleted output paths
+    """
+    def clean(self) -> list:
+        removed = []
+        for entry in list(self.loadedFiles.values()) + list(self.files.values()):
+            outputPath = os.path.join(self.dirPath, entry['output'])
+            if os.path.exists(outputPath):
+                os.remove(outputPath)
+                removed.append(outputPath)
+        self.files = {}
+        self.loadedFiles = {}
+
+        if os.path.exists(self.manifestPath):
+            os.remove(self.manifestPath)
+        return removed
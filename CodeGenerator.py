@@ -0,0 +1,664 @@
+from SymbolTable import SymbolTable
+from VMWriter import VMWriter
+from JackAST import (
+    ClassNode, SubroutineDec, LetStatement, IfStatement, WhileStatement, DoStatement, ReturnStatement,
+    Expression, IntegerConstant, StringConstant, KeywordConstant, Variable, ArrayEntry, SubroutineCall, UnaryOp,
+)
+
+"""
+CodeGenerator class
+    - Generates the VM code of a class from its syntax tree (JackAST), as built by JackParser
+    - Holds the code generation state and helpers CompilationEngine shares: symbol table, label
+      counters, string pool, constant folding (with the Hack platform's 16-bit two's-complement
+      arithmetic) and strength reduction
+    - Writes exactly the code CompilationEngine writes compiling the same class from its tokens,
+      with the same options
+    - Statements are generated recursively; expressions without recursion, from a stack of
+      pending nodes and continuations, so their nesting depth is not limited by Python's
+      recursion limit
+"""
+
+INT16_MIN = -32768
+INT16_MAX = 32767
+
+# Math functions folded like the corresponding operators
+MATH_OPERATORS = {'multiply': 'MULTIPLY', 'divide': 'DIVIDE'}
+
+# Static words of the Hack platform (RAM[16-255]), shared by every class of the program
+STATIC_LIMIT = 240
+
+# Default most string literals a class pools
+POOL_BUDGET = 16
+
+# Values of the keyword constants
+KEYWORD_CONSTANTS = {'true': -1, 'false': 0, 'null': 0}
+
+
+"""
+toInt16: Wraps an integer to the 16-bit two's-complement range of the Hack platform
+"""
+def toInt16(value: int) -> int:
+    return ((value + 32768) & 0xFFFF) - 32768
+
+
+"""
+foldOperator: Returns left <operator> right as computed on the Hack platform, or None if the
+result is not known at compile time
+    - Division by zero and divisions involving -32768 are left to Math.divide
+    - lt/gt whose difference overflows are left to the VM, where the result depends on the translator
+"""
+def foldOperator(operator: str, left: int, right: int):
+    if operator == 'ADD':
+        return toInt16(left + right)
+    elif operator == 'SUB':
+        return toInt16(left - right)
+    elif operator == 'MULTIPLY':
+        return toInt16(left * right)
+    elif operator == 'DIVIDE':
+        if right == 0 or left == INT16_MIN or right == INT16_MIN:
+            return None
+        # Math.divide truncates toward zero
+        quotient = abs(left) // abs(right)
+        return quotient if (left < 0) == (right < 0) else -quotient
+    elif operator == 'AND':
+        return left & right
+    elif operator == 'OR':
+        return left | right
+    elif operator == 'EQ':
+        return -1 if left == right else 0
+    elif operator in ('LT', 'GT'):
+        if not INT16_MIN <= left - right <= INT16_MAX:
+            return None
+        result = left < right if operator == 'LT' else left > right
+        return -1 if result else 0
+    return None
+
+
+"""
+foldUnary: Returns <operator> operand as computed on the Hack platform
+"""
+def foldUnary(operator: str, operand: int) -> int:
+    if operator == 'NEG':
+        return toInt16(-operand)
+    return ~operand
+
+
+"""
+additionCount: Returns the number of additions needed to multiply by a constant with an add chain
+    - Doubling for every bit after the leading one, plus adding the operand for every other set bit
+"""
+def additionCount(multiplier: int) -> int:
+    magnitude = abs(multiplier)
+    if magnitude <= 1:
+        return 0
+    return magnitude.bit_length() - 1 + bin(magnitude).count('1') - 1
+
+class CodeGenerator:
+    """
+    Constructor: Creates a generator writing to vmWriter
+        - foldConstants: evaluate constant expressions at compile time
+        - strengthReduction: reduce multiplications by constants needing at most this many
+          additions (and x * 0, x * 1, x / 1, ...) to inline code; None disables strength reduction
+        - poolStrings: build each distinct string literal of the class once, into a hidden static
+        - poolBudget: most literals the class pools (the statics of the whole program are limited
+          to STATIC_LIMIT); further literals are built every time
+    """
+    def __init__(self, vmWriter: VMWriter, foldConstants: bool = True, strengthReduction: int = None,
+                 poolStrings: bool = False, poolBudget: int = POOL_BUDGET):
+
+        self.symbolTable = SymbolTable()
+        self.vmWriter = vmWriter
+        self.foldConstants = foldConstants
+        self.strengthReduction = strengthReduction
+        self.poolStrings = poolStrings
+        self.poolBudget = poolBudget
+
+        # String literal -> index of the static variable holding it
+        self.stringPool = {}
+
+        self.className = ''
+        self.currSubroutineName = ''
+        self.currSubroutineType = ''
+        self.currSubroutineReturnType = ''
+        self.currIfIdx = 0
+        self.currWhileIdx = 0
+        self.currStringIdx = 0
+
+        # Node types -> method generating a statement / starting the code of a term
+        self.statementGenerators = {
+            LetStatement: self.generateLet,
+            IfStatement: self.generateIf,
+            WhileStatement: self.generateWhile,
+            DoStatement: self.generateDo,
+            ReturnStatement: self.generateReturn,
+        }
+        self.termGenerators = {
+            Variable: self.generateVariable,
+            IntegerConstant: self.generateInteger,
+            Expression: self.generateOperations,
+            SubroutineCall: self.generateCall,
+            ArrayEntry: self.generateArrayEntry,
+            KeywordConstant: self.generateKeyword,
+            UnaryOp: self.generateUnary,
+            StringConstant: self.generateStringConstant,
+        }
+
+
+    """
+    generateClass: Generates the code of a class (its subroutines; the class itself has no code)
+    """
+    def generateClass(self, classNode: ClassNode):
+        self.className = classNode.name
+        for varDec in classNode.classVarDecs:
+            for name in varDec.names:
+                self.symbolTable.define(name, varDec.type, varDec.kind)
+
+        for subroutine in classNode.subroutines:
+            self.generateSubroutine(subroutine)
+
+
+    """
+    generateSubroutine: Generates a constructor, function or method
+
+        - Methods count one more local than they declare, as CompilationEngine does
+    """
+    def generateSubroutine(self, subroutine: SubroutineDec):
+        symbolTable = self.symbolTable
+
+        # New subroutine scope, label indexes restart
+        symbolTable.startSubroutine()
+        self.currIfIdx = 0
+        self.currWhileIdx = 0
+        self.currStringIdx = 0
+
+        self.currSubroutineType = subroutine.kind
+        self.currSubroutineReturnType = subroutine.returnType
+        self.currSubroutineName = subroutine.name
+
+        # The object is the first argument of a method
+        if subroutine.kind == 'method':
+            symbolTable.define('this', self.className, 'argument')
+        for varDec in subroutine.parameters + subroutine.varDecs:
+            for name in varDec.names:
+                symbolTable.define(name, varDec.type, varDec.kind)
+
+        nVars = symbolTable.VarCount('local')
+        if subroutine.kind == 'method':
+            nVars += 1
+        self.vmWriter.writeFunction(f'{self.className}.{subroutine.name}', nVars)
+
+        # Allocate the object of a constructor, set this to the object of a method
+        if subroutine.kind == 'constructor':
+            self.vmWriter.writePush('constant', symbolTable.VarCount('field'))
+            self.vmWriter.writeCall('Memory.alloc', 1)
+            self.vmWriter.writePop('pointer', 0)
+        elif subroutine.kind == 'method':
+            self.vmWriter.writePush('argument', 0)
+            self.vmWriter.writePop('pointer', 0)
+
+        self.generateStatements(subroutine.statements)
+
+
+    """
+    generateStatements: Generates a sequence of statements
+    """
+    def generateStatements(self, statements: list):
+        statementGenerators = self.statementGenerators
+        for statement in statements:
+            statementGenerators[type(statement)](statement)
+
+
+    """
+    generateLet: Generates a let statement
+        - An array entry's address is computed before the value, and kept in temp 0 while
+          pointer 1 is set
+    """
+    def generateLet(self, statement: LetStatement):
+        symbol = self.resolveVariable(statement.name)
+
+        if statement.index is None:
+            self.generateExpression(statement.value)
+            self.vmWriter.writePop(symbol.segment, symbol.index)
+            return
+
+        self.vmWriter.writePush(symbol.segment, symbol.index)
+        self.generateExpression(statement.index)
+        self.vmWriter.writeArithmetic('ADD')
+        self.generateExpression(statement.value)
+        self.vmWriter.writePop('temp', 0)
+        self.vmWriter.writePop('pointer', 1)
+        self.vmWriter.writePush('temp', 0)
+        self.vmWriter.writePop('that', 0)
+
+
+    """
+    generateIf: Generates an if statement, with its else clause if any
+    """
+    def generateIf(self, statement: IfStatement):
+        self.generateExpression(statement.condition)
+
+        label_true = f'IF_TRUE_{str(self.currIfIdx)}'
+        label_false = f'IF_FALSE_{str(self.currIfIdx)}'
+        label_end = f'IF_END_{str(self.currIfIdx)}'
+        self.currIfIdx += 1
+
+        self.vmWriter.writeIf(label_true)
+        self.vmWriter.writeGoto(label_false)
+        self.vmWriter.writeLabel(label_true)
+        self.generateStatements(statement.statements)
+
+        if statement.elseStatements is None:
+            self.vmWriter.writeLabel(label_false)
+            return
+
+        self.vmWriter.writeGoto(label_end)
+        self.vmWriter.writeLabel(label_false)
+        self.generateStatements(statement.elseStatements)
+        self.vmWriter.writeLabel(label_end)
+
+
+    """
+    generateWhile: Generates a while statement
+    """
+    def generateWhile(self, statement: WhileStatement):
+        label_while_start = f'WHILE_START_{str(self.currWhileIdx)}'
+        label_while_end = f'WHILE_END_{str(self.currWhileIdx)}'
+        self.currWhileIdx += 1
+
+        self.vmWriter.writeLabel(label_while_start)
+        self.generateExpression(statement.condition)
+        self.vmWriter.writeArithmetic('NOT')
+        self.vmWriter.writeIf(label_while_end)
+
+        self.generateStatements(statement.statements)
+
+        self.vmWriter.writeGoto(label_while_start)
+        self.vmWriter.writeLabel(label_while_end)
+
+
+    """
+    generateDo: Generates a do statement, discarding the returned value
+
+        - As in CompilationEngine.compileDo, calls are not folded, and a method of the current
+          class gets its object pushed after the arguments
+    """
+    def generateDo(self, statement: DoStatement):
+        call = statement.call
+        nArgs = len(call.args)
+
+        if call.receiver is None:
+            for arg in call.args:
+                self.generateExpression(arg)
+            self.vmWriter.writePush('pointer', 0)
+            nArgs += 1
+            functionName = f'{self.className}.{call.name}'
+        else:
+            # Method call if the receiver is a variable, else function call
+            symbol = self.symbolTable.resolve(call.receiver)
+            if symbol:
+                self.vmWriter.writePush(symbol.segment, symbol.index)
+                nArgs += 1
+                functionName = f'{symbol.type}.{call.name}'
+            else:
+                functionName = f'{call.receiver}.{call.name}'
+            for arg in call.args:
+                self.generateExpression(arg)
+
+        self.vmWriter.writeCall(functionName, nArgs)
+        self.vmWriter.writePop('temp', 0)   # Discard default returned 0
+
+
+    """
+    generateReturn: Generates a return statement
+        - Void subroutines return 0
+    """
+    def generateReturn(self, statement: ReturnStatement):
+        if statement.value is not None:
+            self.generateExpression(statement.value)
+
+        if self.currSubroutineReturnType == 'void':
+            self.vmWriter.writePush('constant', 0)
+
+        self.vmWriter.writeReturn()
+
+
+    """
+    generateExpression: Generates an expression (or term)
+        - Returns the value of the expression if it is a compile-time constant, else None
+        - tasks holds the nodes still to generate and, below their nodes, the continuations
+          (tuples whose first item is the method to call) finishing the terms they belong to;
+          every generated node leaves its constant value (or None) on values
+    """
+    def generateExpression(self, node):
+        termGenerators = self.termGenerators
+        tasks = [node]
+        values = []
+
+        while tasks:
+            task = tasks.pop()
+            if type(task) is tuple:
+                task[0](task, tasks, values)
+            else:
+                termGenerators[type(task)](task, tasks, values)
+
+        return values[0]
+
+
+    """
+    generateVariable: Generates a variable term
+    """
+    def generateVariable(self, node: Variable, tasks: list, values: list):
+        symbol = self.resolveVariable(node.name)
+        self.vmWriter.writePush(symbol.segment, symbol.index)
+        values.append(None)
+
+
+    """
+    generateInteger: Generates an integer constant
+    """
+    def generateInteger(self, node: IntegerConstant, tasks: list, values: list):
+        self.vmWriter.writePush('constant', node.value)
+        values.append(node.value)
+
+
+    """
+    generateStringConstant: Generates a string constant
+    """
+    def generateStringConstant(self, node: StringConstant, tasks: list, values: list):
+        if self.poolStrings:
+            self.writePooledString(node.text)
+        else:
+            self.writeString(node.text)
+        values.append(None)
+
+
+    """
+    generateKeyword: Generates a keyword constant -- true, false, null or this
+    """
+    def generateKeyword(self, node: KeywordConstant, tasks: list, values: list):
+        value = KEYWORD_CONSTANTS.get(node.keyword)
+        if value is not None:
+            self.writeConstant(value)
+        else:
+            self.vmWriter.writePush('pointer', 0)
+        values.append(value)
+
+
+    """
+    generateArrayEntry: Starts an array entry -- pushes the base address, then the index
+    """
+    def generateArrayEntry(self, node: ArrayEntry, tasks: list, values: list):
+        symbol = self.resolveVariable(node.name)
+        self.vmWriter.writePush(symbol.segment, symbol.index)
+        tasks.append((self.finishArrayEntry,))
+        tasks.append(node.index)
+
+
+    """
+    finishArrayEntry: Reads the array entry once its index is pushed
+    """
+    def finishArrayEntry(self, task: tuple, tasks: list, values: list):
+        values[-1] = None
+        self.vmWriter.writeArithmetic('ADD')
+        self.vmWriter.writePop('pointer', 1)
+        self.vmWriter.writePush('that', 0)
+
+
+    """
+    generateUnary: Starts a unary operator term -- its operand first
+    """
+    def generateUnary(self, node: UnaryOp, tasks: list, values: list):
+        tasks.append((self.finishUnary, node.operator, self.vmWriter.tell()))
+        tasks.append(node.operand)
+
+
+    """
+    finishUnary: Applies a unary operator to its operand, whose code starts at the task's position
+    """
+    def finishUnary(self, task: tuple, tasks: list, values: list):
+        _, operator, start = task
+        operand = values[-1]
+        if self.foldConstants and operand is not None:
+            values[-1] = foldUnary(operator, operand)
+            self.replaceWithConstant(start, values[-1])
+        else:
+            self.vmWriter.writeArithmetic(operator)
+            values[-1] = None
+
+
+    """
+    generateOperations: Starts an expression of several terms -- its first term first
+    """
+    def generateOperations(self, node: Expression, tasks: list, values: list):
+        tasks.append((self.beginOperation, node, self.vmWriter.tell()))
+        tasks.append(node.terms[0])
+
+
+    """
+    beginOperation: Starts the right operand of the operation after term 1 of an expression
+    """
+    def beginOperation(self, task: tuple, tasks: list, values: list):
+        _, node, start = task
+        tasks.append((self.finishOperation, node, 1, start, self.vmWriter.tell()))
+        tasks.append(node.terms[1])
+
+
+    """
+    finishOperation: Applies the operator before term i of an expression, then starts the next term
+        - The code of the expression starts at start, the code of term i at rightStart
+        - Both operands constant: folded; one constant: strength reduced if enabled
+    """
+    def finishOperation(self, task: tuple, tasks: list, values: list):
+        _, node, i, start, rightStart = task
+        operator = node.operators[i - 1]
+        right = values.pop()
+        left = values[-1]
+
+        folded = None
+        if self.foldConstants and left is not None and right is not None:
+            # Both operands constant -- replace their code with the result
+            folded = foldOperator(operator, left, right)
+            if folded is not None:
+                self.replaceWithConstant(start, folded)
+        if folded is None:
+            # One operand constant -- multiply or divide without calling Math
+            if self.strengthReduction is None or not self.reduceStrength(operator, start, rightStart, left, right):
+                if operator == 'MULTIPLY':
+                    self.vmWriter.writeCall('Math.multiply', 2)
+                elif operator == 'DIVIDE':
+                    self.vmWriter.writeCall('Math.divide', 2)
+                else:
+                    self.vmWriter.writeArithmetic(operator)
+        values[-1] = folded
+
+        i += 1
+        if i < len(node.terms):
+            tasks.append((self.finishOperation, node, i, start, self.vmWriter.tell()))
+            tasks.append(node.terms[i])
+
+
+    """
+    generateCall: Starts a subroutine call -- pushes the object of a method call, then the arguments
+        - A method of the current class gets this pushed before its arguments (unlike in do statements)
+    """
+    def generateCall(self, node: SubroutineCall, tasks: list, values: list):
+        argsStart = None
+        if node.receiver is None:
+            self.vmWriter.writePush('pointer', 0)
+            className = self.className
+            nArgs = 1
+        else:
+            # Method call if the receiver is a variable, else function call (which may be folded)
+            symbol = self.symbolTable.resolve(node.receiver)
+            if symbol:
+                self.vmWriter.writePush(symbol.segment, symbol.index)
+                className = symbol.type
+                nArgs = 1
+            else:
+                className = node.receiver
+                nArgs = 0
+            argsStart = self.vmWriter.tell()
+
+        tasks.append((self.finishCall, node, className, nArgs + len(node.args), argsStart))
+        tasks.extend(reversed(node.args))
+
+
+    """
+    finishCall: Writes a call once its arguments are pushed
+        - Math.multiply / Math.divide of constants are folded like * and /
+    """
+    def finishCall(self, task: tuple, tasks: list, values: list):
+        _, node, className, nArgs, argsStart = task
+        argCount = len(node.args)
+        argValues = values[len(values) - argCount:]
+        del values[len(values) - argCount:]
+
+        if (argsStart is not None and self.foldConstants and className == 'Math'
+                and node.name in MATH_OPERATORS and nArgs == 2 and None not in argValues):
+            value = foldOperator(MATH_OPERATORS[node.name], *argValues)
+            if value is not None:
+                self.replaceWithConstant(argsStart, value)
+                values.append(value)
+                return
+
+        self.vmWriter.writeCall(f'{className}.{node.name}', nArgs)
+        values.append(None)
+
+
+    """
+    reduceStrength: Replaces a multiplication or division with one constant operand by cheaper code
+        - The code of the left operand starts at start, the code of the right one at rightStart
+        - left, right: the constant values of the operands (None if not constant)
+        - x * 0 is 0 (x is still evaluated if it calls a subroutine), x * 1 and x / 1 are x,
+          x * -1 and x / -1 are -x, and x * c is an add chain of at most strengthReduction additions
+        - Other divisions are kept: the VM has no shifts, and Math.divide truncates toward zero
+        - Returns whether the operation was reduced
+    """
+    def reduceStrength(self, operator: str, start: int, rightStart: int, left: int, right: int) -> bool:
+        if operator == 'MULTIPLY' and (left is None) != (right is None):
+            constant = right if left is None else left
+            if additionCount(constant) > self.strengthReduction:
+                return False
+        elif operator == 'DIVIDE' and left is None and right in (1, -1):
+            constant = right
+        else:
+            return False
+
+        # Drop the code of the constant, leaving the other operand on the stack
+        if left is None:
+            self.vmWriter.truncate(rightStart)
+        else:
+            self.vmWriter.remove(start, rightStart)
+
+        if constant == 0:
+            if any(instruction.startswith('call ') for instruction in self.vmWriter.vmCode[start:]):
+                self.vmWriter.writePop('temp', 1)   # Discard the operand, keeping its side effects
+            else:
+                self.vmWriter.truncate(start)
+            self.vmWriter.writePush('constant', 0)
+            return True
+
+        self.writeMultiply(abs(constant))
+        if constant < 0:
+            self.vmWriter.writeArithmetic('NEG')
+        return True
+
+
+    """
+    writeMultiply: Writes an add chain multiplying the value on top of the stack by a positive constant
+        - Doubles the running product for every bit after the leading one, adding the operand
+          (saved in temp 1) for every set bit; temp 2 duplicates the running product
+    """
+    def writeMultiply(self, multiplier: int):
+        bits = bin(multiplier)[3:]
+        if '1' in bits:
+            self.vmWriter.writePop('temp', 1)
+            self.vmWriter.writePush('temp', 1)
+
+        for bit in bits:
+            self.vmWriter.writePop('temp', 2)
+            self.vmWriter.writePush('temp', 2)
+            self.vmWriter.writePush('temp', 2)
+            self.vmWriter.writeArithmetic('ADD')
+            if bit == '1':
+                self.vmWriter.writePush('temp', 1)
+                self.vmWriter.writeArithmetic('ADD')
+
+
+    """
+    writeConstant: Writes code pushing a 16-bit constant, which may be negative
+    """
+    def writeConstant(self, value: int):
+        if value >= 0:
+            self.vmWriter.writePush('constant', value)
+        elif value == INT16_MIN:
+            # 32768 cannot be pushed, but ~32767 is -32768
+            self.vmWriter.writePush('constant', INT16_MAX)
+            self.vmWriter.writeArithmetic('NOT')
+        else:
+            self.vmWriter.writePush('constant', -value)
+            self.vmWriter.writeArithmetic('NEG')
+
+
+    """
+    replaceWithConstant: Replaces the code written since position with a push of a folded constant
+    """
+    def replaceWithConstant(self, position: int, value: int):
+        self.vmWriter.truncate(position)
+        self.writeConstant(value)
+
+
+    """
+    resolveVariable: Returns the Symbol of a variable the code uses, which must be declared
+    """
+    def resolveVariable(self, name: str):
+        symbol = self.symbolTable.resolve(name)
+        if symbol is None:
+            raise RuntimeError(f'Identifier not declared - {name}')
+        return symbol
+
+
+    """
+    writeString: Writes code building a new String object holding the given text
+    """
+    def writeString(self, text: str):
+        self.vmWriter.writePush('constant', len(text))
+        self.vmWriter.writeCall('String.new', 1)
+
+        for c in text:
+            self.vmWriter.writePush('constant', ord(c))
+            self.vmWriter.writeCall('String.appendChar', 2)
+
+
+    """
+    writePooledString: Writes code pushing the class's shared String object for the given text
+        - Identical literals of a class share one static variable, numbered after the declared statics
+          (static declarations all precede the subroutines, so their count is final by now)
+        - The String is built the first time the code runs, while the static is still 0
+        - Once the class has pooled poolBudget literals, or its statics would exceed STATIC_LIMIT,
+          new literals are built every time instead
+    """
+    def writePooledString(self, text: str):
+        if text not in self.stringPool:
+            if len(self.stringPool) >= self.poolBudget or self.staticCount() >= STATIC_LIMIT:
+                self.writeString(text)
+                return
+            self.stringPool[text] = self.symbolTable.VarCount('static') + len(self.stringPool)
+        index = self.stringPool[text]
+
+        label_ready = f'STRING_READY_{str(self.currStringIdx)}'
+        self.currStringIdx += 1
+
+        self.vmWriter.writePush('static', index)
+        self.vmWriter.writeIf(label_ready)
+        self.writeString(text)
+        self.vmWriter.writePop('static', index)
+        self.vmWriter.writeLabel(label_ready)
+        self.vmWriter.writePush('static', index)
+
+
+    """
+    staticCount: Returns the static words the class uses -- its declared statics and pooled strings
+    """
+    def staticCount(self) -> int:
+        return self.symbolTable.VarCount('static') + len(self.stringPool)
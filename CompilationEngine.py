@@ -1,39 +1,79 @@
 from JackTokenizer import JackTokenizer
-from SymbolTable import SymbolTable
 from VMWriter import VMWriter
+from CompilerStats import CompilerStats
+from CodeGenerator import CodeGenerator, POOL_BUDGET, MATH_OPERATORS, foldOperator, foldUnary
+from ExpressionParser import ExpressionParser
+from JackParser import JackParser
 
 """
 CompilationEngine class
     - Takes the input from the tokenizer
     - Compiles the non-terminal tokens
     - Outputs to .vm file
+    - Folds constant expressions (including Math.multiply/Math.divide calls on constants)
+      at compile time, with the Hack platform's 16-bit two's-complement arithmetic
+    - Optionally reduces multiplications and divisions by a constant to cheaper code
+      (strength reduction), avoiding calls to Math.multiply/Math.divide
+    - Optionally pools string literals: each distinct literal of a class is built once, on first
+      use, into a hidden static variable and reused afterwards (pooled strings are shared, so
+      they must not be disposed or modified by the program)
+    - Compiles in a single pass, generating code as it reads the tokens, with the state and
+      helpers of CodeGenerator; with ast, parses the class into a syntax tree first (JackParser)
+      and generates the same code from the tree (CodeGenerator)
 """
 
-class CompilationEngine:
+class CompilationEngine(CodeGenerator):
     """
     Constructor: Gets input from tokenizer and compiles VM code
+        - vmWriter: optional writer to use instead of a new VMWriter for filePath
+        - stats: optional CompilerStats to instrument this compile with
+        - foldConstants: evaluate constant expressions at compile time
+        - strengthReduction: reduce multiplications by constants needing at most this many
+          additions (and x * 0, x * 1, x / 1, ...) to inline code; None disables strength reduction
+        - poolStrings: build each distinct string literal of the class once, into a hidden static
+        - poolBudget: most literals the class pools; further literals are built every time
+        - recursiveExpressions: compile expressions with the recursive compileExpression / compileTerm
+          instead of ExpressionParser (same code, but nesting is limited by Python's recursion limit)
+        - ast: parse the class into a syntax tree, then generate its code from the tree (same code)
     """
-    def __init__(self, tokenizer:  JackTokenizer, filePath: str):
+    def __init__(self, tokenizer:  JackTokenizer, filePath: str, vmWriter: VMWriter = None,
+                 stats: CompilerStats = None, foldConstants: bool = True, strengthReduction: int = None,
+                 poolStrings: bool = False, recursiveExpressions: bool = False, ast: bool = False,
+                 poolBudget: int = POOL_BUDGET):
 
+        super().__init__(vmWriter or VMWriter(filePath=filePath), foldConstants=foldConstants,
+                         strengthReduction=strengthReduction, poolStrings=poolStrings, poolBudget=poolBudget)
         self.tokenizer = tokenizer
-        self.symbolTable = SymbolTable()
-        self.vmWriter = VMWriter(filePath=filePath)
+        # Parser of the first pass, with ast
+        self.parser = None
+        # Non-recursive expression compiler, unless ast or recursiveExpressions
+        self.expressionParser = None
 
-        self.className = ''
-        self.currSubroutineName = ''
-        self.currSubroutineType = ''
-        self.currSubroutineReturnType = ''
-        self.currIfIdx = 0
-        self.currWhileIdx = 0
+        if ast:
+            self.parser = JackParser(tokenizer)
+            self.compileClass = self.parseAndGenerateClass
+        elif not recursiveExpressions:
+            self.expressionParser = ExpressionParser(self)
+            self.compileExpression = self.expressionParser.compileExpression
 
 
-        if len(tokenizer.lines) == 0:
+        if not tokenizer.hasMoreTokens():
             print('File empty. Nothing to compile')
             return
-        
+
+        if stats:
+            stats.instrument(self)
+
         self.compileClass()
 
         self.vmWriter.close()
+
+
+    """
+    parseAndGenerateClass: Compiles a complete class in two passes -- parses it into a syntax tree, then generates its code
+    """
+    def parseAndGenerateClass(self):
+        self.generateClass(self.parser.parseClass())
     
     """
     compileClass: Compiles a complete class (called immediately after constructor)
@@ -152,6 +192,7 @@ class CompilationEngine:
         # Reset label indexes
         self.currIfIdx = 0
         self.currWhileIdx = 0
+        self.currStringIdx = 0
 
         # Get function/method/constructor keyword
         self.currSubroutineType = self.tokenizer.keyWord()
@@ -396,8 +437,7 @@ class CompilationEngine:
         
         # Store for VM writer
         currToken = ''
-        currTokenKind = ''
-        currTokenIdx = ''
+        symbol = None
 
         # Get let keyword
 
@@ -410,8 +450,7 @@ class CompilationEngine:
         # Get identifier -- varName('['expression']')?
         if self.tokenizer.tokenType() == 'IDENTIFIER':
             currToken = self.tokenizer.identifier()
-            currTokenKind = self.symbolTable.KindOf(currToken)
-            currTokenIdx = self.symbolTable.IndexOf(currToken)
+            symbol = self.resolveVariable(currToken)
 
         else:
             raise RuntimeError('Identifier expected in compileLet')
@@ -434,7 +473,7 @@ class CompilationEngine:
                     self.tokenizer.advance()
                 
                 # Push array base addr to stack
-                self.vmWriter.writePush(currTokenKind, currTokenIdx)
+                self.vmWriter.writePush(symbol.segment, symbol.index)
 
                 # Compile expression for array index
                 self.compileExpression()
@@ -473,7 +512,7 @@ class CompilationEngine:
             self.vmWriter.writePush('temp', 0)
             self.vmWriter.writePop('that', 0)
         else:
-            self.vmWriter.writePop(currTokenKind, currTokenIdx)
+            self.vmWriter.writePop(symbol.segment, symbol.index)
 
 
     """
@@ -680,11 +719,10 @@ class CompilationEngine:
                 elif nextToken == '.':
 
                     # If current token is name of object, then this is a METHOD
-                    if self.symbolTable.isDefined(currToken):
-                        className = self.symbolTable.TypeOf(currToken)
-                        objType = self.symbolTable.KindOf(currToken)
-                        objIdx = self.symbolTable.IndexOf(currToken)
-                        self.vmWriter.writePush(objType, objIdx)
+                    symbol = self.symbolTable.resolve(currToken)
+                    if symbol:
+                        className = symbol.type
+                        self.vmWriter.writePush(symbol.segment, symbol.index)
                         nArgs += 1
                     else:
                         className = currToken
@@ -765,10 +803,13 @@ class CompilationEngine:
 
     """
     compileExpression: Compiles an expression -- term (op term)*
+        - Returns the value of the expression if it is a compile-time constant, else None
+        - Constant operands are folded: their code is replaced by a push of the result
     """
     def compileExpression(self):
-        
-        self.compileTerm()
+
+        start = self.vmWriter.tell()
+        value = self.compileTerm()
 
         while True:
             tokenType = self.tokenizer.tokenType()
@@ -806,7 +847,24 @@ class CompilationEngine:
                 else:
                     raise RuntimeError('Unexpected end of input in compileExpression')
 
-                self.compileTerm()
+                rightStart = self.vmWriter.tell()
+                right = self.compileTerm()
+
+                # Both operands constant -- replace their code with the result
+                folded = None
+                if self.foldConstants and value is not None and right is not None:
+                    folded = foldOperator(operator, value, right)
+                if folded is not None:
+                    self.replaceWithConstant(start, folded)
+                    value = folded
+                    continue
+
+                # One operand constant -- multiply or divide without calling Math
+                reduced = (self.strengthReduction is not None
+                           and self.reduceStrength(operator, start, rightStart, value, right))
+                value = None
+                if reduced:
+                    continue
 
                 if operator == 'MULTIPLY':
                     self.vmWriter.writeCall('Math.multiply', 2) # Call Math.multiply
@@ -817,6 +875,8 @@ class CompilationEngine:
             else:
                 break
 
+        return value
+
 
     """
     compileTerm: Compiles a term
@@ -825,6 +885,8 @@ class CompilationEngine:
         - A single look-ahead token, which may be one of "[", "(", or "." suffices to distinguish between the possibilities.
         - Any other token is not part of this term and should not be advanced over
         - Terms: int const, str const, keyword const, varName, varName'['expression']', subroutine call, '('expression')', unary op term
+        - Returns the value of the term if it is a compile-time constant (int const, true/false/null,
+          constant expression in parentheses, unary op on a constant, Math.multiply/divide of constants), else None
 
         SUBROUTINE CALL:
             - Needs to differentiate between function, method, constructor calls
@@ -861,11 +923,10 @@ class CompilationEngine:
     """
     def compileTerm(self):
 
+        value = None
         tokenType = self.tokenizer.tokenType()
         if tokenType == 'IDENTIFIER':
             currToken = self.tokenizer.identifier()
-            currTokenKind = ''
-            currTokenIdx = ''
             nArgs = 0
 
             if self.tokenizer.hasMoreTokens():
@@ -879,9 +940,8 @@ class CompilationEngine:
                             self.tokenizer.advance()
 
                         # Push array base addr to stack
-                        currTokenKind = self.symbolTable.KindOf(currToken)
-                        currTokenIdx = self.symbolTable.IndexOf(currToken)
-                        self.vmWriter.writePush(currTokenKind, currTokenIdx)
+                        symbol = self.resolveVariable(currToken)
+                        self.vmWriter.writePush(symbol.segment, symbol.index)
 
                         self.compileExpression()
                         if self.tokenizer.hasMoreTokens():
@@ -907,7 +967,7 @@ class CompilationEngine:
                         if self.tokenizer.hasMoreTokens():
                             self.tokenizer.advance()
                         
-                        self.vmWriter.writeCall(currToken, nArgs)
+                        self.vmWriter.writeCall(f'{self.className}.{currToken}', nArgs)
 
                     # METHOD OR FUNCTION OF OTHER CLASS
                     # subroutineName'('expressionList')'
@@ -917,11 +977,10 @@ class CompilationEngine:
                         className = ''
                         subroutineName = ''
                         # Handle METHOD call on object
-                        if self.symbolTable.isDefined(currToken):
-                            currTokenKind = self.symbolTable.KindOf(currToken)
-                            currTokenIdx = self.symbolTable.IndexOf(currToken)
-                            className = self.symbolTable.TypeOf(currToken)
-                            self.vmWriter.writePush(currTokenKind, currTokenIdx)
+                        symbol = self.symbolTable.resolve(currToken)
+                        if symbol:
+                            className = symbol.type
+                            self.vmWriter.writePush(symbol.segment, symbol.index)
                             nArgs += 1
                         # Handle FUNCTION call
                         else:
@@ -950,19 +1009,28 @@ class CompilationEngine:
                         
                         if self.tokenizer.hasMoreTokens():
                             self.tokenizer.advance()
-                        nArgs += self.compileExpressionList()
+                        argsStart = self.vmWriter.tell()
+                        argValues = []
+                        nArgs += self.compileExpressionList(argValues)
 
                         # Get closing parenthesis of expression list
                         if self.tokenizer.hasMoreTokens():
                             self.tokenizer.advance()
-                        
+
+                        # Math.multiply / Math.divide of constants
+                        if (self.foldConstants and className == 'Math' and subroutineName in MATH_OPERATORS
+                                and nArgs == 2 and None not in argValues):
+                            value = foldOperator(MATH_OPERATORS[subroutineName], *argValues)
+                            if value is not None:
+                                self.replaceWithConstant(argsStart, value)
+                                return value
+
                         self.vmWriter.writeCall(f'{className}.{subroutineName}', nArgs)
 
                     # Next token is comma or semicolon indicating end of identifier term
                     else:
-                        currTokenKind = self.symbolTable.KindOf(currToken)
-                        currTokenIdx = self.symbolTable.IndexOf(currToken)
-                        self.vmWriter.writePush(currTokenKind, currTokenIdx)
+                        symbol = self.resolveVariable(currToken)
+                        self.vmWriter.writePush(symbol.segment, symbol.index)
 
 
 
@@ -978,19 +1046,18 @@ class CompilationEngine:
         elif tokenType == 'INT_CONST':
             intValToken = self.tokenizer.intVal()
             self.vmWriter.writePush('constant', int(intValToken))
+            value = int(intValToken)
 
             if self.tokenizer.hasMoreTokens():
                 self.tokenizer.advance()
             
         elif tokenType == 'STRING_CONST':
             strValToken = self.tokenizer.stringVal()
-            
-            self.vmWriter.writePush('constant', len(strValToken))
-            self.vmWriter.writeCall('String.new', 1)
 
-            for c in strValToken:
-                self.vmWriter.writePush('constant', ord(c))
-                self.vmWriter.writeCall('String.appendChar', 2)
+            if self.poolStrings:
+                self.writePooledString(strValToken)
+            else:
+                self.writeString(strValToken)
 
             if self.tokenizer.hasMoreTokens():
                 self.tokenizer.advance()
@@ -1001,16 +1068,19 @@ class CompilationEngine:
             if self.tokenizer.hasMoreTokens():
                 self.tokenizer.advance()
             if token == '(':
-                self.compileExpression()
+                value = self.compileExpression()
                 # Get closing parenthesis
                 if self.tokenizer.hasMoreTokens():
                     self.tokenizer.advance()
-            elif token == '~':
-                self.compileTerm()
-                self.vmWriter.writeArithmetic('NOT')
-            elif token == '-':
-                self.compileTerm()
-                self.vmWriter.writeArithmetic('NEG')
+            elif token == '~' or token == '-':
+                operator = 'NOT' if token == '~' else 'NEG'
+                start = self.vmWriter.tell()
+                operand = self.compileTerm()
+                if self.foldConstants and operand is not None:
+                    value = foldUnary(operator, operand)
+                    self.replaceWithConstant(start, value)
+                else:
+                    self.vmWriter.writeArithmetic(operator)
         
         # true, false, null, etc.
         elif tokenType == 'KEYWORD':
@@ -1018,20 +1088,26 @@ class CompilationEngine:
             if token == 'true':
                 self.vmWriter.writePush('constant', 1)
                 self.vmWriter.writeArithmetic('NEG')
+                value = -1
             elif token in ('false', 'null'):
                 self.vmWriter.writePush('constant', 0)
+                value = 0
             elif token == 'this':
                 self.vmWriter.writePush('pointer', 0)
 
             if self.tokenizer.hasMoreTokens():
                 self.tokenizer.advance()
 
+        return value
+
 
 
     """
     compileExpressionList: Compiles a (possibly empty) comma-separated list of expressions
+        - Returns the number of expressions
+        - values: optional list to which the constant value (or None) of each expression is appended
     """
-    def compileExpressionList(self):
+    def compileExpressionList(self, values: list = None):
 
         count = 0
 
@@ -1041,12 +1117,16 @@ class CompilationEngine:
             return 0
         
         else: 
-            self.compileExpression()
+            value = self.compileExpression()
+            if values is not None:
+                values.append(value)
             count += 1
             while self.tokenizer.tokenType() == 'SYMBOL' and self.tokenizer.symbol() == ',':
                 if self.tokenizer.hasMoreTokens():
                     self.tokenizer.advance()
-                self.compileExpression()
+                value = self.compileExpression()
+                if values is not None:
+                    values.append(value)
                 count += 1
                 if self.tokenizer.tokenType() == 'SYMBOL' and self.tokenizer.symbol() == ')':
                     break
@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+"""
+CompileServer class
+    - Compile daemon: a warm compiler process serving compile requests over a local Unix
+      domain socket, so small builds do not pay Python start-up and module imports each time
+    - Keeps the output of every class it compiled in memory, keyed by path and options;
+      a class whose source hash is unchanged is not recompiled, and its .vm (or .vmb)
+      file is only rewritten if it was deleted or changed on disk
+    - Requests are handled one at a time, so concurrent builds never write the same file at once
+    - Run as a thin client (the default), this module only imports the standard library and
+      sends the request; the compiler modules are loaded by the daemon (--serve)
+
+    Protocol: one JSON object per connection in each direction, each on a single line
+        - {"command": "compile", "paths": [...], "options": {...}, "force": bool}
+            -> {"results": [[filePath, error, info], ...], "cached": <number of files not recompiled>}
+        - {"command": "status"} -> {"classes": n, "hits": n, "misses": n, "uptime": seconds}
+        - {"command": "shutdown"} -> {"stopping": true}
+        - A request that cannot be served gets {"error": message}
+    - paths are absolute .jack files or directories of them; options are compileFile options
+"""
+
+# Not tempfile.gettempdir(): importing tempfile costs the client more than the rest of its imports
+DEFAULT_SOCKET = os.path.join(os.environ.get('TMPDIR', '/tmp'), f'jack-compiler-{os.getuid()}.sock')
+
+# Seconds a client has to send its request, and to read its reply
+REQUEST_TIMEOUT = 10
+
+# compileFile options a client may set; others (asm, stats) need the whole build in one process
+OPTIONS = ('stream', 'peephole', 'fold', 'strengthReduce', 'poolStrings', 'poolBudget', 'binary', 'streamOutput', 'ast')
+
+
+class CompileServer:
+    """
+    Constructor: Creates a server for the given socket path, with an empty class cache
+    """
+    def __init__(self, socketPath: str = DEFAULT_SOCKET):
+        self.socketPath = socketPath
+        # (filePath, options key) -> {'source': hash, 'output': path, 'data': bytes, 'stat': (size, mtime), 'info': dict}
+        self.classes = {}
+        self.hits = 0
+        self.misses = 0
+        self.startTime = time.time()
+        self.running = False
+
+
+    """
+    serve: Listens on the socket and handles requests until a shutdown request
+        - Replaces a stale socket file left by a daemon that did not exit cleanly
+        - A client that disconnects early, or sends nothing within REQUEST_TIMEOUT, is dropped
+    """
+    def serve(self) -> None:
+        # Load the compiler up front, so the first request is served warm
+        import JackCompiler
+
+        if os.path.exists(self.socketPath):
+            if ping(self.socketPath):
+                raise RuntimeError(f'A compile server is already running at {self.socketPath}')
+            os.remove(self.socketPath)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.socketPath)
+            server.listen()
+            print(f'Compile server listening on {self.socketPath}')
+            self.running = True
+            while self.running:
+                connection, _ = server.accept()
+                # Requests are served one at a time: a client that never sends its request must not block the others
+                connection.settimeout(REQUEST_TIMEOUT)
+                try:
+                    with connection, connection.makefile('rwb') as stream:
+                        try:
+                            response = self.handle(json.loads(stream.readline()))
+                        except Exception as exception:
+                            response = {'error': str(exception)}
+                        stream.write(json.dumps(response).encode() + b'\n')
+                except OSError as exception:
+                    # The client timed out or went away before reading its reply -- keep serving the others
+                    print(f'Dropped client: {exception}')
+        finally:
+            server.close()
+            os.remove(self.socketPath)
+
+
+    """
+    handle: Returns the response to a decoded request
+    """
+    def handle(self, request: dict) -> dict:
+        command = request.get('command')
+        if command == 'compile':
+            return self.compile(request.get('paths', []), request.get('options', {}), request.get('force', False))
+        elif command == 'status':
+            return {'classes': len(self.classes), 'hits': self.hits, 'misses': self.misses,
+                    'uptime': time.time() - self.startTime}
+        elif command == 'shutdown':
+            self.running = False
+            return {'stopping': True}
+        raise RuntimeError(f'Invalid command: {command}')
+
+
+    """
+    compile: Compiles the .jack files at the given paths, reusing cached classes, and returns the results
+    """
+    def compile(self, paths: list, options: dict, force: bool = False) -> dict:
+        for option in options:
+            if option not in OPTIONS:
+                raise RuntimeError(f'Invalid compile option: {option}')
+        # Imported here so the thin client never loads the compiler
+        import hashlib
+        from JackCompiler import compileFile
+        from BuildCache import BuildCache
+
+        optionsKey = json.dumps(options, sort_keys=True)
+        extension = '.vmb' if options.get('binary') else '.vm'
+
+        results = []
+        cached = 0
+        for filePath in jackFiles(paths):
+            with open(filePath, 'rb') as file:
+                sourceHash = hashlib.sha256(file.read()).hexdigest()
+
+            key = (filePath, optionsKey)
+            entry = self.classes.get(key)
+            if entry and entry['source'] == sourceHash and not force:
+                self.restoreOutput(entry)
+                self.hits += 1
+                cached += 1
+                results.append((filePath, None, entry['info']))
+                continue
+
+            self.misses += 1
+            self.classes.pop(key, None)
+            result = compileFile(filePath, options)
+            results.append(result)
+            if result[1] is None:
+                entry = {'source': sourceHash, 'output': BuildCache.outputPath(filePath, extension), 'info': result[2]}
+                self.readOutput(entry)
+                self.classes[key] = entry
+        return {'results': results, 'cached': cached}
+
+
+    """
+    readOutput: Stores the contents and (size, mtime) of the freshly written output file of a cache entry
+        - Empty classes have no output: data and stat are None
+    """
+    def readOutput(self, entry: dict) -> None:
+        entry['data'] = entry['stat'] = None
+        try:
+            with open(entry['output'], 'rb') as file:
+                entry['data'] = file.read()
+            stat = os.stat(entry['output'])
+            entry['stat'] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            pass
+
+
+    """
+    restoreOutput: Rewrites the output file of a cached class if it is missing or was changed
+        - Writes a temporary file next to the output and renames it over the output, as
+          VMWriter does, so an interrupted restore never leaves a truncated output file
+    """
+    def restoreOutput(self, entry: dict) -> None:
+        if entry['data'] is None:
+            return
+        try:
+            stat = os.stat(entry['output'])
+            if (stat.st_size, stat.st_mtime_ns) == entry['stat']:
+                return
+        except OSError:
+            pass
+
+        tmpPath = entry['output'] + '.tmp'
+        with open(tmpPath, 'wb') as file:
+            file.write(entry['data'])
+        os.replace(tmpPath, entry['output'])
+        stat = os.stat(entry['output'])
+        entry['stat'] = (stat.st_size, stat.st_mtime_ns)
+
+
+"""
+jackFiles: Returns the .jack files at the given paths, expanding directories recursively
+"""
+def jackFiles(paths: list) -> list:
+    fileArr = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                fileArr += [os.path.join(root, f) for f in sorted(files) if f.endswith('.jack')]
+        else:
+            fileArr.append(path)
+    return fileArr
+
+
+"""
+request: Sends one request to the server at socketPath and returns its response
+"""
+def request(socketPath: str, message: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socketPath)
+        with client.makefile('rwb') as stream:
+            stream.write(json.dumps(message).encode() + b'\n')
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+"""
+ping: Returns whether a server answers at socketPath
+"""
+def ping(socketPath: str) -> bool:
+    try:
+        request(socketPath, {'command': 'status'})
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compile through a warm compile server')
+    parser.add_argument('paths', nargs='*', help='.jack files or directories to compile')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'server socket (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--serve', action='store_true', help='run the compile server')
+    parser.add_argument('--status', action='store_true', help='print the status of the running server')
+    parser.add_argument('--shutdown', action='store_true', help='stop the running server')
+    parser.add_argument('--force', action='store_true', help='recompile every file, ignoring the server cache')
+    parser.add_argument('--stream', action='store_true', help='lex each file lazily in chunks')
+    parser.add_argument('--peephole', action='store_true', help='run the peephole optimizer')
+    parser.add_argument('--no-fold', dest='fold', action='store_false', help='do not fold constant expressions')
+    parser.add_argument('--strength-reduce', action='store_true', help='strength-reduce multiplications')
+    parser.add_argument('--max-adds', type=int, default=4, help='most additions per reduced multiplication (default: 4)')
+    parser.add_argument('--pool-strings', action='store_true', help='build each distinct string literal once')
+    parser.add_argument('--pool-budget', type=int,
+                        help='most string literals a class pools (default: the compiler\'s, 16)')
+    parser.add_argument('--binary', action='store_true', help='write VM bytecode (.vmb)')
+    parser.add_argument('--stream-output', action='store_true', help='write each subroutine as soon as it is compiled')
+    parser.add_argument('--ast', action='store_true', help='parse each class into a syntax tree before generating its code')
+    args = parser.parse_args()
+    if not (args.serve or args.status or args.shutdown or args.paths):
+        parser.error('nothing to compile')
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        CompileServer(args.socket).serve()
+        return 0
+
+    if args.status or args.shutdown:
+        message = {'command': 'status' if args.status else 'shutdown'}
+    else:
+        options = {'stream': args.stream, 'peephole': args.peephole, 'fold': args.fold,
+                   'strengthReduce': args.max_adds if args.strength_reduce else None,
+                   'poolStrings': args.pool_strings, 'binary': args.binary, 'streamOutput': args.stream_output,
+                   'ast': args.ast}
+        # Left out unless given, so the compiler's default applies
+        if args.pool_budget is not None:
+            options['poolBudget'] = args.pool_budget
+        message = {'command': 'compile', 'paths': [os.path.abspath(path) for path in args.paths],
+                   'options': options, 'force': args.force}
+
+    try:
+        response = request(args.socket, message)
+    except OSError:
+        print(f'No compile server at {args.socket} (start one with --serve)')
+        return 1
+    if 'error' in response:
+        print(response['error'])
+        return 1
+    if 'results' not in response:
+        print(json.dumps(response, indent=2))
+        return 0
+
+    failed = [(filePath, error) for filePath, error, _ in response['results'] if error is not None]
+    for filePath, error in failed:
+        print(f'{filePath}: {error}')
+    print(f'Compiled {len(response["results"]) - len(failed)} of {len(response["results"])} files '
+          f'({response["cached"]} unchanged)')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+CompilerStats class
+    - Collects timing and counters for a compile, reported as JSON by JackCompiler --stats
+    - Measures:
+        - phases: time spent tokenizing, compiling (parsing and code generation), and writing
+        - methods: calls and inclusive time of the CompilationEngine compile* methods and the
+          ExpressionParser term compilers that run or, when compiling through a syntax tree (ast),
+          of every JackParser parse* and CodeGenerator generate* method
+        - counters: tokens read, symbol definitions and lookups, VM instructions written,
+          instructions removed by optimization passes, bytes written
+        - opcodes: VM instructions written, by command
+    - Instrumentation is installed per engine by wrapping its methods, so compiles without
+      stats run the plain, unwrapped code
+    - Hook API for embedding callers: addHook(callback) registers callback(event, data), called
+      with event 'phase' ({'name', 'seconds', 'filePath'}) at the end of every phase and
+      with event 'file' ({'filePath', 'report'}) for every file merged into the stats
+"""
+
+import time
+from contextlib import contextmanager
+
+SYMBOL_LOOKUPS = ('resolve', 'KindOf', 'TypeOf', 'IndexOf', 'isDefined')
+
+
+"""
+methodNames: Returns the names of the methods of target's class starting with prefix
+"""
+def methodNames(target, prefix: str) -> list:
+    return [name for name in dir(type(target)) if name.startswith(prefix)]
+
+
+class CompilerStats:
+    """
+    Constructor: Creates an empty set of stats
+    """
+    def __init__(self):
+        self.files = 0
+        self.phases = {'tokenize': 0.0, 'compile': 0.0, 'write': 0.0}
+        self.methods = {}
+        self.counters = {
+            'tokens': 0,
+            'symbolDefinitions': 0,
+            'symbolLookups': 0,
+            'vmInstructions': 0,
+            'instructionsRemoved': 0,
+            'bytesWritten': 0,
+        }
+        self.opcodes = {}
+        self.hooks = []
+        self.currFilePath = None
+
+
+    """
+    addHook: Registers callback(event, data) to be called on phase and file events
+    """
+    def addHook(self, callback) -> None:
+        self.hooks.append(callback)
+
+
+    """
+    emit: Calls every registered hook with the given event
+    """
+    def emit(self, event: str, data: dict) -> None:
+        for hook in self.hooks:
+            hook(event, data)
+
+
+    """
+    count: Increments the named counter
+    """
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+
+    """
+    addPhaseTime: Adds elapsed seconds to the named phase and notifies hooks
+    """
+    def addPhaseTime(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if self.hooks:
+            self.emit('phase', {'name': name, 'seconds': seconds, 'filePath': self.currFilePath})
+
+
+    """
+    phase: Context manager timing the enclosed block as the named phase
+    """
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addPhaseTime(name, time.perf_counter() - start)
+
+
+    """
+    startFile: Marks the start of a new file, used to label phase events
+    """
+    def startFile(self, filePath: str) -> None:
+        self.files += 1
+        self.currFilePath = filePath
+
+
+    """
+    instrument: Wraps the methods of an engine, its tokenizer, symbol table and VM writer
+        - compile* methods are timed (inclusive of nested calls) and counted; with an expression
+          parser, its term compilers instead of compileTerm, which it does not call; with ast,
+          compileClass and the parse* methods of the engine's parser and generate* methods of the engine
+        - compileClass is also the 'compile' phase, VMWriter.close (including its
+          optimization passes) the 'write' phase -- when the writer streams, subroutines
+          written before close count towards the 'compile' phase
+        - Instructions are counted as the VM writer writes them out
+        - Called by CompilationEngine before it starts compiling
+    """
+    def instrument(self, engine) -> None:
+        if engine.parser:
+            self.timeMethods(engine.parser, methodNames(engine.parser, 'parse'))
+            self.timeMethods(engine, methodNames(engine, 'generate'))
+            engine.compileClass = self.timedMethod('compileClass', engine.compileClass)
+        elif engine.expressionParser:
+            expressionParser = engine.expressionParser
+            self.timeMethods(engine, [name for name in methodNames(engine, 'compile') if name != 'compileTerm'])
+            self.timeMethods(expressionParser, [method.__name__ for method in expressionParser.termCompilers.values()])
+        else:
+            self.timeMethods(engine, methodNames(engine, 'compile'))
+
+        compileClass = engine.compileClass
+        def timedCompileClass():
+            with self.phase('compile'):
+                return compileClass()
+        engine.compileClass = timedCompileClass
+
+        tokenizer = engine.tokenizer
+        advance = tokenizer.advance
+        counters = self.counters
+        def countedAdvance():
+            counters['tokens'] += 1
+            return advance()
+        tokenizer.advance = countedAdvance
+
+        symbolTable = engine.symbolTable
+        for name in SYMBOL_LOOKUPS:
+            setattr(symbolTable, name, self.countedMethod('symbolLookups', getattr(symbolTable, name)))
+        symbolTable.define = self.countedMethod('symbolDefinitions', symbolTable.define)
+
+        vmWriter = engine.vmWriter
+        writeCode = vmWriter.writeCode
+        def countedWriteCode(vmCode):
+            self.countInstructions(vmCode)
+            writeCode(vmCode)
+        vmWriter.writeCode = countedWriteCode
+
+        close = vmWriter.close
+        def timedClose():
+            with self.phase('write'):
+                close()
+            self.count('instructionsRemoved', vmWriter.instructionsRemoved)
+            self.count('bytesWritten', vmWriter.bytesWritten)
+        vmWriter.close = timedClose
+
+
+    """
+    timeMethods: Replaces the named methods of target with timed wrappers
+        - Dispatch tables of target (dicts of its bound methods, e.g. JackParser.statementParsers)
+          are updated too, as they hold the methods taken at construction
+    """
+    def timeMethods(self, target, names: list) -> None:
+        for name in names:
+            setattr(target, name, self.timedMethod(name, getattr(target, name)))
+
+        for table in list(vars(target).values()):
+            if type(table) is dict:
+                for key, method in table.items():
+                    name = getattr(method, '__name__', None)
+                    if name in names and getattr(method, '__self__', None) is target:
+                        table[key] = getattr(target, name)
+
+
+    """
+    timedMethod: Returns a wrapper of method that counts its calls and accumulates its time
+    """
+    def timedMethod(self, name: str, method):
+        entry = self.methods.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        perfCounter = time.perf_counter
+        def wrapper(*args, **kwargs):
+            start = perfCounter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                entry['calls'] += 1
+                entry['seconds'] += perfCounter() - start
+        return wrapper
+
+
+    """
+    countedMethod: Returns a wrapper of method that increments the named counter on every call
+    """
+    def countedMethod(self, counter: str, method):
+        counters = self.counters
+        def wrapper(*args, **kwargs):
+            counters[counter] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+
+    """
+    countInstructions: Counts VM instructions by command
+    """
+    def countInstructions(self, vmCode: list) -> None:
+        opcodes = self.opcodes
+        for instruction in vmCode:
+            opcode = instruction.split(' ', 1)[0]
+            opcodes[opcode] = opcodes.get(opcode, 0) + 1
+        self.count('vmInstructions', len(vmCode))
+
+
+    """
+    report: Returns the stats as a JSON-serializable dict
+    """
+    def report(self) -> dict:
+        return {
+            'files': self.files,
+            'phases': dict(self.phases),
+            'methods': {name: dict(entry) for name, entry in sorted(self.methods.items())},
+            'counters': dict(self.counters),
+            'opcodes': dict(sorted(self.opcodes.items())),
+        }
+
+
+    """
+    merge: Adds a report (e.g. from a worker process) into these stats and notifies hooks
+        - filePath: the file the report belongs to, passed to 'file' hooks
+    """
+    def merge(self, report: dict, filePath: str = None) -> None:
+        self.files += report['files']
+        for name, seconds in report['phases'].items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for name, entry in report['methods'].items():
+            total = self.methods.setdefault(name, {'calls': 0, 'seconds': 0.0})
+            total['calls'] += entry['calls']
+            total['seconds'] += entry['seconds']
+        for name, amount in report['counters'].items():
+            self.count(name, amount)
+        for opcode, amount in report['opcodes'].items():
+            self.opcodes[opcode] = self.opcodes.get(opcode, 0) + amount
+
+        if self.hooks:
+            self.emit('file', {'filePath': filePath, 'report': report})
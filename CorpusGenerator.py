@@ -0,0 +1,241 @@
+import argparse
+import os
+import random
+
+"""
+CorpusGenerator class
+    - Generates synthetic, compilable Jack programs for benchmarking
+    - The shape of the corpus is controlled by:
+        - classes: number of classes (plus a Main class that uses all of them)
+        - subroutines: number of methods and functions per class
+        - statements: number of statements per subroutine body
+        - depth: maximum expression nesting depth
+        - stringDensity: fraction of statements that print a string literal
+        - arrayDensity: fraction of statements and terms that index an array
+    - Output is deterministic for a given seed
+    - Programs run to completion (no division by zero), so they also serve as runtime workloads
+      (VMEmulator)
+"""
+
+OPERATORS = ['+', '-', '*', '/', '&', '|', '<', '>', '=']
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'score', 'level', 'ready', 'value', 'total', 'done']
+
+
+class CorpusGenerator:
+    """
+    Constructor: Stores the corpus shape parameters
+    """
+    def __init__(self, classes: int = 10, subroutines: int = 10, statements: int = 12, depth: int = 3,
+                 stringDensity: float = 0.1, arrayDensity: float = 0.2, seed: int = 0):
+        self.classes = classes
+        self.subroutines = subroutines
+        self.statements = statements
+        self.depth = depth
+        self.stringDensity = stringDensity
+        self.arrayDensity = arrayDensity
+        self.seed = seed
+
+        self.random = random.Random(seed)
+
+
+    """
+    generate: Returns a dict of class name to Jack source for the whole corpus
+    """
+    def generate(self) -> dict:
+        self.random = random.Random(self.seed)
+        sources = {}
+        for classIdx in range(self.classes):
+            className = f'Gen{classIdx}'
+            sources[className] = self.generateClass(className)
+        sources['Main'] = self.generateMain()
+        return sources
+
+
+    """
+    write: Writes the corpus as .jack files into dirPath and returns the file paths
+    """
+    def write(self, dirPath: str) -> list:
+        os.makedirs(dirPath, exist_ok=True)
+        filePaths = []
+        for className, source in self.generate().items():
+            filePath = os.path.join(dirPath, className + '.jack')
+            with open(filePath, 'w') as file:
+                file.write(source)
+            filePaths.append(filePath)
+        return filePaths
+
+
+    """
+    generateMain: Generates the Main class, which constructs every generated class
+    """
+    def generateMain(self) -> str:
+        lines = [
+            '/** Entry point of the generated corpus. */',
+            'class Main {',
+            '    function void main() {',
+            '        var int result;',
+        ]
+        for classIdx in range(self.classes):
+            lines.append(f'        var Gen{classIdx} obj{classIdx};')
+        lines.append('        let result = 0;')
+        for classIdx in range(self.classes):
+            lines.append(f'        let obj{classIdx} = Gen{classIdx}.new({self.random.randint(1, 64)});')
+            if self.subroutines > 0:
+                lines.append(f'        let result = result + obj{classIdx}.run0(result, {classIdx});')
+        lines.append('        do Output.printInt(result);')
+        lines.append('        return;')
+        lines.append('    }')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+
+    """
+    generateClass: Generates one class with fields, a constructor, and methods/functions
+        - Even subroutines are methods named run<i>, odd ones are functions named calc<i>
+    """
+    def generateClass(self, className: str) -> str:
+        lines = [
+            f'/** Generated class {className}. */',
+            f'class {className} {{',
+            '    field int width, height;',
+            '    field Array buffer;',
+            '    static int instances;',
+            '',
+            f'    constructor {className} new(int size) {{',
+            '        let width = size;',
+            '        let height = size + 1;',
+            '        let buffer = Array.new(size + 8);',
+            '        let instances = instances + 1;',
+            '        return this;',
+            '    }',
+        ]
+
+        for subroutineIdx in range(self.subroutines):
+            lines.append('')
+            isMethod = subroutineIdx % 2 == 0
+            if isMethod:
+                lines.append(f'    method int run{subroutineIdx}(int a, int b) {{')
+            else:
+                lines.append(f'    function int calc{subroutineIdx}(int a, int b) {{')
+            lines.append('        var int x, y, i, j;')
+            lines.append('        var Array data;')
+            lines.append('        var String text;')
+            lines.append('        let x = a;')
+            lines.append('        let y = b;')
+            lines.append('        let i = 0;')
+            lines.append('        let data = Array.new(16);')
+            for _ in range(self.statements):
+                self.generateStatement(lines, 2, className, subroutineIdx, isMethod)
+            lines.append('        do data.dispose();')
+            lines.append('        return x;')
+            lines.append('    }')
+
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+
+    """
+    generateStatement: Appends one random statement (possibly compound) to lines
+    """
+    def generateStatement(self, lines: list, indent: int, className: str, subroutineIdx: int,
+                          isMethod: bool, nesting: int = 0) -> None:
+        pad = '    ' * indent
+        rand = self.random.random()
+
+        if self.random.random() < self.stringDensity:
+            word = self.random.choice(WORDS)
+            lines.append(f'{pad}let text = "{word} {self.random.randint(0, 999)}";')
+            lines.append(f'{pad}do Output.printString(text);')
+            lines.append(f'{pad}do text.dispose();')
+        elif self.random.random() < self.arrayDensity:
+            array = 'buffer' if isMethod and self.random.random() < 0.5 else 'data'
+            index = self.generateExpression(isMethod, 1)
+            lines.append(f'{pad}let {array}[({index}) & 7] = {self.generateExpression(isMethod, self.depth)};')
+        elif rand < 0.15 and nesting < 2:
+            lines.append(f'{pad}if ({self.generateExpression(isMethod, 2)}) {{')
+            self.generateStatement(lines, indent + 1, className, subroutineIdx, isMethod, nesting + 1)
+            lines.append(f'{pad}}} else {{')
+            self.generateStatement(lines, indent + 1, className, subroutineIdx, isMethod, nesting + 1)
+            lines.append(f'{pad}}}')
+        elif rand < 0.25 and nesting < 2:
+            # A loop nested in another loop has its own counter, so both terminate
+            counter = 'i' if nesting == 0 else 'j'
+            lines.append(f'{pad}let {counter} = 0;')
+            lines.append(f'{pad}while ({counter} < {self.random.randint(2, 10)}) {{')
+            self.generateStatement(lines, indent + 1, className, subroutineIdx, isMethod, nesting + 1)
+            lines.append(f'{pad}    let {counter} = {counter} + 1;')
+            lines.append(f'{pad}}}')
+        elif rand < 0.35 and subroutineIdx > 0:
+            # Call an earlier function of the same class
+            callee = self.random.randrange(0, subroutineIdx)
+            if callee % 2 == 1:
+                expression = self.generateExpression(isMethod, self.depth - 1)
+                lines.append(f'{pad}let y = {className}.calc{callee}({expression}, x);')
+            elif isMethod:
+                lines.append(f'{pad}do run{callee}(x, y);')
+            else:
+                lines.append(f'{pad}let y = y + 1;')
+        else:
+            target = self.random.choice(['x', 'y', 'width'] if isMethod else ['x', 'y'])
+            lines.append(f'{pad}let {target} = {self.generateExpression(isMethod, self.depth)};')
+
+
+    """
+    generateExpression: Returns a random expression nested up to depth levels deep
+        - The right operand of / is never zero
+    """
+    def generateExpression(self, isMethod: bool, depth: int) -> str:
+        terms = [self.generateTerm(isMethod, depth)]
+        for _ in range(self.random.randint(0, 2)):
+            operator = self.random.choice(OPERATORS)
+            term = self.generateTerm(isMethod, depth)
+            terms.append(operator)
+            # Divisors are made odd, so the programs run without dividing by zero
+            terms.append(f'({term} | 1)' if operator == '/' else term)
+        return ' '.join(terms)
+
+
+    """
+    generateTerm: Returns a random term, recursing into parenthesised expressions while depth allows
+    """
+    def generateTerm(self, isMethod: bool, depth: int) -> str:
+        rand = self.random.random()
+        variables = ['a', 'b', 'x', 'y', 'i'] + (['width', 'height'] if isMethod else [])
+
+        if depth > 0 and rand < 0.3:
+            return f'({self.generateExpression(isMethod, depth - 1)})'
+        if depth > 0 and rand < 0.3 + self.arrayDensity * 0.5:
+            return f'data[({self.generateExpression(isMethod, depth - 1)}) & 15]'
+        if rand < 0.45:
+            return str(self.random.randint(0, 1000))
+        if rand < 0.5:
+            return '-' + self.random.choice(variables)
+        if rand < 0.55:
+            return self.random.choice(['true', 'false', 'null'])
+        return self.random.choice(variables)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Jack corpus')
+    parser.add_argument('outDir')
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--subroutines', type=int, default=10)
+    parser.add_argument('--statements', type=int, default=12)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--string-density', type=float, default=0.1)
+    parser.add_argument('--array-density', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    generator = CorpusGenerator(args.classes, args.subroutines, args.statements, args.depth,
+                                args.string_density, args.array_density, args.seed)
+    for filePath in generator.write(args.outDir):
+        print(filePath)
+
+
+if __name__ == '__main__':
+    main()
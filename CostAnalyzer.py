@@ -0,0 +1,123 @@
+from DeadCodeEliminator import splitFunctions
+
+"""
+CostAnalyzer class
+    - Static cost report of every subroutine, run by JackCompiler --cost-report as the last
+      VMWriter pass, so it measures the code exactly as written out (after peephole)
+    - Leaves the code unchanged; nothing is executed
+    - For each function it records:
+        - instructions: number of VM instructions (labels are not instructions)
+        - locals: number of local variables
+        - maxStackDepth: deepest the operand stack gets above the locals, in words
+        - calls: total static call sites, and callees: call sites per callee
+        - multiply, divide, appendChar: call sites of Math.multiply, Math.divide and
+          String.appendChar, the costly OS calls the compiler emits for *, / and string literals
+    - The stack depth is tracked through the code in order: a label reached only by jumps
+      takes the depth recorded at the first jump to it (Jack code only jumps with an empty
+      operand stack, so this is exact for compiled code)
+"""
+
+EXPENSIVE_CALLS = {'Math.multiply': 'multiply', 'Math.divide': 'divide', 'String.appendChar': 'appendChar'}
+
+# Stack effect of the fixed-size instructions
+STACK_EFFECTS = {
+    'push': 1, 'pop': -1,
+    'add': -1, 'sub': -1, 'and': -1, 'or': -1, 'eq': -1, 'gt': -1, 'lt': -1,
+    'neg': 0, 'not': 0,
+    'if-goto': -1, 'goto': 0, 'label': 0, 'function': 0, 'return': -1,
+}
+
+# Report columns, and the keys a report can be sorted by
+COLUMNS = ('instructions', 'locals', 'maxStackDepth', 'calls', 'multiply', 'divide', 'appendChar')
+SORT_KEYS = ('name',) + COLUMNS
+
+
+class CostAnalyzer:
+    """
+    Constructor: Creates an analyzer with an empty report
+    """
+    def __init__(self):
+        self.subroutines = []
+
+
+    """
+    run: Adds the functions of the given code to the report and returns the code unchanged
+    """
+    def run(self, vmCode: list) -> list:
+        for name, code in splitFunctions(vmCode):
+            if name is not None:
+                self.subroutines.append(self.analyze(name, code))
+        return vmCode
+
+
+    """
+    analyze: Returns the cost entry of one function, given its code from its function line on
+    """
+    def analyze(self, name: str, code: list) -> dict:
+        entry = {'name': name, 'instructions': 0, 'locals': int(code[0].split(' ')[2]), 'maxStackDepth': 0,
+                 'calls': 0, 'multiply': 0, 'divide': 0, 'appendChar': 0, 'callees': {}}
+
+        depth = 0
+        reachable = True
+        labelDepths = {}
+        for instruction in code:
+            parts = instruction.split(' ')
+            command = parts[0]
+
+            if command == 'label':
+                # Code after a goto or return is only reached through its label
+                if not reachable:
+                    depth = labelDepths.get(parts[1], 0)
+                reachable = True
+                continue
+            entry['instructions'] += 1
+
+            if command == 'call':
+                callee, nArgs = parts[1], int(parts[2])
+                entry['calls'] += 1
+                entry['callees'][callee] = entry['callees'].get(callee, 0) + 1
+                if callee in EXPENSIVE_CALLS:
+                    entry[EXPENSIVE_CALLS[callee]] += 1
+            if not reachable:
+                continue
+
+            depth += 1 - nArgs if command == 'call' else STACK_EFFECTS.get(command, 0)
+            entry['maxStackDepth'] = max(entry['maxStackDepth'], depth)
+
+            if command in ('goto', 'if-goto'):
+                labelDepths.setdefault(parts[1], depth)
+            if command in ('goto', 'return'):
+                reachable = False
+        return entry
+
+
+    """
+    report: Returns the report sorted by a key of SORT_KEYS -- names ascending, counts descending
+    """
+    def report(self, key: str = 'instructions') -> list:
+        if key not in SORT_KEYS:
+            raise RuntimeError(f'Invalid sort key: {key} (expected one of {", ".join(SORT_KEYS)})')
+        if key == 'name':
+            return sorted(self.subroutines, key=lambda entry: entry['name'])
+        return sorted(self.subroutines, key=lambda entry: (-entry[key], entry['name']))
+
+
+    """
+    table: Returns a report as a text table, one row per function, with a totals row
+    """
+    @staticmethod
+    def table(subroutines: list) -> str:
+        nameWidth = max([len('function')] + [len(entry['name']) for entry in subroutines])
+        row = lambda name, values: name.ljust(nameWidth) + ''.join(
+            f'  {value:>{len(column)}}' for column, value in zip(COLUMNS, values))
+
+        header = row('function', COLUMNS)
+        lines = [header, '-' * len(header)]
+        for entry in subroutines:
+            lines.append(row(entry['name'], [entry[column] for column in COLUMNS]))
+
+        totals = {column: sum(entry[column] for entry in subroutines) for column in COLUMNS}
+        totals['maxStackDepth'] = max([entry['maxStackDepth'] for entry in subroutines], default=0)
+        lines.append('-' * len(header))
+        lines.append(row('total', [totals[column] for column in COLUMNS]))
+        return '\n'.join(lines)
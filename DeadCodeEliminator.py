@@ -0,0 +1,85 @@
+"""
+DeadCodeEliminator class
+    - Whole-program pass run by JackCompiler --whole-program once every class is compiled
+    - Builds the call graph of the program from the call instructions of each function and
+      removes every function not reachable from the entry points
+    - Entry points are Main.main, Sys.init, and the OS init functions the built-in Sys.init calls
+      (in case the program supplies its own versions of those classes), plus any extra roots
+    - Calls to functions outside the program (the built-in OS) add no edges
+    - Keeps the names and sizes of the functions it removed
+
+    Program pass interface (shared by all whole-program passes):
+        run(program: dict of file path -> vmCode list) -> dict of file path -> optimized vmCode
+"""
+
+ENTRY_POINTS = ('Main.main', 'Sys.init')
+
+ROOTS = ENTRY_POINTS + ('Memory.init', 'Math.init', 'Screen.init', 'Output.init', 'Keyboard.init')
+
+
+"""
+splitFunctions: Splits VM code into (function name, instructions) pairs, one per function
+    - Instructions before the first function, if any, are returned under the name None
+"""
+def splitFunctions(vmCode: list) -> list:
+    functions = []
+    for instruction in vmCode:
+        if instruction.startswith('function '):
+            functions.append((instruction.split(' ')[1], []))
+        elif not functions:
+            functions.append((None, []))
+        functions[-1][1].append(instruction)
+    return functions
+
+
+class DeadCodeEliminator:
+    """
+    Constructor: Creates an eliminator keeping everything reachable from ROOTS and the given extra roots
+    """
+    def __init__(self, roots: list = None):
+        self.roots = ROOTS + tuple(roots or ())
+        self.removed = {}
+
+
+    """
+    run: Removes the unreachable functions of the program and returns the remaining code of every file
+    """
+    def run(self, program: dict) -> dict:
+        functions = {filePath: splitFunctions(vmCode) for filePath, vmCode in program.items()}
+
+        callees = {}
+        for parts in functions.values():
+            for name, code in parts:
+                if name is not None:
+                    callees[name] = [instruction.split(' ')[1] for instruction in code if instruction.startswith('call ')]
+
+        if not any(entryPoint in callees for entryPoint in ENTRY_POINTS):
+            raise RuntimeError(f'Whole-program build needs an entry point: {" or ".join(ENTRY_POINTS)}')
+
+        reachable = self.reachable(callees)
+
+        optimized = {}
+        for filePath, parts in functions.items():
+            kept = []
+            for name, code in parts:
+                if name is None or name in reachable:
+                    kept.extend(code)
+                else:
+                    self.removed[name] = len(code)
+            optimized[filePath] = kept
+        return optimized
+
+
+    """
+    reachable: Returns the set of functions reachable from the roots through the call graph
+        - callees: function name -> names of the functions it calls
+    """
+    def reachable(self, callees: dict) -> set:
+        stack = [root for root in self.roots if root in callees]
+        seen = set(stack)
+        while stack:
+            for callee in callees[stack.pop()]:
+                if callee in callees and callee not in seen:
+                    seen.add(callee)
+                    stack.append(callee)
+        return seen
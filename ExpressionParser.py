@@ -0,0 +1,313 @@
+from CodeGenerator import KEYWORD_CONSTANTS, MATH_OPERATORS, foldOperator, foldUnary
+
+"""
+ExpressionParser class
+    - Compiles expressions for CompilationEngine without recursion, so nesting depth (parentheses,
+      unary operators, array indices, call arguments) is limited only by memory, not by Python's
+      recursion limit
+    - Jack has no operator precedence: an expression is term (op term)*, applied left to right.
+      The only nesting is a term containing a whole expression, so instead of recursive calls
+      the parser keeps an explicit stack of frames, one per unfinished expression or unary
+      operator, and a loop that compiles a term and hands its value to the innermost frame
+    - Operators, unary operators, keyword constants and term types are looked up in tables
+    - Reads the current token from the tokenizer's currType / currToken (set by advance) rather
+      than through its accessor methods: expressions are the compiler's hottest path
+    - Produces exactly the code of the recursive compileExpression / compileTerm, constant
+      folding and strength reduction included (CompilationEngine(recursiveExpressions=True)
+      keeps the recursive path, e.g. for benchmarks)
+"""
+
+OPERATORS = {
+    '+': 'ADD', '-': 'SUB', '*': 'MULTIPLY', '/': 'DIVIDE',
+    '&': 'AND', '|': 'OR', '<': 'LT', '>': 'GT', '=': 'EQ',
+}
+UNARY_OPERATORS = {'-': 'NEG', '~': 'NOT'}
+
+# Symbols ending an expression
+EXPRESSION_END = frozenset((',', ')', ']', ';'))
+
+# Frames
+#   - [EXPRESSION, start, closer, operator, rightStart, left]: expression whose code starts at start;
+#     after an operator, operator / rightStart / left describe the operation waiting for its
+#     right operand (operator is None until then)
+#   - (UNARY, operator, start): unary operator waiting for its operand, whose code starts at start
+EXPRESSION, UNARY = range(2)
+
+# What an expression is closed by: None for the expression compileExpression was called for,
+# PARENTHESES for (expression), ARRAY_INDEX for varName[expression], the call (see
+# beginArguments) for an argument
+PARENTHESES, ARRAY_INDEX = range(2)
+
+# Returned by a term compiler that pushed a frame instead of finishing its term
+NESTED = object()
+
+
+class ExpressionParser:
+    """
+    Constructor: Creates a parser compiling expressions for the given engine
+        - Uses the engine's tokenizer, writer, symbol table and options, and its code
+          generation helpers (folding, strength reduction, strings)
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.tokenizer = engine.tokenizer
+        self.vmWriter = engine.vmWriter
+
+        # Term types -> method compiling (or starting, see NESTED) a term of that type
+        self.termCompilers = {
+            'IDENTIFIER': self.identifierTerm,
+            'INT_CONST': self.integerTerm,
+            'STRING_CONST': self.stringTerm,
+            'SYMBOL': self.symbolTerm,
+            'KEYWORD': self.keywordTerm,
+        }
+
+
+    """
+    compileExpression: Compiles an expression -- term (op term)*
+        - Returns the value of the expression if it is a compile-time constant, else None
+    """
+    def compileExpression(self):
+        engine = self.engine
+        tokenizer = self.tokenizer
+        vmWriter = self.vmWriter
+        termCompilers = self.termCompilers
+
+        frames = [[EXPRESSION, vmWriter.tell(), None, None, 0, None]]
+
+        while True:
+            compileTerm = termCompilers.get(tokenizer.currType)
+            value = compileTerm(frames) if compileTerm else None
+            if value is NESTED:
+                continue
+
+            # Hand the value of the finished term up the frames, until one needs another term
+            while True:
+                frame = frames[-1]
+
+                if frame[0] == UNARY:
+                    frames.pop()
+                    _, operator, start = frame
+                    if engine.foldConstants and value is not None:
+                        value = foldUnary(operator, value)
+                        engine.replaceWithConstant(start, value)
+                    else:
+                        vmWriter.writeArithmetic(operator)
+                        value = None
+                    continue
+
+                # value is the right operand of the frame's operator, if any, else its first term
+                operator = frame[3]
+                if operator is not None:
+                    _, start, _, _, rightStart, left = frame
+                    folded = None
+                    if engine.foldConstants and left is not None and value is not None:
+                        # Both operands constant -- replace their code with the result
+                        folded = foldOperator(operator, left, value)
+                        if folded is not None:
+                            engine.replaceWithConstant(start, folded)
+                    if folded is None:
+                        # One operand constant -- multiply or divide without calling Math
+                        if engine.strengthReduction is None or not engine.reduceStrength(operator, start, rightStart, left, value):
+                            if operator == 'MULTIPLY':
+                                vmWriter.writeCall('Math.multiply', 2)
+                            elif operator == 'DIVIDE':
+                                vmWriter.writeCall('Math.divide', 2)
+                            else:
+                                vmWriter.writeArithmetic(operator)
+                    value = folded
+
+                token = tokenizer.currToken
+                if tokenizer.currType == 'SYMBOL' and token not in EXPRESSION_END:
+                    operator = OPERATORS.get(token)
+                    if operator is None:
+                        raise RuntimeError(f'Invalid expression operator: {token}')
+                    if not tokenizer.hasMoreTokens():
+                        raise RuntimeError('Unexpected end of input in compileExpression')
+                    tokenizer.advance()
+                    frame[3] = operator
+                    frame[4] = vmWriter.tell()
+                    frame[5] = value
+                    break
+
+                # End of the expression -- hand its value to what it is closed by
+                frames.pop()
+                closer = frame[2]
+                if closer is None:
+                    return value
+
+                if closer == PARENTHESES:
+                    if tokenizer.hasMoreTokens():
+                        tokenizer.advance()
+                elif closer == ARRAY_INDEX:
+                    if tokenizer.hasMoreTokens():
+                        tokenizer.advance()
+                    vmWriter.writeArithmetic('ADD')
+                    vmWriter.writePop('pointer', 1)
+                    vmWriter.writePush('that', 0)
+                    value = None
+                else:
+                    closer[2] += 1
+                    closer[4].append(value)
+                    isSeparator = tokenizer.currType == 'SYMBOL' and token == ','
+                    if tokenizer.hasMoreTokens():
+                        tokenizer.advance()
+                    if isSeparator:
+                        frames.append([EXPRESSION, vmWriter.tell(), closer, None, 0, None])
+                        break
+                    value = self.finishCall(closer)
+
+
+    """
+    identifierTerm: Compiles a term beginning with an identifier -- variable, array entry or subroutine call
+    """
+    def identifierTerm(self, frames: list):
+        tokenizer = self.tokenizer
+        vmWriter = self.vmWriter
+        engine = self.engine
+        name = tokenizer.currToken
+
+        if not tokenizer.hasMoreTokens():
+            return None
+        tokenizer.advance()
+        if tokenizer.currType != 'SYMBOL':
+            return None
+        token = tokenizer.currToken
+
+        # Array entry -- varName[expression]
+        if token == '[':
+            if self.tokenizer.hasMoreTokens():
+                self.tokenizer.advance()
+            symbol = engine.resolveVariable(name)
+            vmWriter.writePush(symbol.segment, symbol.index)
+            frames.append([EXPRESSION, vmWriter.tell(), ARRAY_INDEX, None, 0, None])
+            return NESTED
+
+        # Method of the current class -- subroutineName(expressionList)
+        if token == '(':
+            vmWriter.writePush('pointer', 0)
+            if self.tokenizer.hasMoreTokens():
+                self.tokenizer.advance()
+            return self.beginArguments([engine.className, name, 1, None, []], frames)
+
+        # Method or function of another class -- (className | varName).subroutineName(expressionList)
+        if token == '.':
+            nArgs = 0
+            symbol = engine.symbolTable.resolve(name)
+            if symbol:
+                className = symbol.type
+                vmWriter.writePush(symbol.segment, symbol.index)
+                nArgs = 1
+            else:
+                className = name
+
+            if not tokenizer.hasMoreTokens():
+                raise RuntimeError('Unexpected end of input')
+            tokenizer.advance()
+            if tokenizer.currType != 'IDENTIFIER':
+                raise RuntimeError('subroutineName expected in compileTerm')
+            subroutineName = tokenizer.currToken
+
+            if not tokenizer.hasMoreTokens():
+                raise RuntimeError('Unexpected end of input')
+            tokenizer.advance()
+            if tokenizer.currType != 'SYMBOL':
+                raise RuntimeError('( expected in compileTerm')
+
+            if self.tokenizer.hasMoreTokens():
+                self.tokenizer.advance()
+            return self.beginArguments([className, subroutineName, nArgs, vmWriter.tell(), []], frames)
+
+        # Variable
+        symbol = engine.resolveVariable(name)
+        vmWriter.writePush(symbol.segment, symbol.index)
+        return None
+
+
+    """
+    beginArguments: Starts the argument list of a call, the current token being its first token
+        - call: [className, subroutineName, nArgs so far, argsStart, argument values], where
+          argsStart is the position of the arguments' code if the call may be folded, else None
+    """
+    def beginArguments(self, call: list, frames: list):
+        if self.tokenizer.currType == 'SYMBOL' and self.tokenizer.currToken == ')':
+            if self.tokenizer.hasMoreTokens():
+                self.tokenizer.advance()
+            return self.finishCall(call)
+        frames.append([EXPRESSION, self.vmWriter.tell(), call, None, 0, None])
+        return NESTED
+
+
+    """
+    finishCall: Writes a call once its argument list is compiled, returning its value if it is folded
+        - Math.multiply / Math.divide of constants are folded like * and /
+    """
+    def finishCall(self, call: list):
+        className, subroutineName, nArgs, argsStart, values = call
+
+        if (argsStart is not None and self.engine.foldConstants and className == 'Math'
+                and subroutineName in MATH_OPERATORS and nArgs == 2 and None not in values):
+            value = foldOperator(MATH_OPERATORS[subroutineName], *values)
+            if value is not None:
+                self.engine.replaceWithConstant(argsStart, value)
+                return value
+
+        self.vmWriter.writeCall(f'{className}.{subroutineName}', nArgs)
+        return None
+
+
+    """
+    integerTerm: Compiles an integer constant
+    """
+    def integerTerm(self, frames: list):
+        value = int(self.tokenizer.currToken)
+        self.vmWriter.writePush('constant', value)
+        if self.tokenizer.hasMoreTokens():
+            self.tokenizer.advance()
+        return value
+
+
+    """
+    stringTerm: Compiles a string constant
+    """
+    def stringTerm(self, frames: list):
+        text = self.tokenizer.currToken
+        if self.engine.poolStrings:
+            self.engine.writePooledString(text)
+        else:
+            self.engine.writeString(text)
+        if self.tokenizer.hasMoreTokens():
+            self.tokenizer.advance()
+        return None
+
+
+    """
+    symbolTerm: Starts a term beginning with a symbol -- (expression) or unary operator term
+    """
+    def symbolTerm(self, frames: list):
+        token = self.tokenizer.currToken
+        if self.tokenizer.hasMoreTokens():
+            self.tokenizer.advance()
+        if token == '(':
+            frames.append([EXPRESSION, self.vmWriter.tell(), PARENTHESES, None, 0, None])
+            return NESTED
+        operator = UNARY_OPERATORS.get(token)
+        if operator is not None:
+            frames.append((UNARY, operator, self.vmWriter.tell()))
+            return NESTED
+        return None
+
+
+    """
+    keywordTerm: Compiles a keyword constant -- true, false, null or this
+    """
+    def keywordTerm(self, frames: list):
+        token = self.tokenizer.currToken
+        value = KEYWORD_CONSTANTS.get(token)
+        if value is not None:
+            self.engine.writeConstant(value)
+        elif token == 'this':
+            self.vmWriter.writePush('pointer', 0)
+        if self.tokenizer.hasMoreTokens():
+            self.tokenizer.advance()
+        return value
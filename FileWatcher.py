@@ -0,0 +1,164 @@
+import os
+import select
+import struct
+import time
+
+"""
+FileWatcher class
+    - Watches a directory tree for files of one extension being created or modified, for
+      JackCompiler --watch
+    - Uses Linux inotify (through ctypes, no extra packages) where available, and otherwise
+      polls the files' size and modification time
+    - wait blocks until something changes, then keeps collecting changes until none arrive
+      for the debounce interval, so a burst of saves (or an editor's write-then-rename)
+      comes back as a single batch
+    - Deleted files are not reported: there is nothing to compile
+"""
+
+# inotify event masks (<sys/inotify.h>)
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+EVENT_HEADER = struct.Struct('iIII')
+
+DEBOUNCE = 0.2
+POLL_INTERVAL = 0.5
+
+
+class FileWatcher:
+    """
+    Constructor: Starts watching dirPath for files ending in extension
+        - debounce: seconds without changes that end a batch
+        - polling: use stat polling even where inotify is available
+    """
+    def __init__(self, dirPath: str, extension: str = '.jack', debounce: float = DEBOUNCE, polling: bool = False):
+        self.dirPath = dirPath
+        self.extension = extension
+        self.debounce = debounce
+        self.fd = None
+        self.watches = {}
+
+        if not polling:
+            self.startInotify()
+        self.backend = 'inotify' if self.fd is not None else 'polling'
+        self.snapshot = self.scan() if self.fd is None else None
+
+
+    """
+    startInotify: Sets up inotify watches on the directory tree, leaving fd None if inotify is unavailable
+    """
+    def startInotify(self) -> None:
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+
+        self.libc = libc
+        self.fd = fd
+        for root, _, _ in os.walk(self.dirPath):
+            self.addWatch(root)
+
+
+    """
+    addWatch: Watches one directory (inotify only)
+    """
+    def addWatch(self, dirPath: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirPath), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = dirPath
+
+
+    """
+    scan: Returns (size, modification time) of every watched file, by path (polling only)
+    """
+    def scan(self) -> dict:
+        snapshot = {}
+        for root, _, files in os.walk(self.dirPath):
+            for f in files:
+                if f.endswith(self.extension):
+                    filePath = os.path.join(root, f)
+                    try:
+                        stat = os.stat(filePath)
+                    except OSError:
+                        continue
+                    snapshot[filePath] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+
+    """
+    poll: Returns the files created or modified since the last call, waiting at most timeout seconds
+    """
+    def poll(self, timeout: float) -> set:
+        if self.fd is None:
+            time.sleep(min(timeout, POLL_INTERVAL))
+            snapshot = self.scan()
+            changed = {filePath for filePath, stat in snapshot.items() if self.snapshot.get(filePath) != stat}
+            self.snapshot = snapshot
+            return changed
+
+        changed = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            dirPath = self.watches.get(wd)
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+            if dirPath is None or not name:
+                continue
+            path = os.path.join(dirPath, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.addWatch(path)
+            elif name.endswith(self.extension) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changed.add(path)
+        return changed
+
+
+    """
+    wait: Blocks until files change and returns the batch of changed files that still exist, sorted
+    """
+    def wait(self) -> list:
+        changed = set()
+        while not changed:
+            changed = self.poll(POLL_INTERVAL)
+
+        # Debounce: keep collecting until the files settle
+        while True:
+            more = self.poll(self.debounce)
+            if not more:
+                break
+            changed |= more
+        return sorted(filePath for filePath in changed if os.path.exists(filePath))
+
+
+    """
+    close: Stops watching
+    """
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,246 @@
+"""
+HackCodeWriter class
+    - Backend translating VM code to Hack assembly in-process, fed straight from VMWriter
+      (or from VM code read back for whole-program builds), so no .vm text is written or re-parsed
+    - One writer per class: static variables are named <fileName>.<index>, and labels are
+      scoped to their function as <function>$<label>
+    - Calls, returns and comparisons jump to shared stubs emitted once per program (see
+      bootstrap), instead of repeating the full sequence at every site:
+        - call f n: sets R13 = n, R14 = f, D = return address and jumps to $$CALL, which
+          pushes the frame, repositions ARG and LCL, and jumps to f
+        - return: jumps to $$RETURN, which restores the caller's frame and jumps back
+        - eq / gt / lt: D = return address, jump to $$EQ / $$GT / $$LT, which leave
+          -1 (true) or 0 (false) in place of the two operands
+    - Pushes of 0 and 1, segment offsets 0 and 1, and pops to small offsets use shorter
+      sequences; R13-R15 are scratch registers
+"""
+
+# Base address registers of the memory segments
+SEGMENT_BASES = {'local': 'LCL', 'argument': 'ARG', 'this': 'THIS', 'that': 'THAT'}
+
+# Fixed addresses of the pointer and temp segments
+POINTER_BASE = 3
+TEMP_BASE = 5
+
+# Largest offset popped by stepping the address one at a time rather than through R13
+POP_STEPS = 6
+
+BINARY_OPERATORS = {'add': 'M=D+M', 'sub': 'M=M-D', 'and': 'M=D&M', 'or': 'M=D|M'}
+UNARY_OPERATORS = {'neg': 'M=-M', 'not': 'M=!M'}
+COMPARISONS = {'eq': 'JEQ', 'gt': 'JGT', 'lt': 'JLT'}
+
+# Push the value in D
+PUSH_D = ['@SP', 'AM=M+1', 'A=A-1', 'M=D']
+
+
+class HackCodeWriter:
+    """
+    Constructor: Creates a writer for the VM code of one class
+        - fileName: name of the class's file without extension, which prefixes its statics
+    """
+    def __init__(self, fileName: str):
+        self.fileName = fileName
+        self.currFunction = fileName
+        self.returnIdx = 0
+        self.asm = []
+
+
+    """
+    bootstrap: Returns the program start-up code and the shared call/return/comparison stubs
+        - Sets SP to 256 and calls Sys.init, which never returns
+    """
+    @staticmethod
+    def bootstrap() -> list:
+        asm = ['@256', 'D=A', '@SP', 'M=D']
+        asm += ['@R13', 'M=0', '@Sys.init', 'D=A', '@R14', 'M=D', '@$$BOOT', 'D=A', '@$$CALL', '0;JMP']
+        asm += ['($$BOOT)', '@$$BOOT', '0;JMP']
+
+        # $$CALL: R13 = nArgs, R14 = function, D = return address
+        asm += ['($$CALL)'] + PUSH_D
+        for register in ('LCL', 'ARG', 'THIS', 'THAT'):
+            asm += [f'@{register}', 'D=M'] + PUSH_D
+        asm += [
+            '@SP', 'D=M', '@5', 'D=D-A', '@R13', 'D=D-M', '@ARG', 'M=D',    # ARG = SP - 5 - nArgs
+            '@SP', 'D=M', '@LCL', 'M=D',                                    # LCL = SP
+            '@R14', 'A=M', '0;JMP',
+        ]
+
+        # $$RETURN: R13 = frame, R14 = return address
+        asm += [
+            '($$RETURN)',
+            '@LCL', 'D=M', '@R13', 'M=D',
+            '@5', 'A=D-A', 'D=M', '@R14', 'M=D',
+            '@SP', 'AM=M-1', 'D=M', '@ARG', 'A=M', 'M=D',                   # *ARG = return value
+            '@ARG', 'D=M+1', '@SP', 'M=D',                                  # SP = ARG + 1
+        ]
+        for register in ('THAT', 'THIS', 'ARG', 'LCL'):
+            asm += ['@R13', 'AM=M-1', 'D=M', f'@{register}', 'M=D']
+        asm += ['@R14', 'A=M', '0;JMP']
+
+        # $$EQ / $$GT / $$LT: D = return address
+        for command, jump in COMPARISONS.items():
+            stub = f'$${command.upper()}'
+            asm += [
+                f'({stub})', '@R15', 'M=D',
+                '@SP', 'AM=M-1', 'D=M', 'A=A-1', 'D=M-D', 'M=-1',
+                f'@{stub}_END', f'D;{jump}',
+                '@SP', 'A=M-1', 'M=0',
+                f'({stub}_END)', '@R15', 'A=M', '0;JMP',
+            ]
+        return asm
+
+
+    """
+    stubCosts: Returns the number of instructions in each shared stub, by stub label
+    """
+    @staticmethod
+    def stubCosts() -> dict:
+        costs = {}
+        stub = None
+        for line in HackCodeWriter.bootstrap():
+            if line.startswith('($$') and not line.endswith('_END)'):
+                stub = line[1:-1]
+                costs[stub] = 0
+            elif stub and not line.startswith('('):
+                costs[stub] += 1
+        return costs
+
+
+    """
+    cost: Returns the number of Hack instructions one VM instruction executes
+        - Includes the shared stub a call, return or comparison jumps to (comparisons count the
+          longer, false path), but not the body of the called function
+        - stubCosts: result of stubCosts, passed in when costing many instructions
+    """
+    @staticmethod
+    def cost(instruction: str, stubCosts: dict = None) -> int:
+        stubCosts = stubCosts or HackCodeWriter.stubCosts()
+        writer = HackCodeWriter('Cost')
+        parts = instruction.split()
+        writer.writeInstruction(parts)
+        cost = sum(1 for line in writer.asm if not line.startswith('('))
+
+        if parts[0] == 'call':
+            cost += stubCosts['$$CALL']
+        elif parts[0] == 'return':
+            cost += stubCosts['$$RETURN']
+        elif parts[0] in COMPARISONS:
+            cost += stubCosts[f'$${parts[0].upper()}']
+        return cost
+
+
+    """
+    writeCode: Translates a list of VM instructions, appending the assembly to asm
+    """
+    def writeCode(self, vmCode: list) -> None:
+        for instruction in vmCode:
+            self.writeInstruction(instruction.split())
+
+
+    """
+    writeInstruction: Translates one VM instruction, given as its split words
+    """
+    def writeInstruction(self, parts: list) -> None:
+        command = parts[0]
+        asm = self.asm
+
+        if command == 'push':
+            self.writePush(parts[1], int(parts[2]))
+        elif command == 'pop':
+            self.writePop(parts[1], int(parts[2]))
+        elif command in BINARY_OPERATORS:
+            asm += ['@SP', 'AM=M-1', 'D=M', 'A=A-1', BINARY_OPERATORS[command]]
+        elif command in UNARY_OPERATORS:
+            asm += ['@SP', 'A=M-1', UNARY_OPERATORS[command]]
+        elif command in COMPARISONS:
+            returnLabel = self.returnLabel()
+            asm += [f'@{returnLabel}', 'D=A', f'@$${command.upper()}', '0;JMP', f'({returnLabel})']
+        elif command == 'label':
+            asm.append(f'({self.currFunction}${parts[1]})')
+        elif command == 'goto':
+            asm += [f'@{self.currFunction}${parts[1]}', '0;JMP']
+        elif command == 'if-goto':
+            asm += ['@SP', 'AM=M-1', 'D=M', f'@{self.currFunction}${parts[1]}', 'D;JNE']
+        elif command == 'function':
+            self.writeFunction(parts[1], int(parts[2]))
+        elif command == 'call':
+            returnLabel = self.returnLabel()
+            asm += [f'@{parts[2]}', 'D=A', '@R13', 'M=D', f'@{parts[1]}', 'D=A', '@R14', 'M=D']
+            asm += [f'@{returnLabel}', 'D=A', '@$$CALL', '0;JMP', f'({returnLabel})']
+        elif command == 'return':
+            asm += ['@$$RETURN', '0;JMP']
+        else:
+            raise RuntimeError(f'Invalid VM instruction: {" ".join(parts)}')
+
+
+    """
+    writePush: Translates a push command
+    """
+    def writePush(self, segment: str, index: int) -> None:
+        asm = self.asm
+        if segment == 'constant':
+            if index in (0, 1):
+                asm += ['@SP', 'AM=M+1', 'A=A-1', f'M={index}']
+                return
+            asm += [f'@{index}', 'D=A']
+        elif segment in SEGMENT_BASES:
+            base = SEGMENT_BASES[segment]
+            if index == 0:
+                asm += [f'@{base}', 'A=M', 'D=M']
+            elif index == 1:
+                asm += [f'@{base}', 'A=M+1', 'D=M']
+            else:
+                asm += [f'@{base}', 'D=M', f'@{index}', 'A=D+A', 'D=M']
+        else:
+            asm += [f'@{self.address(segment, index)}', 'D=M']
+        asm += PUSH_D
+
+
+    """
+    writePop: Translates a pop command
+    """
+    def writePop(self, segment: str, index: int) -> None:
+        asm = self.asm
+        if segment in SEGMENT_BASES:
+            base = SEGMENT_BASES[segment]
+            if index <= POP_STEPS:
+                asm += ['@SP', 'AM=M-1', 'D=M', f'@{base}', 'A=M'] + ['A=A+1'] * index + ['M=D']
+            else:
+                asm += [f'@{base}', 'D=M', f'@{index}', 'D=D+A', '@R13', 'M=D']
+                asm += ['@SP', 'AM=M-1', 'D=M', '@R13', 'A=M', 'M=D']
+        elif segment == 'constant':
+            raise RuntimeError('Cannot pop to the constant segment')
+        else:
+            asm += ['@SP', 'AM=M-1', 'D=M', f'@{self.address(segment, index)}', 'M=D']
+
+
+    """
+    writeFunction: Translates a function command, zeroing its locals
+    """
+    def writeFunction(self, name: str, nLocals: int) -> None:
+        self.currFunction = name
+        self.returnIdx = 0
+        self.asm.append(f'({name})')
+        if nLocals:
+            self.asm += ['@SP', 'A=M'] + ['M=0', 'A=A+1'] * nLocals + ['D=A', '@SP', 'M=D']
+
+
+    """
+    address: Returns the fixed address (or static symbol) of a temp, pointer or static variable
+    """
+    def address(self, segment: str, index: int) -> str:
+        if segment == 'static':
+            return f'{self.fileName}.{index}'
+        elif segment == 'temp':
+            return str(TEMP_BASE + index)
+        elif segment == 'pointer':
+            return str(POINTER_BASE + index)
+        raise RuntimeError(f'Invalid VM segment: {segment}')
+
+
+    """
+    returnLabel: Returns a new label, unique in the program, to return to after a call or comparison
+    """
+    def returnLabel(self) -> str:
+        self.returnIdx += 1
+        return f'{self.currFunction}$ret.{self.returnIdx}'
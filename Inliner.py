@@ -0,0 +1,145 @@
+from DeadCodeEliminator import splitFunctions
+
+"""
+Inliner class
+    - Whole-program pass run by JackCompiler --inline, before dead code elimination
+    - Replaces calls to small leaf functions and methods (e.g. getters and setters) of any class
+      with a copy of the callee's body, saving the call/return sequence
+    - A callee is inlined when its body:
+        - has at most maxSize instructions, and a single return at the end
+        - is straight-line code, without calls, labels or jumps
+        - has at most 7 arguments and locals together, which are moved to temp 1-7
+        - does not use temp, that or pointer 1 -- the inlined body uses that and pointer 1 in
+          place of this and pointer 0, so the caller's this is left untouched
+        - only uses this after setting pointer 0, as every method does on entry
+        - uses statics only when inlined into the same file (statics belong to their file)
+    - CompilationEngine never keeps a value in temp or that across a call, so the inlined
+      body is free to overwrite them
+    - Keeps the list of inlined call sites
+"""
+
+TEMP_BASE = 1
+TEMP_SLOTS = 7
+
+# Instructions that end straight-line code
+CONTROL_FLOW = ('label ', 'goto ', 'if-goto ', 'call ', 'function ', 'return')
+
+
+class Inliner:
+    """
+    Constructor: Creates an inliner for callees of at most maxSize instructions
+    """
+    def __init__(self, maxSize: int = 8):
+        self.maxSize = maxSize
+        self.inlined = []
+
+
+    """
+    run: Inlines the calls to every inlinable function of the program and returns the new code of every file
+    """
+    def run(self, program: dict) -> dict:
+        functions = {filePath: splitFunctions(vmCode) for filePath, vmCode in program.items()}
+
+        # Function name -> (file path, code) of every inlinable function
+        candidates = {}
+        for filePath, parts in functions.items():
+            for name, code in parts:
+                if name is not None and self.isInlinable(code):
+                    candidates[name] = (filePath, code)
+
+        optimized = {}
+        for filePath, parts in functions.items():
+            vmCode = []
+            for name, code in parts:
+                vmCode.extend(self.inlineCalls(name, filePath, code, candidates) if name is not None else code)
+            optimized[filePath] = vmCode
+        return optimized
+
+
+    """
+    isInlinable: Returns whether the code of a function (from its function line to its return) can be inlined
+    """
+    def isInlinable(self, code: list) -> bool:
+        body = code[1:-1]
+        if code[-1] != 'return' or len(body) > self.maxSize:
+            return False
+
+        thisReady = False
+        for instruction in body:
+            if instruction.startswith(CONTROL_FLOW):
+                return False
+            parts = instruction.split(' ')
+            if len(parts) != 3:
+                continue
+
+            segment = parts[1]
+            if segment in ('temp', 'that') or instruction in ('push pointer 1', 'pop pointer 1'):
+                return False
+            if instruction == 'pop pointer 0':
+                thisReady = True
+            elif segment in ('this', 'pointer') and not thisReady:
+                return False
+        return True
+
+
+    """
+    inlineCalls: Returns the code of a function with its calls to candidates replaced by their bodies
+    """
+    def inlineCalls(self, caller: str, filePath: str, code: list, candidates: dict) -> list:
+        inlined = []
+        for instruction in code:
+            if instruction.startswith('call '):
+                _, callee, nArgs = instruction.split(' ')
+                expansion = self.expand(callee, int(nArgs), filePath, candidates)
+                if expansion is not None:
+                    inlined.extend(expansion)
+                    self.inlined.append((caller, callee))
+                    continue
+            inlined.append(instruction)
+        return inlined
+
+
+    """
+    expand: Returns the inline code replacing a call to callee with nArgs arguments, or None if it cannot be inlined
+        - Pops the arguments (on the stack at the call) into temps and zeroes the locals the body uses,
+          then runs the body, which leaves the return value on the stack just like the call would
+    """
+    def expand(self, callee: str, nArgs: int, filePath: str, candidates: dict):
+        if callee not in candidates:
+            return None
+        calleePath, code = candidates[callee]
+
+        # Only locals the body refers to need a temp
+        localIdxs = sorted({
+            int(instruction.split(' ')[2]) for instruction in code[1:-1] if ' local ' in instruction
+        })
+        nLocals = localIdxs[-1] + 1 if localIdxs else 0
+        if nArgs + nLocals > TEMP_SLOTS:
+            return None
+
+        expansion = [f'pop temp {TEMP_BASE + idx}' for idx in reversed(range(nArgs))]
+        for idx in localIdxs:
+            expansion.append('push constant 0')
+            expansion.append(f'pop temp {TEMP_BASE + nArgs + idx}')
+
+        for instruction in code[1:-1]:
+            parts = instruction.split(' ')
+            if len(parts) != 3:
+                expansion.append(instruction)
+                continue
+
+            command, segment, index = parts[0], parts[1], int(parts[2])
+            if segment == 'argument':
+                if index >= nArgs:
+                    return None
+                segment, index = 'temp', TEMP_BASE + index
+            elif segment == 'local':
+                segment, index = 'temp', TEMP_BASE + nArgs + index
+            elif segment == 'this':
+                segment = 'that'
+            elif segment == 'pointer':
+                index = 1
+            elif segment == 'static' and calleePath != filePath:
+                return None
+            expansion.append(f'{command} {segment} {index}')
+        return expansion
@@ -0,0 +1,288 @@
+import pickle
+
+"""
+JackAST module
+    - Syntax tree of a Jack class, built by JackParser and compiled to VM code by CodeGenerator
+    - Nodes are compact __slots__ objects holding names, values and child nodes only: no tokens
+      and no symbol information (variables are resolved when code is generated)
+    - Jack has no operator precedence, so term (op term)* is a single Expression node holding
+      its terms and operators, applied left to right; an expression of one term is just that
+      term, and parentheses leave no node of their own
+    - dumps / loads convert a tree to bytes and back, e.g. to cache parse results between builds.
+      The tree is stored as a flat list of records, children before their parents, so deeply
+      nested expressions serialize without recursion. Loading uses pickle: load trusted data only
+"""
+
+# Version of the serialized form, checked by loads
+AST_VERSION = 1
+
+
+class Node:
+    # Fields holding a child node or a list of child nodes (or None), as opposed to plain values
+    CHILDREN = ()
+    __slots__ = ()
+
+
+class ClassNode(Node):
+    """
+    Constructor: class name { classVarDecs subroutines }
+    """
+    CHILDREN = ('classVarDecs', 'subroutines')
+    __slots__ = ('name', 'classVarDecs', 'subroutines')
+
+    def __init__(self, name: str, classVarDecs: list, subroutines: list):
+        self.name = name
+        self.classVarDecs = classVarDecs
+        self.subroutines = subroutines
+
+
+class VarDec(Node):
+    """
+    Constructor: Declaration of names of one type and kind -- static, field, argument or local
+    """
+    __slots__ = ('kind', 'type', 'names')
+
+    def __init__(self, kind: str, type: str, names: list):
+        self.kind = kind
+        self.type = type
+        self.names = names
+
+
+class SubroutineDec(Node):
+    """
+    Constructor: Constructor, function or method
+        - parameters: one argument VarDec per parameter; varDecs: the local VarDecs
+    """
+    CHILDREN = ('parameters', 'varDecs', 'statements')
+    __slots__ = ('kind', 'returnType', 'name', 'parameters', 'varDecs', 'statements')
+
+    def __init__(self, kind: str, returnType: str, name: str, parameters: list, varDecs: list, statements: list):
+        self.kind = kind
+        self.returnType = returnType
+        self.name = name
+        self.parameters = parameters
+        self.varDecs = varDecs
+        self.statements = statements
+
+
+class LetStatement(Node):
+    """
+    Constructor: let name = value; or, with an index, let name[index] = value;
+    """
+    CHILDREN = ('index', 'value')
+    __slots__ = ('name', 'index', 'value')
+
+    def __init__(self, name: str, index, value):
+        self.name = name
+        self.index = index
+        self.value = value
+
+
+class IfStatement(Node):
+    """
+    Constructor: if (condition) { statements } else { elseStatements }
+        - elseStatements is None without an else clause
+    """
+    CHILDREN = ('condition', 'statements', 'elseStatements')
+    __slots__ = ('condition', 'statements', 'elseStatements')
+
+    def __init__(self, condition, statements: list, elseStatements: list = None):
+        self.condition = condition
+        self.statements = statements
+        self.elseStatements = elseStatements
+
+
+class WhileStatement(Node):
+    """
+    Constructor: while (condition) { statements }
+    """
+    CHILDREN = ('condition', 'statements')
+    __slots__ = ('condition', 'statements')
+
+    def __init__(self, condition, statements: list):
+        self.condition = condition
+        self.statements = statements
+
+
+class DoStatement(Node):
+    """
+    Constructor: do call;
+    """
+    CHILDREN = ('call',)
+    __slots__ = ('call',)
+
+    def __init__(self, call):
+        self.call = call
+
+
+class ReturnStatement(Node):
+    """
+    Constructor: return value; -- value is None for a bare return
+    """
+    CHILDREN = ('value',)
+    __slots__ = ('value',)
+
+    def __init__(self, value=None):
+        self.value = value
+
+
+class Expression(Node):
+    """
+    Constructor: terms[0] operators[0] terms[1] ... -- at least two terms
+        - operators are VM arithmetic commands (ADD, SUB, ...) or MULTIPLY / DIVIDE
+    """
+    CHILDREN = ('terms',)
+    __slots__ = ('terms', 'operators')
+
+    def __init__(self, terms: list, operators: list):
+        self.terms = terms
+        self.operators = operators
+
+
+class IntegerConstant(Node):
+    """
+    Constructor: Integer constant
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: int):
+        self.value = value
+
+
+class StringConstant(Node):
+    """
+    Constructor: String constant
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class KeywordConstant(Node):
+    """
+    Constructor: true, false, null or this
+    """
+    __slots__ = ('keyword',)
+
+    def __init__(self, keyword: str):
+        self.keyword = keyword
+
+
+class Variable(Node):
+    """
+    Constructor: Variable
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class ArrayEntry(Node):
+    """
+    Constructor: name[index]
+    """
+    CHILDREN = ('index',)
+    __slots__ = ('name', 'index')
+
+    def __init__(self, name: str, index):
+        self.name = name
+        self.index = index
+
+
+class SubroutineCall(Node):
+    """
+    Constructor: receiver.name(args), or name(args) on the current object when receiver is None
+        - receiver: class or variable name, told apart when code is generated
+    """
+    CHILDREN = ('args',)
+    __slots__ = ('receiver', 'name', 'args')
+
+    def __init__(self, receiver: str, name: str, args: list):
+        self.receiver = receiver
+        self.name = name
+        self.args = args
+
+
+class UnaryOp(Node):
+    """
+    Constructor: Unary operator (NEG or NOT) applied to a term
+    """
+    CHILDREN = ('operand',)
+    __slots__ = ('operator', 'operand')
+
+    def __init__(self, operator: str, operand):
+        self.operator = operator
+        self.operand = operand
+
+
+NODE_TYPES = (
+    ClassNode, VarDec, SubroutineDec,
+    LetStatement, IfStatement, WhileStatement, DoStatement, ReturnStatement,
+    Expression, IntegerConstant, StringConstant, KeywordConstant, Variable, ArrayEntry, SubroutineCall, UnaryOp,
+)
+NODE_CODES = {nodeType: code for code, nodeType in enumerate(NODE_TYPES)}
+
+
+"""
+dumps: Serializes a tree to bytes
+    - Each node becomes a record (type code, field values...), where a child is the index of its
+      record and a list of children a tuple of indices; children are recorded before their parent,
+      so the root is the last record
+"""
+def dumps(root: Node) -> bytes:
+    records = []
+    indices = {}
+
+    # Post-order walk: a node is recorded once (second visit) its children are
+    stack = [(root, False)]
+    while stack:
+        node, childrenDone = stack.pop()
+        if not childrenDone:
+            stack.append((node, True))
+            for name in reversed(node.CHILDREN):
+                child = getattr(node, name)
+                if type(child) is list:
+                    stack.extend((item, False) for item in reversed(child))
+                elif child is not None:
+                    stack.append((child, False))
+            continue
+
+        record = [NODE_CODES[type(node)]]
+        for name in node.__slots__:
+            value = getattr(node, name)
+            if name in node.CHILDREN and value is not None:
+                if type(value) is list:
+                    value = tuple(indices[id(item)] for item in value)
+                else:
+                    value = indices[id(value)]
+            record.append(value)
+        indices[id(node)] = len(records)
+        records.append(tuple(record))
+
+    return pickle.dumps((AST_VERSION, records), pickle.HIGHEST_PROTOCOL)
+
+
+"""
+loads: Rebuilds a tree serialized by dumps and returns its root
+"""
+def loads(data: bytes) -> Node:
+    version, records = pickle.loads(data)
+    if version != AST_VERSION:
+        raise RuntimeError(f'Unsupported AST version: {version}')
+
+    nodes = []
+    for record in records:
+        nodeType = NODE_TYPES[record[0]]
+        node = nodeType.__new__(nodeType)
+        children = nodeType.CHILDREN
+        for name, value in zip(nodeType.__slots__, record[1:]):
+            if name in children and value is not None:
+                if type(value) is tuple:
+                    value = [nodes[index] for index in value]
+                else:
+                    value = nodes[value]
+            setattr(node, name, value)
+        nodes.append(node)
+    return nodes[-1]
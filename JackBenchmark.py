@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from CompilationEngine import CompilationEngine
+from CorpusGenerator import CorpusGenerator
+from JackTokenizer import JackTokenizer
+from VMWriter import VMWriter
+
+"""
+Jack Benchmark
+    - Times the compiler phases separately over a corpus of .jack files:
+        - tokenize: lexing each file (JackTokenizer construction)
+        - compile: parsing and code generation (CompilationEngine)
+        - write: writing the .vm output (VMWriter.close)
+    - The corpus is either generated by CorpusGenerator or an existing directory
+    - Each phase is timed over several runs and reported with throughput in tokens/s
+      and lines/s; peak traced memory is measured in a separate, untimed run
+    - The report is printed (or written) as JSON so results can be compared between commits
+"""
+
+
+class DeferredVMWriter(VMWriter):
+    """
+    VMWriter whose close is deferred, so the write phase can be timed on its own
+    """
+    def close(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        VMWriter.close(self)
+
+
+"""
+compileCorpus: Compiles every file once, returning the time spent in each phase and the token count
+    - recursiveExpressions: compile expressions with the recursive parser instead of ExpressionParser
+    - ast: compile in two passes, through a syntax tree (parsing and code generation both count as 'compile')
+"""
+def compileCorpus(filePaths: list, recursiveExpressions: bool = False, ast: bool = False) -> dict:
+    timings = {'tokenize': 0.0, 'compile': 0.0, 'write': 0.0}
+    tokens = 0
+
+    # Silence the compiler's progress prints
+    with contextlib.redirect_stdout(io.StringIO()):
+        for filePath in filePaths:
+            start = time.perf_counter()
+            tokenizer = JackTokenizer(filePath)
+            timings['tokenize'] += time.perf_counter() - start
+            tokens += len(tokenizer.stream)
+
+            vmWriter = DeferredVMWriter(filePath)
+            start = time.perf_counter()
+            CompilationEngine(tokenizer, filePath, vmWriter=vmWriter, recursiveExpressions=recursiveExpressions, ast=ast)
+            timings['compile'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            vmWriter.finish()
+            timings['write'] += time.perf_counter() - start
+
+    timings['tokens'] = tokens
+    return timings
+
+
+"""
+measurePeakMemory: Returns the peak traced memory in bytes for compiling each file
+    - Files are compiled one at a time, so this is the largest single-file peak
+"""
+def measurePeakMemory(filePaths: list) -> int:
+    peak = 0
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for filePath in filePaths:
+                tracemalloc.reset_peak()
+                CompilationEngine(JackTokenizer(filePath), filePath)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+"""
+gitRevision: Returns the current commit hash of the compiler, or None outside a git checkout
+"""
+def gitRevision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+"""
+runBenchmark: Benchmarks the given files over several runs and returns the JSON-ready report
+"""
+def runBenchmark(filePaths: list, runs: int = 5, corpus: dict = None, recursiveExpressions: bool = False,
+                 ast: bool = False) -> dict:
+    lines = 0
+    sourceBytes = 0
+    for filePath in filePaths:
+        with open(filePath, 'r') as file:
+            source = file.read()
+        lines += source.count('\n') + 1
+        sourceBytes += len(source)
+
+    samples = [compileCorpus(filePaths, recursiveExpressions, ast) for _ in range(runs)]
+    tokens = samples[0]['tokens']
+
+    phases = {}
+    for phase in ('tokenize', 'compile', 'write'):
+        times = sorted(sample[phase] for sample in samples)
+        best = times[0]
+        phases[phase] = {
+            'min_s': best,
+            'median_s': times[len(times) // 2],
+            'max_s': times[-1],
+            'tokens_per_s': tokens / best if best else None,
+            'lines_per_s': lines / best if best else None,
+        }
+
+    total = min(sum(sample[phase] for phase in ('tokenize', 'compile', 'write')) for sample in samples)
+    phases['total'] = {
+        'min_s': total,
+        'tokens_per_s': tokens / total if total else None,
+        'lines_per_s': lines / total if total else None,
+    }
+
+    return {
+        'revision': gitRevision(),
+        'python': platform.python_version(),
+        'corpus': corpus,
+        'files': len(filePaths),
+        'lines': lines,
+        'bytes': sourceBytes,
+        'tokens': tokens,
+        'runs': runs,
+        'expressions': 'recursive' if recursiveExpressions else 'parser',
+        'pipeline': 'ast' if ast else 'single-pass',
+        'phases': phases,
+        'peak_memory_bytes': measurePeakMemory(filePaths),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the Jack compiler phases')
+    parser.add_argument('--corpus', help='directory of .jack files to benchmark instead of a generated corpus')
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--subroutines', type=int, default=20)
+    parser.add_argument('--statements', type=int, default=12)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--string-density', type=float, default=0.1)
+    parser.add_argument('--array-density', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--recursive-expressions', action='store_true',
+                        help='compile expressions with the recursive parser, to compare with ExpressionParser')
+    parser.add_argument('--ast', action='store_true',
+                        help='compile through a syntax tree (JackParser, then CodeGenerator), to compare with the single pass')
+    parser.add_argument('--output', '-o', help='write the JSON report to this file instead of stdout')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as workDir:
+        if args.corpus:
+            corpus = {'path': args.corpus}
+            filePaths = []
+            for f in sorted(os.listdir(args.corpus)):
+                if f.endswith('.jack'):
+                    # Copy so the benchmark never overwrites .vm files next to the originals
+                    with open(os.path.join(args.corpus, f), 'r') as src, open(os.path.join(workDir, f), 'w') as dst:
+                        dst.write(src.read())
+                    filePaths.append(os.path.join(workDir, f))
+        else:
+            generator = CorpusGenerator(args.classes, args.subroutines, args.statements, args.depth,
+                                        args.string_density, args.array_density, args.seed)
+            corpus = {
+                'classes': args.classes,
+                'subroutines': args.subroutines,
+                'statements': args.statements,
+                'depth': args.depth,
+                'string_density': args.string_density,
+                'array_density': args.array_density,
+                'seed': args.seed,
+            }
+            filePaths = generator.write(workDir)
+
+        report = runBenchmark(filePaths, args.runs, corpus, args.recursive_expressions, args.ast)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,26 @@
 import argparse
+import io
+import json
 import os
+import sys
+import time
+from contextlib import nullcontext
+from itertools import repeat
+from BuildCache import BuildCache
+from CompilerStats import CompilerStats
+from CostAnalyzer import CostAnalyzer, SORT_KEYS
+from DeadCodeEliminator import DeadCodeEliminator
+from FileWatcher import FileWatcher
+from HackCodeWriter import HackCodeWriter
+from Inliner import Inliner
+from PeepholeOptimizer import PeepholeOptimizer
+from VMBytecode import VMBytecode
+from VMWriter import VMWriter
 from JackTokenizer import JackTokenizer
+from StreamingTokenizer import StreamingTokenizer
+from TokenStream import TokenStream
 from CompilationEngine import CompilationEngine
+from CodeGenerator import CodeGenerator, POOL_BUDGET, STATIC_LIMIT
 from SymbolTable import SymbolTable
 
 """
@@ -10,45 +29,490 @@ Jack Analyzer
     - Tokenizer parses the file(s) line by line
     - Analyzer compiles statements
     - Outputs the corresponding XML file
+    - Files are compiled in parallel worker processes (--jobs), and a failing file
+      does not stop the others from being compiled
+    - Directory compiles skip files unchanged since the last build (see BuildCache)
+    - --stats prints a JSON report of per-phase timings and counters (see CompilerStats)
+    - --whole-program removes the functions no entry point can reach from the directory's
+      .vm files once every class is compiled (see DeadCodeEliminator)
+    - --binary writes compact VM bytecode (.vmb) instead of text .vm files (see VMBytecode)
+    - --asm translates the program straight to a single Hack .asm file, with bootstrap code,
+      in the same process (see HackCodeWriter); .vm files in the directory without a .jack
+      source (e.g. the OS) are translated along with it
+    - --inline replaces calls to small leaf functions and methods with their bodies, across
+      classes, once every class is compiled (see Inliner)
+    - --cost-report prints the static cost of every subroutine, as a table or JSON, without
+      running anything (see CostAnalyzer)
+    - --watch keeps running after the build, recompiling each .jack file as it changes (see FileWatcher)
+    - compileSource / compileSources compile Jack source text held in memory, with no file
+      I/O and no output, for use as a library
+    - --ast compiles each class in two passes: parses it into a syntax tree (see JackParser,
+      JackAST), then generates the same code from the tree (see CodeGenerator); compileTree
+      generates the code of an already parsed tree, e.g. one loaded from a cache
 """
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('dirOrFileName')
-    arg = parser.parse_args()
-    return arg.dirOrFileName
+    parser.add_argument('--stream', action='store_true',
+                        help='lex each file lazily in chunks instead of reading it whole')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: number of cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='recompile every file, ignoring the build cache')
+    parser.add_argument('--clean', action='store_true',
+                        help='delete the build cache and the .vm files it recorded, then exit')
+    parser.add_argument('--stats', action='store_true',
+                        help='print a JSON report of phase timings and compiler counters')
+    parser.add_argument('--peephole', action='store_true',
+                        help='run the peephole optimizer over the generated VM code')
+    parser.add_argument('--no-fold', dest='fold', action='store_false',
+                        help='do not evaluate constant expressions at compile time')
+    parser.add_argument('--strength-reduce', action='store_true',
+                        help='replace multiplications by small constants, and x*0, x*1, x/1, x/-1, with inline code')
+    parser.add_argument('--max-adds', type=int, default=4,
+                        help='most additions a strength-reduced multiplication may take (default: 4)')
+    parser.add_argument('--pool-strings', action='store_true',
+                        help='build each distinct string literal of a class once and reuse it, in a hidden static '
+                             f'(the Hack platform has {STATIC_LIMIT} static words for the whole program)')
+    parser.add_argument('--pool-budget', type=int, default=POOL_BUDGET,
+                        help=f'most string literals a class pools, the rest are built every time (default: {POOL_BUDGET})')
+    parser.add_argument('--binary', action='store_true',
+                        help='write VM bytecode (.vmb) instead of text .vm files')
+    parser.add_argument('--stream-output', action='store_true',
+                        help='write the code of each subroutine as soon as it is compiled instead of buffering the file')
+    parser.add_argument('--ast', action='store_true',
+                        help='parse each class into a syntax tree, then generate its code from the tree (same output)')
+    parser.add_argument('--asm', action='store_true',
+                        help='translate the program to a single Hack .asm file instead of writing .vm files')
+    parser.add_argument('--whole-program', action='store_true',
+                        help='remove functions unreachable from Main.main from the output (recompiles every file)')
+    parser.add_argument('--keep', action='append', default=[], metavar='FUNCTION',
+                        help='extra entry point kept by --whole-program, e.g. Class.function (repeatable)')
+    parser.add_argument('--inline', action='store_true',
+                        help='inline calls to small leaf functions and methods (recompiles every file)')
+    parser.add_argument('--inline-size', type=int, default=8,
+                        help='largest function body, in VM instructions, that --inline copies (default: 8)')
+    parser.add_argument('--cost-report', choices=('table', 'json'),
+                        help='print the static cost of every subroutine (recompiles every file)')
+    parser.add_argument('--sort-by', choices=SORT_KEYS, default='instructions',
+                        help='column the cost report is sorted by (default: instructions)')
+    parser.add_argument('--watch', action='store_true',
+                        help='after building, recompile .jack files whenever they change, until interrupted')
+    parser.add_argument('--poll', action='store_true',
+                        help='with --watch, poll file modification times instead of using inotify')
+    args = parser.parse_args()
+    if args.binary and args.stream_output:
+        parser.error('--stream-output cannot be combined with --binary')
+    if args.binary and args.asm:
+        parser.error('--asm cannot be combined with --binary')
+    if args.watch and (args.whole_program or args.inline or args.asm or args.cost_report or args.clean):
+        parser.error('--watch recompiles single files, so it cannot be combined with '
+                     '--whole-program, --inline, --asm, --cost-report or --clean')
+    return args
+
+
+"""
+compileFile: Compiles a single .jack file to a .vm file next to it
+    - options: dict of compile options
+        - stream: lex the file lazily with StreamingTokenizer
+        - stats: collect a CompilerStats report
+        - peephole: run PeepholeOptimizer over the generated code
+        - fold: evaluate constant expressions at compile time (default: True)
+        - strengthReduce: maximum additions for strength-reduced multiplications, None to disable
+        - poolStrings: build each distinct string literal of a class once, into a hidden static
+        - poolBudget: most literals a class pools (default: POOL_BUDGET)
+        - binary: write VM bytecode (.vmb) instead of a text .vm file
+        - streamOutput: write each subroutine out as soon as it is compiled
+        - ast: parse the class into a syntax tree, then generate its code from the tree
+        - asm: translate to Hack assembly instead of writing a .vm file
+        - costReport: collect the CostAnalyzer entries of the file's subroutines
+    - Returns (filePath, error, info), where error is None on success or the error message,
+      and info is a dict with the number of instructions removed by optimization passes
+      ('removed'), the static words the class uses ('statics'), if requested the CompilerStats
+      report ('stats') and the cost entries ('costs'), and for asm the lines of Hack assembly ('asm')
+    - Runs in a worker process when compiling in parallel
+"""
+def compileFile(filePath, options=None):
+    options = options or {}
+    tokenizerClass = StreamingTokenizer if options.get('stream') else JackTokenizer
+    passes = [PeepholeOptimizer()] if options.get('peephole') else []
+    # Last, so it measures the code as written
+    analyzer = None
+    if options.get('costReport'):
+        analyzer = CostAnalyzer()
+        passes.append(analyzer)
+
+    info = {'removed': 0}
+    stats = None
+    if options.get('stats'):
+        stats = CompilerStats()
+        stats.startFile(filePath)
+
+    vmWriter = None
+    try:
+        with stats.phase('tokenize') if stats else nullcontext():
+            tokenizer = tokenizerClass(filePath)
+        backend = None
+        if options.get('asm'):
+            backend = HackCodeWriter(os.path.splitext(os.path.basename(filePath))[0])
+        vmWriter = VMWriter(filePath, passes=passes, binary=options.get('binary', False),
+                            streaming=options.get('streamOutput', False), backend=backend)
+        engine = CompilationEngine(tokenizer, filePath, vmWriter=vmWriter, stats=stats,
+                          foldConstants=options.get('fold', True),
+                          strengthReduction=options.get('strengthReduce'),
+                                   poolStrings=options.get('poolStrings', False), ast=options.get('ast', False),
+                                   poolBudget=options.get('poolBudget', POOL_BUDGET))
+        info['removed'] = vmWriter.instructionsRemoved
+        info['statics'] = engine.staticCount()
+        if backend:
+            info['asm'] = backend.asm
+        if analyzer:
+            info['costs'] = analyzer.subroutines
+        error = None
+    except Exception as exception:
+        error = str(exception)
+        if vmWriter:
+            vmWriter.abort()
+
+    if stats:
+        info['stats'] = stats.report()
+    return filePath, error, info
+
+
+"""
+compileFiles: Compiles all files, spreading them across up to jobs worker processes
+    - Returns one (filePath, error, info) result per file, in the order of fileArr
+"""
+def compileFiles(fileArr, jobs=1, options=None):
+    jobs = min(jobs, len(fileArr))
+    if jobs <= 1:
+        return [compileFile(filePath, options) for filePath in fileArr]
+
+    # Imported here so cached no-op builds do not pay for loading multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(compileFile, fileArr, repeat(options)))
+
+
+"""
+compileSource: Compiles Jack source text in memory and returns its VM code, without touching the disk or printing
+    - options: compile options, as for compileFile (peephole, fold, strengthReduce, poolStrings,
+      poolBudget, binary, ast); file-related options are ignored
+    - Returns the VM code as text, or as VM bytecode (bytes) with binary
+    - Raises RuntimeError if the source does not compile
+"""
+def compileSource(source, options=None):
+    options = options or {}
+    stream = TokenStream(source)
+    output = io.StringIO()
+    if stream.kinds:
+        passes = [PeepholeOptimizer()] if options.get('peephole') else []
+        vmWriter = VMWriter('<source>', passes=passes, output=output)
+        CompilationEngine(JackTokenizer.fromStream(stream), '<source>', vmWriter=vmWriter,
+                          foldConstants=options.get('fold', True),
+                          strengthReduction=options.get('strengthReduce'),
+                          poolStrings=options.get('poolStrings', False), ast=options.get('ast', False),
+                          poolBudget=options.get('poolBudget', POOL_BUDGET))
+
+    vmText = output.getvalue()
+    if options.get('binary'):
+        return VMBytecode.encode(vmText.splitlines())
+    return vmText
+
+
+"""
+compileTree: Generates the VM code of a class already parsed into a syntax tree (see JackParser),
+e.g. one loaded with JackAST.loads, without lexing or parsing it again
+    - options and result as for compileSource
+"""
+def compileTree(classNode, options=None):
+    options = options or {}
+    output = io.StringIO()
+    passes = [PeepholeOptimizer()] if options.get('peephole') else []
+    vmWriter = VMWriter('<source>', passes=passes, output=output)
+    CodeGenerator(vmWriter, foldConstants=options.get('fold', True),
+                  strengthReduction=options.get('strengthReduce'),
+                  poolStrings=options.get('poolStrings', False),
+                  poolBudget=options.get('poolBudget', POOL_BUDGET)).generateClass(classNode)
+    vmWriter.close()
+
+    vmText = output.getvalue()
+    if options.get('binary'):
+        return VMBytecode.encode(vmText.splitlines())
+    return vmText
+
+
+"""
+compileSourceEntry: Compiles one (name, source) pair for compileSources, returning (name, error, vmCode)
+"""
+def compileSourceEntry(entry, options=None):
+    name, source = entry
+    try:
+        return name, None, compileSource(source, options)
+    except Exception as exception:
+        return name, str(exception), None
+
+
+"""
+compileSources: Compiles a batch of Jack sources in memory, spreading them across up to jobs worker processes
+    - sources: dict of name (e.g. class or file name) -> Jack source text
+    - Returns one (name, error, vmCode) result per source, in order, where error is None on
+      success or the error message, and vmCode is None on failure
+"""
+def compileSources(sources, options=None, jobs=1):
+    entries = list(sources.items())
+    jobs = min(jobs, len(entries))
+    if jobs <= 1:
+        return [compileSourceEntry(entry, options) for entry in entries]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(compileSourceEntry, entries, repeat(options)))
+
+
+"""
+optimizeProgram: Runs whole-program passes over the .vm (or .vmb) outputs of the given files, rewriting them
+    - passes: whole-program passes, each with a run(program) -> program method, applied in order
+"""
+def optimizeProgram(fileArr, passes, binary=False):
+    extension = '.vmb' if binary else '.vm'
+    program = {}
+    for filePath in fileArr:
+        outputPath = BuildCache.outputPath(filePath, extension)
+        if binary:
+            program[filePath] = VMBytecode.read(outputPath)
+        else:
+            with open(outputPath, 'r') as file:
+                program[filePath] = file.read().splitlines()
+
+    for programPass in passes:
+        program = programPass.run(program)
+
+    for filePath, vmCode in program.items():
+        outputPath = BuildCache.outputPath(filePath, extension)
+        if binary:
+            VMBytecode.write(outputPath, vmCode)
+        else:
+            with open(outputPath, 'w') as file:
+                file.write('\n'.join(vmCode))
+    return program
+
+
+"""
+writeAssembly: Writes the Hack assembly of a program -- bootstrap and shared stubs, then every class
+    - fragments: the assembly lines of each class
+    - Returns the number of lines written
+"""
+def writeAssembly(asmPath, fragments):
+    asm = HackCodeWriter.bootstrap()
+    for fragment in fragments:
+        asm += fragment
+
+    tmpPath = asmPath + '.tmp'
+    with open(tmpPath, 'w') as file:
+        print('Writing to new file: ', asmPath)
+        file.write('\n'.join(asm) + '\n')
+    os.replace(tmpPath, asmPath)
+    return len(asm)
+
+
+"""
+watch: Recompiles the changed .jack files each time the watcher reports a batch, until interrupted
+    - A single-file build only reacts to that file
+"""
+def watch(watcher, dirOrFileName, cache, jobs, options):
+    print(f'Watching {dirOrFileName} for changes ({watcher.backend}), press Ctrl+C to stop')
+    try:
+        while True:
+            changed = watcher.wait()
+            if not os.path.isdir(dirOrFileName):
+                changed = [filePath for filePath in changed if os.path.normpath(filePath) == os.path.normpath(dirOrFileName)]
+            if not changed:
+                continue
+
+            startTime = time.perf_counter()
+            results = compileFiles(changed, jobs, options)
+            if cache:
+                for filePath, error, _ in results:
+                    cache.record(filePath, error is None)
+                cache.save()
+
+            failed = [(filePath, error) for filePath, error, _ in results if error is not None]
+            for filePath, error in failed:
+                print(f'{filePath}: {error}')
+            print(f'Recompiled {len(results) - len(failed)} of {len(results)} changed files '
+                  f'in {time.perf_counter() - startTime:.3f}s')
+    except KeyboardInterrupt:
+        print('Stopped watching')
+    finally:
+        watcher.close()
+    return 0
 
 
 def main():
-    dirOrFileName = parse_args()
+    startTime = time.perf_counter()
+    args = parse_args()
+    dirOrFileName = args.dirOrFileName
+
+    strengthReduce = args.max_adds if args.strength_reduce else None
+    extension = '.vmb' if args.binary else '.vm'
 
     fileArr = []
+    vmFileArr = []
+    cache = None
 
     # If single file input
-    if '.' in dirOrFileName:
+    if not os.path.isdir(dirOrFileName):
         fileArr.append(dirOrFileName)
+        asmPath = os.path.splitext(dirOrFileName)[0] + '.asm'
 
     # Else if directory of .jack files
     else:
-        for root, dir, files in os.walk('./' + dirOrFileName):
-            dirName = root.split('./')[1]
+        for root, dir, files in os.walk(dirOrFileName):
+            dirName = root
             print(dirName)
-            for f in files:
-                if '.jack' in f:
+            for f in sorted(files):
+                if f.endswith('.jack'):
                     print(f)
                     filePath = dirName + '/' + f
                     fileArr.append(filePath)
+                # VM code without a source, translated as is by --asm
+                elif f.endswith('.vm') and f[:-len('.vm')] + '.jack' not in files:
+                    vmFileArr.append(dirName + '/' + f)
+        asmPath = os.path.join(dirOrFileName, os.path.basename(os.path.normpath(dirOrFileName)) + '.asm')
+        cacheOptions = (f'peephole={args.peephole},fold={args.fold},strengthReduce={strengthReduce},'
+                        f'poolStrings={args.pool_strings},poolBudget={args.pool_budget},wholeProgram={args.whole_program},'
+                        f'inline={args.inline and args.inline_size},binary={args.binary}')
+        cache = BuildCache(dirOrFileName, options=cacheOptions, extension=extension)
     print(fileArr)
 
-    for filePath in fileArr:
-        tokenizer = JackTokenizer(filePath)
+    if cache and args.clean:
+        for outputPath in cache.clean():
+            print('Removed: ', outputPath)
+        return 0
+
+    # Whole-program passes, the assembly output and the cost report need every class, so nothing can be skipped
+    wholeProgram = args.whole_program or args.inline
+    if cache and not args.force and not wholeProgram and not args.asm and not args.cost_report:
+        staleArr = cache.staleFiles(fileArr)
+        print(f'Up to date: {len(fileArr) - len(staleArr)} of {len(fileArr)} files')
+        fileArr = staleArr
 
+    options = {'stream': args.stream, 'stats': args.stats, 'peephole': args.peephole, 'fold': args.fold,
+               'strengthReduce': strengthReduce, 'poolStrings': args.pool_strings, 'poolBudget': args.pool_budget,
+               'binary': args.binary, 'streamOutput': args.stream_output, 'ast': args.ast,
+               # Whole-program passes run on the .vm files, which are translated and measured afterwards
+               'asm': args.asm and not wholeProgram, 'costReport': args.cost_report and not wholeProgram}
+
+    # Started before the build, so files saved while it runs are not missed
+    watcher = None
+    if args.watch:
+        watcher = FileWatcher(dirOrFileName if os.path.isdir(dirOrFileName) else os.path.dirname(dirOrFileName) or '.',
+                              polling=args.poll)
+
+    results = compileFiles(fileArr, args.jobs, options)
+
+    if cache and not args.asm:
+        for filePath, error, _ in results:
+            cache.record(filePath, error is None)
+        cache.save()
+
+    failed = [(filePath, error) for filePath, error, _ in results if error is not None]
+    for filePath, error in failed:
+        print(f'{filePath}: {error}')
+    print(f'Compiled {len(results) - len(failed)} of {len(results)} files')
+
+    # Statics of every class share one segment; files skipped as up to date are not counted
+    statics = sum(info.get('statics', 0) for _, error, info in results if error is None)
+    if statics > STATIC_LIMIT:
+        print(f'Warning: the compiled classes use {statics} static words, more than the {STATIC_LIMIT} '
+              'of the Hack platform (lower --pool-budget or drop --pool-strings)')
+
+    if wholeProgram:
+        if failed:
+            print('Skipping whole-program optimization: not every file compiled')
+            return 1
+
+        # Inline first, so functions left without callers are eliminated
+        inliner = Inliner(maxSize=args.inline_size) if args.inline else None
+        eliminator = DeadCodeEliminator(roots=args.keep) if args.whole_program else None
+        passes = [programPass for programPass in (inliner, eliminator) if programPass]
+
+        # Empty .jack files have no output
+        outputArr = [filePath for filePath in fileArr if os.path.exists(BuildCache.outputPath(filePath, extension))]
         try:
-            CompilationEngine(tokenizer, filePath)
-        except RuntimeError as error:
-            print(error)
-            return
+            program = optimizeProgram(outputArr, passes, args.binary)
+        except RuntimeError as exception:
+            print(exception)
+            return 1
+
+        if inliner:
+            sites = {}
+            for site in inliner.inlined:
+                sites[site] = sites.get(site, 0) + 1
+            for (caller, callee), count in sorted(sites.items()):
+                print(f'Inlined {callee} into {caller} ({count} call sites)')
+            print(f'Inlined {len(inliner.inlined)} call sites')
+
+        if eliminator:
+            for name, size in sorted(eliminator.removed.items()):
+                print(f'Removed unreachable function: {name} ({size} instructions)')
+            print(f'Removed {len(eliminator.removed)} unreachable functions, '
+                  f'{sum(eliminator.removed.values())} instructions')
+
+    if args.asm:
+        if failed:
+            print('Skipping assembly output: not every file compiled')
+            return 1
+
+        fragments = []
+        for filePath, _, info in results:
+            if wholeProgram:
+                if filePath not in program:
+                    continue
+                backend = HackCodeWriter(os.path.splitext(os.path.basename(filePath))[0])
+                backend.writeCode(program[filePath])
+                fragments.append(backend.asm)
+            elif 'asm' in info:
+                fragments.append(info['asm'])
+        for vmFilePath in vmFileArr:
+            backend = HackCodeWriter(os.path.splitext(os.path.basename(vmFilePath))[0])
+            backend.writeCode(VMBytecode.readText(vmFilePath))
+            fragments.append(backend.asm)
+        lines = writeAssembly(asmPath, fragments)
+        print(f'Wrote {lines} lines of Hack assembly to {asmPath}')
+
+    if args.peephole:
+        removed = sum(info['removed'] for _, _, info in results)
+        print(f'Peephole optimizer removed {removed} instructions')
+
+    if args.cost_report:
+        analyzer = CostAnalyzer()
+        if wholeProgram:
+            for vmCode in program.values():
+                analyzer.run(vmCode)
+        else:
+            for _, _, info in results:
+                analyzer.subroutines += info.get('costs', [])
+        report = analyzer.report(args.sort_by)
+        print(CostAnalyzer.table(report) if args.cost_report == 'table' else json.dumps(report, indent=2))
+
+    if args.stats:
+        stats = CompilerStats()
+        for filePath, _, info in results:
+            if 'stats' in info:
+                stats.merge(info['stats'], filePath)
+        report = stats.report()
+        report['wallSeconds'] = time.perf_counter() - startTime
+        print(json.dumps(report, indent=2))
+
+    if watcher:
+        return watch(watcher, dirOrFileName, cache, args.jobs, options)
+    return 1 if failed else 0
+
 
-            
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""
+JackOS class
+    - Python stand-ins for the Jack OS classes, run by VMEmulator for every OS function the
+      program does not define itself
+    - Objects live in the emulator's RAM as with the real OS: Memory.alloc hands out heap blocks
+      between 2048 and 16383, and a String at address p holds its length at p, its capacity
+      at p+1 and its characters from p+2
+    - Output is collected as text; Screen drawing is a no-op and Keyboard input is empty
+    - Each function takes the call's arguments and returns the value the call pushes (None for 0)
+    - Errors the real OS reports through Sys.error raise RuntimeError
+"""
+
+HEAP_BASE = 2048
+HEAP_END = 16384
+
+NEW_LINE = 128
+BACKSPACE = 129
+DOUBLE_QUOTE = 34
+
+
+"""
+toInt16: Wraps an integer to the 16-bit two's-complement range of the Hack platform
+"""
+def toInt16(value: int) -> int:
+    return ((value + 32768) & 0xFFFF) - 32768
+
+
+class JackOS:
+    """
+    Constructor: Creates the OS state over the emulator's RAM
+    """
+    def __init__(self, ram: list):
+        self.ram = ram
+        self.heapTop = HEAP_BASE
+        self.blockSizes = {}
+        self.freeBlocks = {}
+        self.output = []
+        self.halted = False
+
+        self.functions = {
+            'Math.init': self.noOp,
+            'Math.abs': self.absolute,
+            'Math.multiply': self.multiply,
+            'Math.divide': self.divide,
+            'Math.min': min,
+            'Math.max': max,
+            'Math.sqrt': self.sqrt,
+            'Memory.init': self.noOp,
+            'Memory.peek': self.peek,
+            'Memory.poke': self.poke,
+            'Memory.alloc': self.alloc,
+            'Memory.deAlloc': self.deAlloc,
+            'Array.new': self.alloc,
+            'Array.dispose': self.deAlloc,
+            'String.new': self.stringNew,
+            'String.dispose': self.deAlloc,
+            'String.length': self.stringLength,
+            'String.charAt': self.charAt,
+            'String.setCharAt': self.setCharAt,
+            'String.appendChar': self.appendChar,
+            'String.eraseLastChar': self.eraseLastChar,
+            'String.intValue': self.intValue,
+            'String.setInt': self.setInt,
+            'String.backSpace': lambda: BACKSPACE,
+            'String.doubleQuote': lambda: DOUBLE_QUOTE,
+            'String.newLine': lambda: NEW_LINE,
+            'Output.init': self.noOp,
+            'Output.moveCursor': self.noOp,
+            'Output.printChar': self.printChar,
+            'Output.printString': self.printString,
+            'Output.printInt': self.printInt,
+            'Output.println': lambda: self.printChar(NEW_LINE),
+            'Output.backSpace': lambda: self.printChar(BACKSPACE),
+            'Screen.init': self.noOp,
+            'Screen.clearScreen': self.noOp,
+            'Screen.setColor': self.noOp,
+            'Screen.drawPixel': self.noOp,
+            'Screen.drawLine': self.noOp,
+            'Screen.drawRectangle': self.noOp,
+            'Screen.drawCircle': self.noOp,
+            'Keyboard.init': self.noOp,
+            'Keyboard.keyPressed': lambda: 0,
+            'Keyboard.readChar': lambda: 0,
+            'Keyboard.readLine': lambda message: self.stringNew(0),
+            'Keyboard.readInt': lambda message: 0,
+            'Sys.halt': self.halt,
+            'Sys.error': self.error,
+            'Sys.wait': self.noOp,
+        }
+
+
+    """
+    text: Returns everything printed so far
+    """
+    def text(self) -> str:
+        return ''.join(self.output)
+
+
+    """
+    noOp: Accepts any arguments and does nothing
+    """
+    def noOp(self, *args) -> None:
+        return None
+
+
+    """
+    absolute: Math.abs -- the absolute value wrapped to 16 bits (abs(-32768) is -32768)
+    """
+    def absolute(self, x: int) -> int:
+        return toInt16(abs(x))
+
+
+    """
+    multiply: Math.multiply -- the product wrapped to 16 bits
+    """
+    def multiply(self, x: int, y: int) -> int:
+        return toInt16(x * y)
+
+
+    """
+    divide: Math.divide -- the quotient truncated toward zero
+    """
+    def divide(self, x: int, y: int) -> int:
+        if y == 0:
+            raise RuntimeError('Math.divide: division by zero')
+        quotient = abs(x) // abs(y)
+        return toInt16(quotient if (x < 0) == (y < 0) else -quotient)
+
+
+    """
+    sqrt: Math.sqrt -- the integer part of the square root
+    """
+    def sqrt(self, x: int) -> int:
+        if x < 0:
+            raise RuntimeError('Math.sqrt: negative argument')
+        return int(x ** 0.5)
+
+
+    """
+    peek: Memory.peek -- returns the value at a RAM address
+    """
+    def peek(self, address: int) -> int:
+        return self.ram[address]
+
+
+    """
+    poke: Memory.poke -- sets the value at a RAM address
+    """
+    def poke(self, address: int, value: int) -> None:
+        self.ram[address] = value
+
+
+    """
+    alloc: Returns the base address of a free heap block of the given size
+        - Freed blocks of the same size are reused first
+    """
+    def alloc(self, size: int) -> int:
+        if size <= 0:
+            raise RuntimeError(f'Memory.alloc: invalid size {size}')
+        if self.freeBlocks.get(size):
+            return self.freeBlocks[size].pop()
+        if self.heapTop + size > HEAP_END:
+            raise RuntimeError('Memory.alloc: heap overflow')
+
+        address = self.heapTop
+        self.heapTop += size
+        self.blockSizes[address] = size
+        return address
+
+
+    """
+    deAlloc: Returns a block allocated by alloc to the heap
+    """
+    def deAlloc(self, address: int) -> None:
+        size = self.blockSizes.get(address)
+        if size is None:
+            raise RuntimeError(f'Memory.deAlloc: {address} is not an allocated block')
+        self.freeBlocks.setdefault(size, []).append(address)
+
+
+    """
+    stringNew: String.new -- allocates an empty string of the given capacity
+    """
+    def stringNew(self, maxLength: int) -> int:
+        if maxLength < 0:
+            raise RuntimeError(f'String.new: invalid length {maxLength}')
+        address = self.alloc(maxLength + 2)
+        self.ram[address] = 0
+        self.ram[address + 1] = maxLength
+        return address
+
+
+    """
+    stringLength: String.length
+    """
+    def stringLength(self, string: int) -> int:
+        return self.ram[string]
+
+
+    """
+    charAt: String.charAt
+    """
+    def charAt(self, string: int, idx: int) -> int:
+        if not 0 <= idx < self.ram[string]:
+            raise RuntimeError(f'String.charAt: index {idx} out of range')
+        return self.ram[string + 2 + idx]
+
+
+    """
+    setCharAt: String.setCharAt
+    """
+    def setCharAt(self, string: int, idx: int, c: int) -> None:
+        if not 0 <= idx < self.ram[string]:
+            raise RuntimeError(f'String.setCharAt: index {idx} out of range')
+        self.ram[string + 2 + idx] = c
+
+
+    """
+    appendChar: String.appendChar -- returns the string
+    """
+    def appendChar(self, string: int, c: int) -> int:
+        length = self.ram[string]
+        if length >= self.ram[string + 1]:
+            raise RuntimeError('String.appendChar: string is full')
+        self.ram[string + 2 + length] = c
+        self.ram[string] = length + 1
+        return string
+
+
+    """
+    eraseLastChar: String.eraseLastChar
+    """
+    def eraseLastChar(self, string: int) -> None:
+        if self.ram[string] == 0:
+            raise RuntimeError('String.eraseLastChar: string is empty')
+        self.ram[string] -= 1
+
+
+    """
+    intValue: String.intValue -- the integer value of the leading digits (and minus sign)
+    """
+    def intValue(self, string: int) -> int:
+        chars = self.stringText(string)
+        sign = -1 if chars.startswith('-') else 1
+        digits = ''
+        for c in chars[1:] if sign < 0 else chars:
+            if not c.isdigit():
+                break
+            digits += c
+        return toInt16(sign * int(digits)) if digits else 0
+
+
+    """
+    setInt: String.setInt -- sets the string to the decimal form of value
+    """
+    def setInt(self, string: int, value: int) -> None:
+        digits = str(value)
+        if len(digits) > self.ram[string + 1]:
+            raise RuntimeError('String.setInt: string is too short')
+        for idx, c in enumerate(digits):
+            self.ram[string + 2 + idx] = ord(c)
+        self.ram[string] = len(digits)
+
+
+    """
+    stringText: Returns the characters of a heap string as a Python string
+    """
+    def stringText(self, string: int) -> str:
+        return ''.join(chr(c) for c in self.ram[string + 2:string + 2 + self.ram[string]])
+
+
+    """
+    printChar: Output.printChar -- 128 is a new line, 129 erases the last character
+    """
+    def printChar(self, c: int) -> None:
+        if c == NEW_LINE:
+            self.output.append('\n')
+        elif c == BACKSPACE:
+            if self.output:
+                self.output.pop()
+        else:
+            self.output.append(chr(c))
+
+
+    """
+    printString: Output.printString
+    """
+    def printString(self, string: int) -> None:
+        self.output.extend(self.stringText(string))
+
+
+    """
+    printInt: Output.printInt
+    """
+    def printInt(self, value: int) -> None:
+        self.output.extend(str(value))
+
+
+    """
+    halt: Sys.halt -- stops the program
+    """
+    def halt(self) -> None:
+        self.halted = True
+
+
+    """
+    error: Sys.error -- fails the program with the error code
+    """
+    def error(self, code: int) -> None:
+        raise RuntimeError(f'Sys.error: {code}')
@@ -0,0 +1,480 @@
+from JackAST import (
+    ClassNode, VarDec, SubroutineDec, LetStatement, IfStatement, WhileStatement, DoStatement, ReturnStatement,
+    Expression, IntegerConstant, StringConstant, KeywordConstant, Variable, ArrayEntry, SubroutineCall, UnaryOp,
+)
+from ExpressionParser import OPERATORS, UNARY_OPERATORS, EXPRESSION_END
+
+"""
+JackParser class
+    - Parses the tokens of a class into its syntax tree (JackAST), for CodeGenerator to compile
+    - Only checks the grammar: names are resolved when code is generated, so a tree can be
+      cached, inspected or transformed before any code is written
+    - Like ExpressionParser, parses expressions without recursion (an explicit stack of frames,
+      one per unfinished expression or unary operator), so their nesting depth is limited only
+      by memory, and reads the current token from the tokenizer's currType / currToken
+"""
+
+# Keyword constants (terms)
+KEYWORD_CONSTANTS = frozenset(('true', 'false', 'null', 'this'))
+
+# Kinds of the variables declared by each keyword
+DECLARATION_KINDS = {'static': 'static', 'field': 'field', 'var': 'local'}
+
+# Frames
+#   - [EXPRESSION, closer, terms, operators]: unfinished expression
+#   - (UNARY, operator): unary operator waiting for its operand
+EXPRESSION, UNARY = range(2)
+
+# What an expression is closed by: None for the expression parseExpression was called for,
+# PARENTHESES for (expression), else the ArrayEntry or SubroutineCall node it belongs to
+PARENTHESES = object()
+
+# Returned by a term parser that pushed a frame instead of finishing its term
+NESTED = object()
+
+
+class JackParser:
+    """
+    Constructor: Creates a parser reading the tokens of a class from tokenizer
+    """
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+        # Statement keywords -> method parsing that statement
+        self.statementParsers = {
+            'let': self.parseLet,
+            'if': self.parseIf,
+            'while': self.parseWhile,
+            'do': self.parseDo,
+            'return': self.parseReturn,
+        }
+        # Term types -> method parsing (or starting, see NESTED) a term of that type
+        self.termParsers = {
+            'IDENTIFIER': self.identifierTerm,
+            'INT_CONST': self.integerTerm,
+            'STRING_CONST': self.stringTerm,
+            'SYMBOL': self.symbolTerm,
+            'KEYWORD': self.keywordTerm,
+        }
+
+
+    """
+    advance: Moves to the next token, which must exist
+        - The tokenizers raise IndexError when advanced past the last token, which is cheaper
+          than asking hasMoreTokens before every token
+    """
+    def advance(self):
+        try:
+            self.tokenizer.advance()
+        except IndexError:
+            raise RuntimeError('Unexpected end of input') from None
+
+
+    """
+    expectSymbol: Checks that the current token is the given symbol
+    """
+    def expectSymbol(self, symbol: str, where: str):
+        if self.tokenizer.currType != 'SYMBOL' or self.tokenizer.currToken != symbol:
+            raise RuntimeError(f'{symbol} expected in {where}')
+
+
+    """
+    identifier: Returns the current token, which must be an identifier
+    """
+    def identifier(self, where: str) -> str:
+        if self.tokenizer.currType != 'IDENTIFIER':
+            raise RuntimeError(f'Identifier expected in {where}')
+        return self.tokenizer.currToken
+
+
+    """
+    typeName: Returns the current token, which must be a type -- int, char, boolean, void or a class name
+    """
+    def typeName(self, where: str) -> str:
+        if self.tokenizer.currType not in ('KEYWORD', 'IDENTIFIER'):
+            raise RuntimeError(f'Type expected in {where}')
+        return self.tokenizer.currToken
+
+
+    """
+    parseClass: Parses a complete class, from its first token to its closing bracket
+    """
+    def parseClass(self) -> ClassNode:
+        tokenizer = self.tokenizer
+
+        self.advance()
+        if tokenizer.currType != 'KEYWORD' or tokenizer.currToken != 'class':
+            raise RuntimeError('class expected')
+        self.advance()
+        name = self.identifier('parseClass')
+        self.advance()
+        self.expectSymbol('{', 'parseClass')
+        self.advance()
+
+        # Static or field declarations, and then subroutines
+        classVarDecs = []
+        subroutines = []
+        while tokenizer.currType == 'KEYWORD':
+            token = tokenizer.currToken
+            if token == 'static' or token == 'field':
+                classVarDecs.append(self.parseVarDec())
+            elif token == 'constructor' or token == 'function' or token == 'method':
+                subroutines.append(self.parseSubroutine())
+            else:
+                raise RuntimeError(f'Class member expected: {token}')
+
+        self.expectSymbol('}', 'parseClass')
+        return ClassNode(name, classVarDecs, subroutines)
+
+
+    """
+    parseVarDec: Parses a static, field or var declaration -- kind type name (, name)* ;
+    """
+    def parseVarDec(self) -> VarDec:
+        kind = DECLARATION_KINDS[self.tokenizer.currToken]
+        self.advance()
+        type = self.typeName('parseVarDec')
+
+        names = []
+        while True:
+            self.advance()
+            names.append(self.identifier('parseVarDec'))
+            self.advance()
+            if self.tokenizer.currType != 'SYMBOL' or self.tokenizer.currToken != ',':
+                break
+        self.expectSymbol(';', 'parseVarDec')
+        self.advance()
+
+        return VarDec(kind, type, names)
+
+
+    """
+    parseSubroutine: Parses a constructor, function or method -- kind type name (parameters) { varDecs statements }
+    """
+    def parseSubroutine(self) -> SubroutineDec:
+        tokenizer = self.tokenizer
+        kind = tokenizer.currToken
+        self.advance()
+        returnType = self.typeName('parseSubroutine')
+        self.advance()
+        name = self.identifier('parseSubroutine')
+        self.advance()
+        self.expectSymbol('(', 'parseSubroutine')
+        self.advance()
+
+        # Parameter list -- one argument declaration per parameter
+        parameters = []
+        if tokenizer.currType != 'SYMBOL' or tokenizer.currToken != ')':
+            while True:
+                type = self.typeName('parseSubroutine')
+                self.advance()
+                parameters.append(VarDec('argument', type, [self.identifier('parseSubroutine')]))
+                self.advance()
+                if tokenizer.currType != 'SYMBOL' or tokenizer.currToken != ',':
+                    break
+                self.advance()
+        self.expectSymbol(')', 'parseSubroutine')
+        self.advance()
+
+        # Body
+        self.expectSymbol('{', 'parseSubroutine')
+        self.advance()
+        varDecs = []
+        while tokenizer.currType == 'KEYWORD' and tokenizer.currToken == 'var':
+            varDecs.append(self.parseVarDec())
+        statements = self.parseStatements()
+        self.expectSymbol('}', 'parseSubroutine')
+        self.advance()
+
+        return SubroutineDec(kind, returnType, name, parameters, varDecs, statements)
+
+
+    """
+    parseStatements: Parses a sequence of statements, up to the first token that does not start one
+    """
+    def parseStatements(self) -> list:
+        tokenizer = self.tokenizer
+        statementParsers = self.statementParsers
+        statements = []
+        while tokenizer.currType == 'KEYWORD':
+            parseStatement = statementParsers.get(tokenizer.currToken)
+            if parseStatement is None:
+                break
+            statements.append(parseStatement())
+        return statements
+
+
+    """
+    parseBlock: Parses { statements }
+    """
+    def parseBlock(self, where: str) -> list:
+        self.expectSymbol('{', where)
+        self.advance()
+        statements = self.parseStatements()
+        self.expectSymbol('}', where)
+        self.advance()
+        return statements
+
+
+    """
+    parseLet: Parses a let statement -- let name ([index])? = value;
+    """
+    def parseLet(self) -> LetStatement:
+        tokenizer = self.tokenizer
+        self.advance()
+        name = self.identifier('parseLet')
+        self.advance()
+
+        index = None
+        if tokenizer.currType == 'SYMBOL' and tokenizer.currToken == '[':
+            self.advance()
+            index = self.parseExpression()
+            self.expectSymbol(']', 'parseLet')
+            self.advance()
+
+        self.expectSymbol('=', 'parseLet')
+        self.advance()
+        value = self.parseExpression()
+        self.expectSymbol(';', 'parseLet')
+        self.advance()
+
+        return LetStatement(name, index, value)
+
+
+    """
+    parseIf: Parses an if statement, possibly with a trailing else clause
+    """
+    def parseIf(self) -> IfStatement:
+        tokenizer = self.tokenizer
+        condition = self.parseCondition('parseIf')
+        statements = self.parseBlock('parseIf')
+
+        elseStatements = None
+        if tokenizer.currType == 'KEYWORD' and tokenizer.currToken == 'else':
+            self.advance()
+            elseStatements = self.parseBlock('parseIf')
+
+        return IfStatement(condition, statements, elseStatements)
+
+
+    """
+    parseWhile: Parses a while statement
+    """
+    def parseWhile(self) -> WhileStatement:
+        condition = self.parseCondition('parseWhile')
+        return WhileStatement(condition, self.parseBlock('parseWhile'))
+
+
+    """
+    parseCondition: Parses the keyword and (condition) of an if or while statement
+    """
+    def parseCondition(self, where: str):
+        self.advance()
+        self.expectSymbol('(', where)
+        self.advance()
+        condition = self.parseExpression()
+        self.expectSymbol(')', where)
+        self.advance()
+        return condition
+
+
+    """
+    parseDo: Parses a do statement -- do subroutineCall;
+    """
+    def parseDo(self) -> DoStatement:
+        tokenizer = self.tokenizer
+        self.advance()
+        name = self.identifier('parseDo')
+        self.advance()
+
+        receiver = None
+        if tokenizer.currType == 'SYMBOL' and tokenizer.currToken == '.':
+            receiver = name
+            self.advance()
+            name = self.identifier('parseDo')
+            self.advance()
+        self.expectSymbol('(', 'parseDo')
+        self.advance()
+
+        # Arguments, each a separate expression
+        args = []
+        if tokenizer.currType != 'SYMBOL' or tokenizer.currToken != ')':
+            while True:
+                args.append(self.parseExpression())
+                if tokenizer.currType != 'SYMBOL' or tokenizer.currToken != ',':
+                    break
+                self.advance()
+        self.expectSymbol(')', 'parseDo')
+        self.advance()
+        self.expectSymbol(';', 'parseDo')
+        self.advance()
+
+        return DoStatement(SubroutineCall(receiver, name, args))
+
+
+    """
+    parseReturn: Parses a return statement
+    """
+    def parseReturn(self) -> ReturnStatement:
+        tokenizer = self.tokenizer
+        self.advance()
+        value = None
+        if tokenizer.currType != 'SYMBOL' or tokenizer.currToken != ';':
+            value = self.parseExpression()
+        self.expectSymbol(';', 'parseReturn')
+        self.advance()
+        return ReturnStatement(value)
+
+
+    """
+    parseExpression: Parses an expression -- term (op term)*
+        - Returns the node of its only term, or an Expression of its terms and operators
+        - Stops at the first token after the expression
+    """
+    def parseExpression(self):
+        tokenizer = self.tokenizer
+        termParsers = self.termParsers
+
+        frames = [[EXPRESSION, None, [], []]]
+
+        while True:
+            parseTerm = termParsers.get(tokenizer.currType)
+            if parseTerm is None:
+                raise RuntimeError(f'Term expected: {tokenizer.currToken}')
+            node = parseTerm(frames)
+            if node is NESTED:
+                continue
+
+            # Hand the finished term up the frames, until one needs another term
+            while True:
+                frame = frames[-1]
+
+                if frame[0] == UNARY:
+                    frames.pop()
+                    node = UnaryOp(frame[1], node)
+                    continue
+
+                frame[2].append(node)
+
+                token = tokenizer.currToken
+                if tokenizer.currType == 'SYMBOL' and token not in EXPRESSION_END:
+                    operator = OPERATORS.get(token)
+                    if operator is None:
+                        raise RuntimeError(f'Invalid expression operator: {token}')
+                    self.advance()
+                    frame[3].append(operator)
+                    break
+
+                # End of the expression -- hand it to what it is closed by
+                frames.pop()
+                _, closer, terms, operators = frame
+                node = terms[0] if len(terms) == 1 else Expression(terms, operators)
+                if closer is None:
+                    return node
+
+                if closer is PARENTHESES:
+                    self.expectSymbol(')', 'parseExpression')
+                    self.advance()
+                elif type(closer) is ArrayEntry:
+                    self.expectSymbol(']', 'parseExpression')
+                    self.advance()
+                    closer.index = node
+                    node = closer
+                else:
+                    closer.args.append(node)
+                    if token == ',' and tokenizer.currType == 'SYMBOL':
+                        self.advance()
+                        frames.append([EXPRESSION, closer, [], []])
+                        break
+                    self.expectSymbol(')', 'parseExpression')
+                    self.advance()
+                    node = closer
+
+
+    """
+    identifierTerm: Parses a term beginning with an identifier -- variable, array entry or subroutine call
+    """
+    def identifierTerm(self, frames: list):
+        tokenizer = self.tokenizer
+        name = tokenizer.currToken
+        self.advance()
+        if tokenizer.currType != 'SYMBOL':
+            return Variable(name)
+        token = tokenizer.currToken
+
+        # Array entry -- varName[expression]
+        if token == '[':
+            self.advance()
+            frames.append([EXPRESSION, ArrayEntry(name, None), [], []])
+            return NESTED
+
+        # Method of the current class -- subroutineName(expressionList)
+        if token == '(':
+            self.advance()
+            return self.beginArguments(SubroutineCall(None, name, []), frames)
+
+        # Method or function of another class -- (className | varName).subroutineName(expressionList)
+        if token == '.':
+            self.advance()
+            subroutineName = self.identifier('parseExpression')
+            self.advance()
+            self.expectSymbol('(', 'parseExpression')
+            self.advance()
+            return self.beginArguments(SubroutineCall(name, subroutineName, []), frames)
+
+        return Variable(name)
+
+
+    """
+    beginArguments: Starts the argument list of a call, the current token being its first token
+    """
+    def beginArguments(self, call: SubroutineCall, frames: list):
+        if self.tokenizer.currType == 'SYMBOL' and self.tokenizer.currToken == ')':
+            self.advance()
+            return call
+        frames.append([EXPRESSION, call, [], []])
+        return NESTED
+
+
+    """
+    integerTerm: Parses an integer constant
+    """
+    def integerTerm(self, frames: list):
+        node = IntegerConstant(int(self.tokenizer.currToken))
+        self.advance()
+        return node
+
+
+    """
+    stringTerm: Parses a string constant
+    """
+    def stringTerm(self, frames: list):
+        node = StringConstant(self.tokenizer.currToken)
+        self.advance()
+        return node
+
+
+    """
+    symbolTerm: Starts a term beginning with a symbol -- (expression) or unary operator term
+    """
+    def symbolTerm(self, frames: list):
+        token = self.tokenizer.currToken
+        if token == '(':
+            frames.append([EXPRESSION, PARENTHESES, [], []])
+        elif token in UNARY_OPERATORS:
+            frames.append((UNARY, UNARY_OPERATORS[token]))
+        else:
+            raise RuntimeError(f'Term expected: {token}')
+        self.advance()
+        return NESTED
+
+
+    """
+    keywordTerm: Parses a keyword constant -- true, false, null or this
+    """
+    def keywordTerm(self, frames: list):
+        token = self.tokenizer.currToken
+        if token not in KEYWORD_CONSTANTS:
+            raise RuntimeError(f'Term expected: {token}')
+        self.advance()
+        return KeywordConstant(token)
@@ -0,0 +1,206 @@
+"""
+PeepholeOptimizer class
+    - Optimization pass run by VMWriter.close over the generated VM code, before it is written
+    - Slides a window over each function's instructions and rewrites the ones matching the
+      pattern table, then removes unreachable code and unreferenced labels, repeating until
+      nothing changes
+    - Every rewrite preserves the VM semantics exactly (conditions are only inverted after
+      eq/lt/gt, which always produce 0 or -1)
+    - Rewrites make the code smaller, and all but invertBranch also make it faster. invertBranch
+      trades speed for size: it saves a goto and a label, but both branches then run an extra
+      not, so a run of the code may execute more instructions than before (one more VM
+      instruction and 3 more Hack instructions where the original if-goto jumped, one more
+      Hack instruction where it fell through)
+    - Keeps a running count of the instructions it removed
+
+    Pass interface (shared by all VMWriter passes):
+        run(vmCode: list) -> list of optimized instructions
+"""
+
+
+"""
+Patterns: each takes a window of consecutive instructions and returns its replacement,
+or None if the window does not match
+"""
+
+# push x; pop x
+def removePushPop(window):
+    push, pop = window
+    if push.startswith('push ') and pop.startswith('pop ') and push[5:] == pop[4:]:
+        return []
+    return None
+
+
+# not; not  /  neg; neg
+def removeDoubleUnary(window):
+    first, second = window
+    if first == second and first in ('not', 'neg'):
+        return []
+    return None
+
+
+# push constant 0; add  /  push constant 0; sub  /  push constant 0; or
+def removeZeroOperand(window):
+    push, operator = window
+    if push == 'push constant 0' and operator in ('add', 'sub', 'or'):
+        return []
+    return None
+
+
+# push constant 0; neg
+def removeNegatedZero(window):
+    if window[0] == 'push constant 0' and window[1] == 'neg':
+        return ['push constant 0']
+    return None
+
+
+# goto L; label L
+def removeJumpToNext(window):
+    goto, label = window
+    if goto.startswith('goto ') and label == 'label ' + goto[5:]:
+        return [label]
+    return None
+
+
+# push constant c; if-goto L  -- branch on a constant condition
+def foldConstantBranch(window):
+    push, ifGoto = window
+    if push.startswith('push constant ') and ifGoto.startswith('if-goto '):
+        if push == 'push constant 0':
+            return []
+        return ['goto ' + ifGoto[8:]]
+    return None
+
+
+# push constant c; not  /  push constant c; neg -- followed by if-goto L or not
+def foldConstantUnary(window):
+    push, unary, consumer = window
+    if not push.startswith('push constant ') or unary not in ('not', 'neg'):
+        return None
+
+    value = int(push[14:])
+    value = ~value if unary == 'not' else -value
+
+    if consumer.startswith('if-goto '):
+        return ['goto ' + consumer[8:]] if value else []
+    if consumer == 'not' and 0 <= ~value <= 32767:
+        return [f'push constant {~value}']
+    return None
+
+
+# (eq | lt | gt); if-goto L1; goto L2; label L1 -- smaller, not faster (see above)
+def invertBranch(window):
+    comparison, ifGoto, goto, label = window
+    if (comparison in ('eq', 'lt', 'gt') and ifGoto.startswith('if-goto ') and goto.startswith('goto ')
+            and label == 'label ' + ifGoto[8:]):
+        return [comparison, 'not', 'if-goto ' + goto[5:], label]
+    return None
+
+
+PATTERNS = [
+    (2, removePushPop),
+    (2, removeDoubleUnary),
+    (2, removeZeroOperand),
+    (2, removeNegatedZero),
+    (2, removeJumpToNext),
+    (2, foldConstantBranch),
+    (3, foldConstantUnary),
+    (4, invertBranch),
+]
+
+
+class PeepholeOptimizer:
+    """
+    Constructor: Creates an optimizer using the given pattern table (default: PATTERNS)
+        - patterns: list of (window size, pattern function)
+    """
+    def __init__(self, patterns: list = None):
+        self.patterns = PATTERNS if patterns is None else patterns
+        self.windowSize = max(size for size, _ in self.patterns)
+        self.removed = 0
+
+
+    """
+    run: Optimizes the given VM code function by function and returns the new instruction list
+    """
+    def run(self, vmCode: list) -> list:
+        optimized = []
+        start = 0
+        for idx in range(1, len(vmCode) + 1):
+            if idx == len(vmCode) or vmCode[idx].startswith('function '):
+                optimized.extend(self.optimizeFunction(vmCode[start:idx]))
+                start = idx
+
+        self.removed += len(vmCode) - len(optimized)
+        return optimized
+
+
+    """
+    optimizeFunction: Applies all rewrites to the code of one function until nothing changes
+    """
+    def optimizeFunction(self, code: list) -> list:
+        changed = True
+        while changed:
+            changed = self.applyPatterns(code)
+            changed = self.removeUnreachable(code) or changed
+            changed = self.removeUnusedLabels(code) or changed
+        return code
+
+
+    """
+    applyPatterns: Slides the window over the code, rewriting matches in place
+        - After a rewrite, steps back one window so patterns exposed by it also match
+    """
+    def applyPatterns(self, code: list) -> bool:
+        changed = False
+        idx = 0
+        while idx < len(code):
+            for size, pattern in self.patterns:
+                if idx + size > len(code):
+                    continue
+                replacement = pattern(code[idx:idx + size])
+                if replacement is not None and replacement != code[idx:idx + size]:
+                    code[idx:idx + size] = replacement
+                    changed = True
+                    idx = max(idx - self.windowSize, 0)
+                    break
+            else:
+                idx += 1
+        return changed
+
+
+    """
+    removeUnreachable: Removes instructions following a goto or return, up to the next label
+    """
+    def removeUnreachable(self, code: list) -> bool:
+        changed = False
+        idx = 0
+        while idx < len(code):
+            if code[idx].startswith('goto ') or code[idx] == 'return':
+                end = idx + 1
+                while end < len(code) and not code[end].startswith(('label ', 'function ')):
+                    end += 1
+                if end > idx + 1:
+                    del code[idx + 1:end]
+                    changed = True
+            idx += 1
+        return changed
+
+
+    """
+    removeUnusedLabels: Removes labels that no goto or if-goto of the function refers to
+    """
+    def removeUnusedLabels(self, code: list) -> bool:
+        targets = set()
+        for instruction in code:
+            if instruction.startswith(('goto ', 'if-goto ')):
+                targets.add(instruction.split(' ', 1)[1])
+
+        kept = [
+            instruction for instruction in code
+            if not instruction.startswith('label ') or instruction[6:] in targets
+        ]
+        if len(kept) == len(code):
+            return False
+        code[:] = kept
+        return True
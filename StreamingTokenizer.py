@@ -0,0 +1,105 @@
+"""
+StreamingTokenizer class
+    - Same interface as JackTokenizer, but lexes lazily instead of holding the whole file
+    - Reads from a memory-mapped file, or from any file object, one chunk at a time
+    - Keeps only the tokens requested through peek as lookahead, so memory stays flat
+      regardless of input size
+"""
+
+import mmap
+from collections import deque
+
+from JackTokenizer import JackTokenizer
+from TokenStream import iterTokens, TOKEN_TYPES, CHUNK_SIZE
+
+
+class StreamingTokenizer(JackTokenizer):
+    """
+    Constructor: (input file path or file object) => None
+        - With only a path, opens and memory-maps the file (empty files are read directly)
+        - With a file object (text or binary), reads from it; the caller keeps ownership of it
+    """
+    def __init__(self, filePath, file=None, chunkSize: int = CHUNK_SIZE):
+        self.ownedFiles = []
+
+        if file is None:
+            print('Opening file: ', filePath)
+            file = open(filePath, 'rb')
+            self.ownedFiles.append(file)
+            try:
+                file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.ownedFiles.append(file)
+            except ValueError:
+                # Empty files cannot be mapped
+                pass
+
+        self.tokens = iterTokens(file, chunkSize)
+        self.lookahead = deque()
+
+        self.prevToken = None
+        self.currToken = None
+        self.currType = None
+        self.currLine = 0
+
+
+    """
+    fromFile: Creates a tokenizer reading from an open file object or mmap
+    """
+    @classmethod
+    def fromFile(cls, file, chunkSize: int = CHUNK_SIZE) -> 'StreamingTokenizer':
+        return cls(None, file=file, chunkSize=chunkSize)
+
+
+    """
+    fill: Reads tokens into the lookahead until it holds at least k of them
+        - Returns False if the input ends first
+    """
+    def fill(self, k: int) -> bool:
+        lookahead = self.lookahead
+        while len(lookahead) < k:
+            token = next(self.tokens, None)
+            if token is None:
+                self.close()
+                return False
+            lookahead.append(token)
+        return True
+
+
+    """
+    hasMoreTokens: Returns a boolean for whether there are more tokens to parse
+    """
+    def hasMoreTokens(self):
+        return bool(self.lookahead) or self.fill(1)
+
+
+    """
+    advance: Gets the next token from the input and makes it the current token
+        - Only called if hasMoreTokens returns true
+    """
+    def advance(self):
+        if not self.lookahead:
+            self.fill(1)
+        kind, text, line = self.lookahead.popleft()
+        self.prevToken = self.currToken
+        self.currToken = text
+        self.currType = TOKEN_TYPES[kind]
+        self.currLine = line
+
+
+    """
+    peek: Returns (type, value) of the token k positions after the current one, or None
+    """
+    def peek(self, k: int = 1):
+        if not self.fill(k):
+            return None
+        kind, text, _ = self.lookahead[k - 1]
+        return TOKEN_TYPES[kind], text
+
+
+    """
+    close: Releases the mmap and file opened by the constructor
+        - Called automatically once the input is exhausted
+    """
+    def close(self) -> None:
+        while self.ownedFiles:
+            self.ownedFiles.pop().close()
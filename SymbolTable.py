@@ -12,15 +12,33 @@ SymbolTable class
         - constant
         - pointer
         - temp
+
+    Symbols are Symbol tuples (kind, segment, index, type), with the VM segment of the kind
+    worked out once at definition (fields live in 'this'), so resolve answers everything
+    about a name in one lookup. The subroutine scope is kept merged over the class scope,
+    so a lookup is a single dict access.
 """
 
+from collections import namedtuple
+
+Symbol = namedtuple('Symbol', ('kind', 'segment', 'index', 'type'))
+
+# VM segment of each kind of variable
+KIND_SEGMENTS = {
+    'static': 'static',
+    'field': 'this',
+    'argument': 'argument',
+    'local': 'local',
+}
+
 class SymbolTable:
     """
     Constructor: Creates a new symbol table
     """
     def __init__(self):
         self.classScope = {}
-        self.subroutineScope = None
+        # Class scope overlaid with the current subroutine's variables
+        self.scope = {}
 
         self.indices = {
             'static': 0,
@@ -34,7 +52,7 @@ class SymbolTable:
     startSubroutine: Starts a new subroutine scope (i.e. resets the subroutine's symbol table)
     """
     def startSubroutine(self):
-        self.subroutineScope = {}
+        self.scope = dict(self.classScope)
         self.indices['argument'] = 0
         self.indices['local'] = 0
 
@@ -49,18 +67,33 @@ class SymbolTable:
             kind (static, field, argument, or local)
     """
     def define(self, name: str, type: str, kind: str) -> None:
+        symbol = Symbol(kind, KIND_SEGMENTS[kind], self.VarCount(kind), type)
         if kind in ('static', 'field'):
             if name in self.classScope:
                 raise RuntimeError(f'Class variable already defined - {name}')
-            self.classScope[name] = {'type': type, 'kind': kind, 'index': self.VarCount(kind)}
-        elif kind in ('argument', 'local'):
-            if name in self.subroutineScope:
-                raise RuntimeError(f'Subroutine variable already defined - {name}')
-            self.subroutineScope[name] = {'type': type, 'kind': kind, 'index': self.VarCount(kind)}
+            self.classScope[name] = symbol
+        elif name in self.scope and self.scope[name].kind in ('argument', 'local'):
+            raise RuntimeError(f'Subroutine variable already defined - {name}')
+        self.scope[name] = symbol
 
         self.indices[kind] += 1
 
 
+    """
+    resolve: Returns the Symbol (kind, segment, index, type) of the named identifier in the current scope
+        - Subroutine variables shadow class variables
+        - If the identifier is unknown in the current scope, returns None
+
+        Parameters:
+            name (String)
+
+        Returns:
+            Symbol or None
+    """
+    def resolve(self, name: str) -> Symbol:
+        return self.scope.get(name)
+
+
     """
     VarCount: Returns the number of variables of the given kind already defined in the current scope
 
@@ -85,12 +118,8 @@ class SymbolTable:
             (static, field, argument, local, none)
     """
     def KindOf(self, name: str) -> str:
-        if self.subroutineScope and name in self.subroutineScope:
-            return self.subroutineScope[name]['kind']
-        elif name in self.classScope:
-            return self.classScope[name]['kind']
-        else:
-            return 'none'
+        symbol = self.scope.get(name)
+        return symbol.kind if symbol else 'none'
 
 
     """
@@ -103,12 +132,9 @@ class SymbolTable:
             String
     """
     def TypeOf(self, name: str) -> str:
-        if self.subroutineScope and name in self.subroutineScope:
-            return self.subroutineScope[name]['type']
-        elif name in self.classScope:
-            return self.classScope[name]['type']
-        else:
+        if name not in self.scope:
             raise Exception('Identifier not declared')
+        return self.scope[name].type
 
     """
     IndexOf: Returns the index assigned to the named identifier
@@ -120,12 +146,9 @@ class SymbolTable:
             int
     """
     def IndexOf(self, name: str) -> int:
-        if self.subroutineScope and name in self.subroutineScope:
-            return self.subroutineScope[name]['index']
-        elif name in self.classScope:
-            return self.classScope[name]['index']
-        else:
+        if name not in self.scope:
             raise Exception('Identifier not declared')
+        return self.scope[name].index
 
     def isDefined(self, name: str) -> bool:
-        return name in self.subroutineScope or name in self.classScope
\ No newline at end of file
+        return name in self.scope
@@ -0,0 +1,295 @@
+"""
+TokenStream class
+    - Lexes a whole .jack source once into a compact struct-of-arrays token list
+    - Each column is stored separately:
+        - kinds: array of token type codes (index into TOKEN_TYPES)
+        - starts / ends: source offsets of each token
+        - lines: 1-based line number of each token
+        - texts: interned token text (string constants without their quotes)
+    - Keeps a cursor with peek, mark/reset, and slicing so a parser can look ahead
+      without re-lexing, and streams can be cached or pickled between processes
+    - iterTokens lexes lazily from a file object or mmap in chunks, for inputs too
+      large to hold in memory
+"""
+
+import codecs
+import re
+import sys
+from array import array
+
+KEYWORDS = frozenset([
+    'class',
+    'constructor',
+    'function',
+    'method',
+    'field',
+    'static',
+    'var',
+    'int',
+    'char',
+    'boolean',
+    'void',
+    'true',
+    'false',
+    'null',
+    'this',
+    'let',
+    'do',
+    'if',
+    'else',
+    'while',
+    'return'
+])
+
+SYMBOLS = frozenset('(){}[];.,+-*/&|<>=~')
+
+INT_CONST_MAX = 32767
+
+# Number of characters (or bytes) read per chunk by iterTokens
+CHUNK_SIZE = 1 << 16
+
+# Token type codes stored in the kinds column
+KEYWORD = 0
+SYMBOL = 1
+IDENTIFIER = 2
+INT_CONST = 3
+STRING_CONST = 4
+
+TOKEN_TYPES = ('KEYWORD', 'SYMBOL', 'IDENTIFIER', 'INT_CONST', 'STRING_CONST')
+
+# Every match captures the white space and comments before a token, then exactly one token.
+# Only one of the token groups is non-empty per match:
+#   1. leading white space and comments (used to track offsets and line numbers)
+#   2. symbol -- a '/' that opens a comment is never a symbol
+#   3. keyword or identifier -- letters, digits, and underscores, not starting with a digit
+#   4. integer constant
+#   5. string constant -- sequence of unicode characters not including double quote or newline
+#   6. anything else (unknown character, unterminated comment or string)
+# The trailing \Z alternative lets trailing white space and comments match without a token.
+TOKEN_PATTERN = re.compile(r'''
+    ((?:\s+|//[^\n]*|/\*.*?\*/)*)
+    (?:
+        ([(){}\[\];.,+\-*&|<>=~]|/(?!\*))
+      | ([A-Za-z_][A-Za-z0-9_]*)
+      | ([0-9]+)
+      | ("[^"\n]*")
+      | (/\*|.)
+      | \Z
+    )
+''', re.DOTALL | re.VERBOSE)
+
+
+class TokenStream:
+    __slots__ = ('kinds', 'starts', 'ends', 'lines', 'texts', 'pos')
+
+    """
+    Constructor: Lexes the given source into a token stream
+        - An empty source gives an empty stream
+    """
+    def __init__(self, source: str = ''):
+        self.kinds = array('B')
+        self.starts = array('L')
+        self.ends = array('L')
+        self.lines = array('L')
+        self.texts = []
+        self.pos = 0
+
+        if source:
+            self.lex(source)
+
+
+    """
+    fromFile: Reads and lexes the file at the given path
+    """
+    @classmethod
+    def fromFile(cls, filePath: str) -> 'TokenStream':
+        with open(filePath, 'r') as file:
+            return cls(file.read())
+
+
+    """
+    lex: Appends the tokens of the given source to the stream
+        - Raises RuntimeError on integers out of range and on unexpected input
+    """
+    def lex(self, source: str) -> None:
+        kinds = self.kinds.append
+        starts = self.starts.append
+        ends = self.ends.append
+        lines = self.lines.append
+        texts = self.texts.append
+        intern = sys.intern
+
+        pos = 0
+        line = 1
+
+        for prefix, symbol, word, intConst, stringConst, other in TOKEN_PATTERN.findall(source):
+            pos += len(prefix)
+            line += prefix.count('\n')
+
+            if symbol:
+                kind = SYMBOL
+                text = symbol
+                end = pos + 1
+            elif word:
+                kind = KEYWORD if word in KEYWORDS else IDENTIFIER
+                text = intern(word)
+                end = pos + len(word)
+            elif intConst:
+                if int(intConst) > INT_CONST_MAX:
+                    raise RuntimeError(f'Error: Integer value is greater than 32767 on line {line}')
+                kind = INT_CONST
+                text = intConst
+                end = pos + len(intConst)
+            elif stringConst:
+                kind = STRING_CONST
+                text = stringConst[1:-1]
+                end = pos + len(stringConst)
+            elif other:
+                raise RuntimeError(f'Unexpected input on line {line}: {other}')
+            else:
+                break
+
+            kinds(kind)
+            starts(pos)
+            ends(end)
+            lines(line)
+            texts(text)
+            pos = end
+
+
+    """
+    __len__: Returns the total number of tokens in the stream
+    """
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+    """
+    __getitem__: Returns (type, text) for an index, or a new stream for a slice
+        - Sliced streams copy the columns and start with their cursor at 0
+    """
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            stream = TokenStream()
+            stream.kinds = self.kinds[key]
+            stream.starts = self.starts[key]
+            stream.ends = self.ends[key]
+            stream.lines = self.lines[key]
+            stream.texts = self.texts[key]
+            return stream
+        return TOKEN_TYPES[self.kinds[key]], self.texts[key]
+
+
+    """
+    hasMore: Returns whether the cursor has tokens left to read
+    """
+    def hasMore(self) -> bool:
+        return self.pos < len(self.kinds)
+
+
+    """
+    advance: Moves the cursor forward by one and returns the index of the token read
+    """
+    def advance(self) -> int:
+        idx = self.pos
+        self.pos = idx + 1
+        return idx
+
+
+    """
+    peek: Returns (type, text) of the k-th unread token without moving the cursor
+        - peek(0) is the token the next advance will read
+        - Returns None past the end of the stream
+    """
+    def peek(self, k: int = 0):
+        idx = self.pos + k
+        if 0 <= idx < len(self.kinds):
+            return TOKEN_TYPES[self.kinds[idx]], self.texts[idx]
+        return None
+
+
+    """
+    mark: Returns the current cursor position, to be restored with reset
+    """
+    def mark(self) -> int:
+        return self.pos
+
+
+    """
+    reset: Moves the cursor back to a position returned by mark
+    """
+    def reset(self, mark: int) -> None:
+        self.pos = mark
+
+
+"""
+iterTokens: Lazily yields (kind, text, line) for every token read from a file object or mmap
+    - Reads chunkSize characters (text files) or bytes (binary files, mmap) at a time
+    - A token, comment or string constant that may continue past the end of a chunk is
+      carried over and rescanned with the next chunk, so only one chunk and one partial
+      token are held in memory at a time
+    - If a chunk makes no progress (e.g. a block comment longer than a chunk) the next
+      read is doubled, so long comments are not rescanned once per chunk
+    - Raises RuntimeError on integers out of range and on unexpected input
+"""
+def iterTokens(file, chunkSize: int = CHUNK_SIZE):
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    intern = sys.intern
+
+    buffer = ''
+    line = 1
+    readSize = chunkSize
+    eof = False
+
+    while not eof:
+        chunk = file.read(readSize)
+        eof = not chunk
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk, final=eof)
+        buffer += chunk
+        size = len(buffer)
+
+        pos = 0
+        for prefix, symbol, word, intConst, stringConst, other in TOKEN_PATTERN.findall(buffer):
+            start = pos + len(prefix)
+            tokenLine = line + prefix.count('\n')
+
+            if symbol:
+                kind = SYMBOL
+                text = symbol
+                end = start + 1
+            elif word:
+                kind = KEYWORD if word in KEYWORDS else IDENTIFIER
+                text = intern(word)
+                end = start + len(word)
+            elif intConst:
+                if int(intConst) > INT_CONST_MAX:
+                    raise RuntimeError(f'Error: Integer value is greater than 32767 on line {tokenLine}')
+                kind = INT_CONST
+                text = intConst
+                end = start + len(intConst)
+            elif stringConst:
+                kind = STRING_CONST
+                text = stringConst[1:-1]
+                end = start + len(stringConst)
+            elif other:
+                # Comment or string constant closed in a later chunk
+                if not eof and (other == '/*' or (other == '"' and buffer.find('\n', start) == -1)):
+                    break
+                raise RuntimeError(f'Unexpected input on line {tokenLine}: {other}')
+            else:
+                # Only white space and comments left, possibly an unfinished // comment
+                if eof:
+                    pos = size
+                break
+
+            # Token touching the end of the chunk may continue in the next one
+            if end == size and not eof:
+                break
+
+            line = tokenLine
+            yield kind, text, line
+            pos = end
+
+        readSize = chunkSize if pos else readSize * 2
+        buffer = buffer[pos:]
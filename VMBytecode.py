@@ -0,0 +1,254 @@
+import argparse
+import sys
+
+"""
+VMBytecode class
+    - Compact binary encoding of VM code (.vmb), an alternative to the text .vm output
+    - Converts losslessly to and from the text form (one instruction per line, as VMWriter writes it)
+    - Tools can load the instructions as (command, argument, index) tuples without parsing text
+
+    File layout:
+        - magic b'JVMB' and a version byte
+        - string table: varint count, then each string as varint byte length + UTF-8 bytes
+          (function names and labels, each stored once)
+        - varint instruction count, then the instructions, each an opcode byte followed by:
+            - push / pop: segment byte, varint index
+            - label / goto / if-goto: varint string index
+            - function / call: varint string index, varint count (locals / arguments)
+            - arithmetic and return: nothing
+    - Varints are unsigned LEB128: 7 bits per byte, low bits first, high bit set on all but the last byte
+"""
+
+MAGIC = b'JVMB'
+VERSION = 1
+
+COMMANDS = (
+    'push', 'pop',
+    'add', 'sub', 'neg', 'eq', 'gt', 'lt', 'and', 'or', 'not',
+    'label', 'goto', 'if-goto',
+    'function', 'call', 'return',
+)
+OPCODES = {command: opcode for opcode, command in enumerate(COMMANDS)}
+
+SEGMENTS = ('argument', 'local', 'static', 'constant', 'this', 'that', 'pointer', 'temp')
+SEGMENT_CODES = {segment: code for code, segment in enumerate(SEGMENTS)}
+
+# Operand layout of each opcode
+MEMORY_ACCESS = {OPCODES['push'], OPCODES['pop']}
+BRANCHING = {OPCODES['label'], OPCODES['goto'], OPCODES['if-goto']}
+FUNCTION_COMMANDS = {OPCODES['function'], OPCODES['call']}
+
+
+"""
+writeVarint: Appends a non-negative integer to out as an unsigned LEB128 varint
+"""
+def writeVarint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise RuntimeError(f'Negative value cannot be encoded: {value}')
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+"""
+readVarint: Returns the varint at offset in data and the offset following it
+"""
+def readVarint(data, offset: int):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+"""
+formatInstruction: Returns the text form of an instruction given as a (command, argument, index) tuple
+"""
+def formatInstruction(command: str, argument: str, index: int) -> str:
+    if argument is None:
+        return command
+    if index is None:
+        return f'{command} {argument}'
+    return f'{command} {argument} {index}'
+
+
+class VMBytecode:
+    """
+    encode: Returns the binary encoding of a list of VM instructions
+    """
+    @staticmethod
+    def encode(vmCode: list) -> bytes:
+        strings = []
+        stringIdxs = {}
+        body = bytearray()
+
+        for instruction in vmCode:
+            parts = instruction.split()
+            opcode = OPCODES.get(parts[0]) if parts else None
+            if opcode is None:
+                raise RuntimeError(f'Invalid VM instruction: {instruction}')
+            body.append(opcode)
+
+            if opcode in MEMORY_ACCESS:
+                if len(parts) != 3 or parts[1] not in SEGMENT_CODES:
+                    raise RuntimeError(f'Invalid VM instruction: {instruction}')
+                body.append(SEGMENT_CODES[parts[1]])
+                writeVarint(body, int(parts[2]))
+            elif opcode in BRANCHING or opcode in FUNCTION_COMMANDS:
+                if len(parts) != (2 if opcode in BRANCHING else 3):
+                    raise RuntimeError(f'Invalid VM instruction: {instruction}')
+                if parts[1] not in stringIdxs:
+                    stringIdxs[parts[1]] = len(strings)
+                    strings.append(parts[1])
+                writeVarint(body, stringIdxs[parts[1]])
+                if opcode in FUNCTION_COMMANDS:
+                    writeVarint(body, int(parts[2]))
+            elif len(parts) != 1:
+                raise RuntimeError(f'Invalid VM instruction: {instruction}')
+
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        writeVarint(out, len(strings))
+        for string in strings:
+            encoded = string.encode('utf-8')
+            writeVarint(out, len(encoded))
+            out += encoded
+        writeVarint(out, len(vmCode))
+        out += body
+        return bytes(out)
+
+
+    """
+    instructions: Returns the instructions of binary VM code as (command, argument, index) tuples
+        - argument is the segment, label or function name (None for arithmetic and return)
+        - index is the segment index, or the number of locals/arguments (None if there is none)
+    """
+    @staticmethod
+    def instructions(data: bytes) -> list:
+        if len(data) <= len(MAGIC) or data[:len(MAGIC)] != MAGIC:
+            raise RuntimeError('Not a VM bytecode file')
+        if data[len(MAGIC)] != VERSION:
+            raise RuntimeError(f'Unsupported VM bytecode version: {data[len(MAGIC)]}')
+
+        offset = len(MAGIC) + 1
+        strings = []
+        instructions = []
+        try:
+            count, offset = readVarint(data, offset)
+            for _ in range(count):
+                length, offset = readVarint(data, offset)
+                if offset + length > len(data):
+                    raise RuntimeError('Truncated or corrupt VM bytecode')
+                strings.append(bytes(data[offset:offset + length]).decode('utf-8'))
+                offset += length
+
+            count, offset = readVarint(data, offset)
+            for _ in range(count):
+                opcode = data[offset]
+                offset += 1
+                argument = index = None
+                if opcode in MEMORY_ACCESS:
+                    argument = SEGMENTS[data[offset]]
+                    index, offset = readVarint(data, offset + 1)
+                elif opcode in BRANCHING:
+                    stringIdx, offset = readVarint(data, offset)
+                    argument = strings[stringIdx]
+                elif opcode in FUNCTION_COMMANDS:
+                    stringIdx, offset = readVarint(data, offset)
+                    argument = strings[stringIdx]
+                    index, offset = readVarint(data, offset)
+                instructions.append((COMMANDS[opcode], argument, index))
+        except (IndexError, UnicodeDecodeError):
+            raise RuntimeError('Truncated or corrupt VM bytecode')
+        return instructions
+
+
+    """
+    decode: Returns the text VM instructions of binary VM code
+    """
+    @staticmethod
+    def decode(data: bytes) -> list:
+        return [formatInstruction(*instruction) for instruction in VMBytecode.instructions(data)]
+
+
+    """
+    read: Returns the text VM instructions of a .vmb file
+    """
+    @staticmethod
+    def read(filePath: str) -> list:
+        with open(filePath, 'rb') as file:
+            return VMBytecode.decode(file.read())
+
+
+    """
+    readInstructions: Returns the instructions of a .vmb file as (command, argument, index) tuples
+    """
+    @staticmethod
+    def readInstructions(filePath: str) -> list:
+        with open(filePath, 'rb') as file:
+            return VMBytecode.instructions(file.read())
+
+
+    """
+    readText: Returns the instructions of a text .vm file, without comments and blank lines
+        - Accepts hand-written and distributed .vm files (e.g. the OS), not only compiler output
+    """
+    @staticmethod
+    def readText(filePath: str) -> list:
+        vmCode = []
+        with open(filePath, 'r') as file:
+            for line in file:
+                instruction = line.split('//')[0].strip()
+                if instruction:
+                    vmCode.append(instruction)
+        return vmCode
+
+
+    """
+    load: Returns the instructions of a .vmb or text .vm file, chosen by extension
+    """
+    @staticmethod
+    def load(filePath: str) -> list:
+        if filePath.endswith('.vmb'):
+            return VMBytecode.read(filePath)
+        return VMBytecode.readText(filePath)
+
+
+    """
+    write: Writes a list of VM instructions to a .vmb file, returning the number of bytes written
+    """
+    @staticmethod
+    def write(filePath: str, vmCode: list) -> int:
+        data = VMBytecode.encode(vmCode)
+        with open(filePath, 'wb') as file:
+            file.write(data)
+        return len(data)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Convert VM code between the text (.vm) and binary (.vmb) forms')
+    parser.add_argument('inFile', help='.vm or .vmb file to convert')
+    parser.add_argument('outFile', help='output file, in the other form')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.inFile.endswith('.vmb'):
+        vmCode = VMBytecode.read(args.inFile)
+        with open(args.outFile, 'w') as file:
+            file.write('\n'.join(vmCode))
+    else:
+        # Comments and blank lines are dropped, as from any .vm file
+        vmCode = VMBytecode.readText(args.inFile)
+        VMBytecode.write(args.outFile, vmCode)
+    print(f'Converted {len(vmCode)} instructions: {args.inFile} -> {args.outFile}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
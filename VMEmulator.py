@@ -0,0 +1,372 @@
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from HackCodeWriter import HackCodeWriter
+from JackOS import JackOS
+from VMBytecode import VMBytecode, formatInstruction
+
+"""
+VMEmulator class
+    - Reference implementation of the Jack VM: loads the .vm (or .vmb) files of a program and
+      runs them, to measure the code the compiler generates without a Hack CPU
+    - Memory follows the standard mapping: SP, LCL, ARG, THIS, THAT in RAM[0-4], temp in
+      RAM[5-12], statics from RAM[16] (allotted file by file), the stack from 256 and the heap
+      from 2048
+    - OS functions the program does not define run as Python stubs (see JackOS)
+    - Execution starts at Sys.init if the program defines it, otherwise at Main.main, and ends
+      when the entry function returns or Sys.halt is called
+    - Counts:
+        - instructions: VM instructions executed (labels are not instructions)
+        - cycles: Hack instructions the same run would execute once translated by
+          HackCodeWriter, not counting the bodies of the OS stubs
+        - calls: number of calls to each function, OS functions included
+        - maxStackDepth: largest number of words on the stack (frames included)
+        - maxCallDepth: deepest nesting of calls
+"""
+
+RAM_SIZE = 32768
+STATIC_BASE = 16
+STATIC_END = 256
+STACK_BASE = 256
+STACK_END = 2048
+
+# Registers holding the base address of the memory segments
+SEGMENT_REGISTERS = {'local': 1, 'argument': 2, 'this': 3, 'that': 4}
+
+# Fixed addresses of the pointer and temp segments
+POINTER_BASE = 3
+TEMP_BASE = 5
+
+# Opcodes of the decoded program
+(PUSH_CONSTANT, PUSH_SEGMENT, PUSH_ADDRESS, POP_SEGMENT, POP_ADDRESS,
+ ADD, SUB, NEG, EQ, GT, LT, AND, OR, NOT,
+ GOTO, IF_GOTO, FUNCTION, CALL, CALL_OS, RETURN) = range(20)
+
+ARITHMETIC = {
+    'add': ADD, 'sub': SUB, 'neg': NEG, 'eq': EQ, 'gt': GT, 'lt': LT,
+    'and': AND, 'or': OR, 'not': NOT,
+}
+
+
+class VMEmulator:
+    """
+    Constructor: Decodes a program for execution
+        - program: file path -> vmCode list, as the whole-program passes take it, or list of
+          (command, argument, index) tuples, as VMBytecode.instructions returns; each file has
+          its own static variables
+    """
+    def __init__(self, program: dict):
+        self.ram = [0] * RAM_SIZE
+        self.jackOS = JackOS(self.ram)
+        self.code = []
+        self.costs = []
+        self.functions = {}
+        self.decode(program)
+
+        self.instructions = 0
+        self.cycles = 0
+        self.calls = Counter()
+        self.maxStackDepth = 0
+        self.maxCallDepth = 0
+
+
+    """
+    fromPath: Returns an emulator for a .vm/.vmb file, or a directory of them
+        - In a directory, a .vmb file is only loaded if there is no .vm file of the same name
+        - .vmb files are loaded as decoded instructions, without a text round-trip
+    """
+    @staticmethod
+    def fromPath(dirOrFileName: str):
+        if os.path.isdir(dirOrFileName):
+            fileNames = sorted(os.listdir(dirOrFileName))
+            filePaths = [
+                os.path.join(dirOrFileName, fileName) for fileName in fileNames
+                if fileName.endswith('.vm') or (fileName.endswith('.vmb') and fileName[:-1] not in fileNames)
+            ]
+        else:
+            filePaths = [dirOrFileName]
+        if not filePaths:
+            raise RuntimeError(f'No VM files in {dirOrFileName}')
+        return VMEmulator({
+            filePath: VMBytecode.readInstructions(filePath) if filePath.endswith('.vmb') else VMBytecode.readText(filePath)
+            for filePath in filePaths
+        })
+
+
+    """
+    decode: Translates the program into (opcode, operands...) tuples with resolved jump targets
+        - Labels are dropped; jumps and calls hold the index of their target instruction
+        - costs holds the Hack instruction count of each decoded instruction
+    """
+    def decode(self, program: dict) -> None:
+        # First pass: the position of every function and label, instructions as (command, argument, index)
+        labels = {}
+        parsed = []
+        for filePath, vmCode in program.items():
+            currFunction = None
+            for instruction in vmCode:
+                if type(instruction) is str:
+                    parts = instruction.split()
+                    instruction = (
+                        parts[0],
+                        parts[1] if len(parts) > 1 else None,
+                        int(parts[2]) if len(parts) > 2 else None,
+                    )
+                command, argument, _ = instruction
+                if command == 'label':
+                    labels[(currFunction, argument)] = len(parsed)
+                    continue
+                if command == 'function':
+                    currFunction = argument
+                    if currFunction in self.functions:
+                        raise RuntimeError(f'Function defined twice: {currFunction}')
+                    self.functions[currFunction] = len(parsed)
+                parsed.append((filePath, currFunction, instruction))
+
+        staticBases = {}
+        nextStatic = STATIC_BASE
+        stubCosts = HackCodeWriter.stubCosts()
+        costs = {}
+        for filePath, currFunction, instruction in parsed:
+            command, argument, index = instruction
+            if command in ('push', 'pop'):
+                segment = argument
+                if segment == 'constant':
+                    if command == 'pop':
+                        raise RuntimeError('Cannot pop to the constant segment')
+                    decoded = (PUSH_CONSTANT, index)
+                elif segment in SEGMENT_REGISTERS:
+                    decoded = (PUSH_SEGMENT if command == 'push' else POP_SEGMENT, SEGMENT_REGISTERS[segment], index)
+                else:
+                    if segment == 'static':
+                        if filePath not in staticBases:
+                            staticBases[filePath] = nextStatic
+                        address = staticBases[filePath] + index
+                        nextStatic = max(nextStatic, address + 1)
+                        if nextStatic > STATIC_END:
+                            raise RuntimeError('Too many static variables')
+                    elif segment == 'temp' and index < 8:
+                        address = TEMP_BASE + index
+                    elif segment == 'pointer' and index < 2:
+                        address = POINTER_BASE + index
+                    else:
+                        raise RuntimeError(f'Invalid VM instruction: {formatInstruction(*instruction)}')
+                    decoded = (PUSH_ADDRESS if command == 'push' else POP_ADDRESS, address)
+            elif command in ARITHMETIC:
+                decoded = (ARITHMETIC[command],)
+            elif command in ('goto', 'if-goto'):
+                target = labels.get((currFunction, argument))
+                if target is None:
+                    raise RuntimeError(f'Undefined label in {currFunction}: {argument}')
+                decoded = (GOTO if command == 'goto' else IF_GOTO, target)
+            elif command == 'function':
+                decoded = (FUNCTION, index)
+            elif command == 'call':
+                name, nArgs = argument, index
+                if name in self.functions:
+                    decoded = (CALL, self.functions[name], nArgs, name)
+                elif name in self.jackOS.functions:
+                    decoded = (CALL_OS, self.jackOS.functions[name], nArgs, name)
+                else:
+                    raise RuntimeError(f'Call to undefined function: {name}')
+            elif command == 'return':
+                decoded = (RETURN,)
+            else:
+                raise RuntimeError(f'Invalid VM instruction: {formatInstruction(*instruction)}')
+
+            if instruction not in costs:
+                costs[instruction] = HackCodeWriter.cost(formatInstruction(*instruction), stubCosts)
+            self.code.append(decoded)
+            self.costs.append(costs[instruction])
+
+
+    """
+    run: Runs the program from its entry point and returns the report
+        - maxInstructions: stops with an error after this many instructions (None: no limit)
+    """
+    def run(self, maxInstructions: int = None) -> dict:
+        for entryPoint in ('Sys.init', 'Main.main'):
+            if entryPoint in self.functions:
+                break
+        else:
+            raise RuntimeError('Program needs an entry point: Sys.init or Main.main')
+
+        ram = self.ram
+        code = self.code
+        costs = self.costs
+        calls = self.calls
+        jackOS = self.jackOS
+        limit = maxInstructions if maxInstructions is not None else float('inf')
+
+        # Call the entry point with no arguments and a return address of -1
+        calls[entryPoint] += 1
+        ram[2] = STACK_BASE
+        ram[STACK_BASE:STACK_BASE + 5] = [-1, 0, 0, 0, 0]
+        sp = STACK_BASE + 5
+        ram[1] = sp
+        pc = self.functions[entryPoint]
+        callDepth = maxCallDepth = 1
+        maxSp = sp
+        instructions = 0
+        cycles = 0
+
+        try:
+            while pc >= 0 and not jackOS.halted:
+                if instructions >= limit:
+                    raise RuntimeError(f'Instruction limit reached: {maxInstructions}')
+                instruction = code[pc]
+                instructions += 1
+                cycles += costs[pc]
+                pc += 1
+                opcode = instruction[0]
+
+                if opcode == PUSH_CONSTANT:
+                    ram[sp] = instruction[1]
+                    sp += 1
+                    if sp > maxSp:
+                        maxSp = sp
+                elif opcode == PUSH_SEGMENT:
+                    address = ram[instruction[1]] + instruction[2]
+                    if not 0 <= address < RAM_SIZE:
+                        raise RuntimeError(f'Segment access out of memory: {address}')
+                    ram[sp] = ram[address]
+                    sp += 1
+                    if sp > maxSp:
+                        maxSp = sp
+                elif opcode == PUSH_ADDRESS:
+                    ram[sp] = ram[instruction[1]]
+                    sp += 1
+                    if sp > maxSp:
+                        maxSp = sp
+                elif opcode == POP_SEGMENT:
+                    address = ram[instruction[1]] + instruction[2]
+                    if not 0 <= address < RAM_SIZE:
+                        raise RuntimeError(f'Segment access out of memory: {address}')
+                    sp -= 1
+                    ram[address] = ram[sp]
+                elif opcode == POP_ADDRESS:
+                    sp -= 1
+                    ram[instruction[1]] = ram[sp]
+                elif opcode == IF_GOTO:
+                    sp -= 1
+                    if ram[sp]:
+                        pc = instruction[1]
+                elif opcode == GOTO:
+                    pc = instruction[1]
+                elif opcode <= NOT:
+                    if opcode == NEG:
+                        value = -ram[sp - 1]
+                        ram[sp - 1] = value if value <= 32767 else -32768
+                        continue
+                    if opcode == NOT:
+                        ram[sp - 1] = ~ram[sp - 1]
+                        continue
+                    sp -= 1
+                    left, right = ram[sp - 1], ram[sp]
+                    if opcode == ADD:
+                        value = left + right
+                    elif opcode == SUB:
+                        value = left - right
+                    elif opcode == EQ:
+                        value = -1 if left == right else 0
+                    elif opcode == GT:
+                        value = -1 if left > right else 0
+                    elif opcode == LT:
+                        value = -1 if left < right else 0
+                    elif opcode == AND:
+                        value = left & right
+                    else:
+                        value = left | right
+                    # Wrap to 16 bits
+                    if value > 32767:
+                        value -= 65536
+                    elif value < -32768:
+                        value += 65536
+                    ram[sp - 1] = value
+                elif opcode == FUNCTION:
+                    nLocals = instruction[1]
+                    if sp + nLocals >= STACK_END:
+                        raise RuntimeError('Stack overflow')
+                    ram[sp:sp + nLocals] = [0] * nLocals
+                    sp += nLocals
+                    if sp > maxSp:
+                        maxSp = sp
+                elif opcode == CALL:
+                    nArgs = instruction[2]
+                    calls[instruction[3]] += 1
+                    if sp + 5 >= STACK_END:
+                        raise RuntimeError('Stack overflow')
+                    ram[sp:sp + 5] = [pc, ram[1], ram[2], ram[3], ram[4]]
+                    ram[2] = sp - nArgs
+                    sp += 5
+                    ram[1] = sp
+                    pc = instruction[1]
+                    callDepth += 1
+                    if callDepth > maxCallDepth:
+                        maxCallDepth = callDepth
+                elif opcode == CALL_OS:
+                    nArgs = instruction[2]
+                    calls[instruction[3]] += 1
+                    sp -= nArgs
+                    ram[0] = sp
+                    try:
+                        value = instruction[1](*ram[sp:sp + nArgs])
+                    except TypeError:
+                        raise RuntimeError(f'{instruction[3]} called with {nArgs} arguments')
+                    ram[sp] = value or 0
+                    sp += 1
+                else:
+                    frame = ram[1]
+                    pc = ram[frame - 5]
+                    ram[ram[2]] = ram[sp - 1]
+                    sp = ram[2] + 1
+                    ram[4], ram[3], ram[2], ram[1] = ram[frame - 1], ram[frame - 2], ram[frame - 3], ram[frame - 4]
+                    callDepth -= 1
+        finally:
+            # Keep the counts of a run stopped by an error
+            ram[0] = sp
+            self.instructions += instructions
+            self.cycles += cycles
+            self.maxStackDepth = max(self.maxStackDepth, maxSp - STACK_BASE)
+            self.maxCallDepth = max(self.maxCallDepth, maxCallDepth)
+        return self.report()
+
+
+    """
+    report: Returns the counts of the run and the text the program printed
+    """
+    def report(self) -> dict:
+        return {
+            'instructions': self.instructions,
+            'cycles': self.cycles,
+            'maxStackDepth': self.maxStackDepth,
+            'maxCallDepth': self.maxCallDepth,
+            'calls': dict(self.calls.most_common()),
+            'output': self.jackOS.text(),
+        }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run compiled Jack VM code and report execution counts')
+    parser.add_argument('dirOrFileName', help='.vm or .vmb file, or directory of them')
+    parser.add_argument('--max-instructions', type=int, default=None,
+                        help='stop with an error after this many VM instructions')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    emulator = VMEmulator.fromPath(args.dirOrFileName)
+    try:
+        emulator.run(args.max_instructions)
+    except RuntimeError as error:
+        print(error)
+        print(json.dumps(emulator.report(), indent=2))
+        return 1
+    print(json.dumps(emulator.report(), indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
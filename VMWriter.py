@@ -1,27 +1,59 @@
+import os
+from BuildCache import BuildCache
+from VMBytecode import VMBytecode
+
 """
 VMWriter class
     - Called by CompilationEngine to write VM code
+    - Optional optimization passes (e.g. PeepholeOptimizer) run over the code in close,
+      between code generation and writing the file
+    - Writes text .vm files, or binary .vmb files (see VMBytecode)
+    - Files are written to a temporary file next to the output and renamed over it in close,
+      so an interrupted compile never leaves a half-written output
+    - Streaming mode: instead of buffering the whole class, the code of each subroutine is
+      optimized and written out as soon as the next subroutine starts, through a buffered file
+      or any writable text stream (e.g. sys.stdout or io.StringIO), keeping memory bounded
+      by the largest subroutine
+    - With a backend (e.g. HackCodeWriter), the optimized code is handed to the backend
+      instead of being written out
 """
 
 class VMWriter:
     """
     constructor: Creates a new output .vm file/stream, and prepares it for writing
-    """
-    def __init__(self, filePath: str):
+        - passes: optimization passes, each with a run(vmCode) -> vmCode method, applied in order
+        - binary: write VM bytecode (.vmb) instead of text (.vm)
+        - streaming: write the code of each subroutine as soon as it is complete
+        - output: writable text stream to write to instead of the .vm file (implies streaming)
+        - backend: object whose writeCode(vmCode) receives the code instead of any output
+    """
+    def __init__(self, filePath: str, passes: list = None, binary: bool = False, streaming: bool = False,
+                 output = None, backend = None):
         self.vmCode = []
         self.filePath = filePath
+        self.passes = passes or []
+        self.binary = binary
+        self.streaming = streaming or output is not None
+        self.output = output
+        self.backend = backend
+        self.bytesWritten = 0
+        self.instructionsWritten = 0
+        self.instructionsRemoved = 0
+
+        if self.binary and self.streaming:
+            raise RuntimeError('VM bytecode cannot be streamed: its string table precedes the code')
+
+        # Same path as BuildCache and the compile server expect, whatever dots the directories have
+        self.vmFilePath = BuildCache.outputPath(self.filePath, '.vmb' if binary else '.vm')
+        self.tmpFilePath = self.vmFilePath + '.tmp'
+        self.file = None
 
     """
     writePush: Writes a VM push command
         - segment: CONSTANT, ARGUMENT, LOCAL, STATIC, THIS, THAT, POINTER, TEMP -- changed to lowercase args
     """
     def writePush(self, segment: str, index: int) -> None:
-        vmSegment = ''
-        if segment == 'field':
-            vmSegment = 'this'
-        else:
-            vmSegment = segment
-        self.vmCode.append(f'push {vmSegment} {str(index)}')
+        self.vmCode.append(f'push {segment} {index}')
 
 
     """
@@ -29,12 +61,7 @@ class VMWriter:
         - segment: ARGUMENT, LOCAL, STATIC, THIS, THAT, POINTER, TEMP -- changed to lowercase args
     """
     def writePop(self, segment: str, index: int) -> None:
-        vmSegment = ''
-        if segment == 'field':
-            vmSegment = 'this'
-        else:
-            vmSegment = segment
-        self.vmCode.append(f'pop {vmSegment} {str(index)}')
+        self.vmCode.append(f'pop {segment} {index}')
 
 
     """
@@ -93,6 +120,9 @@ class VMWriter:
     writeFunction: Writes a VM function command
     """
     def writeFunction(self, name: str, nVars: int) -> None:
+        # A new subroutine starts, so the previous one is complete
+        if self.streaming:
+            self.flush()
         self.vmCode.append(f'function {name} {str(nVars)}')
 
 
@@ -104,13 +134,103 @@ class VMWriter:
 
 
     """
-    close: Closes the output file / stream
+    tell: Returns the current position in the generated code, for a later truncate
+    """
+    def tell(self) -> int:
+        return len(self.vmCode)
+
+
+    """
+    truncate: Discards all code generated after the given position (e.g. to replace
+    operands folded into a constant)
+    """
+    def truncate(self, position: int) -> None:
+        del self.vmCode[position:]
+
+
+    """
+    remove: Discards the code generated between the start and end positions
+    """
+    def remove(self, start: int, end: int) -> None:
+        del self.vmCode[start:end]
+
+
+    """
+    flush: Optimizes the code generated so far and writes it out (streaming mode)
+        - Called at subroutine boundaries: passes see whole functions, and positions returned
+          by tell (which only live within an expression) never span a flush
+    """
+    def flush(self) -> None:
+        if self.vmCode:
+            code = self.optimize(self.vmCode)
+            self.vmCode = []
+            self.writeCode(code)
+
+
+    """
+    optimize: Runs the optimization passes over the given code and returns the result
+    """
+    def optimize(self, vmCode: list) -> list:
+        generated = len(vmCode)
+        for optimizationPass in self.passes:
+            vmCode = optimizationPass.run(vmCode)
+        self.instructionsRemoved += generated - len(vmCode)
+        return vmCode
+
+
+    """
+    writeCode: Writes optimized code to the backend, the output stream, or the temporary output file
+    """
+    def writeCode(self, vmCode: list) -> None:
+        if self.backend is not None:
+            self.backend.writeCode(vmCode)
+            self.instructionsWritten += len(vmCode)
+            return
+
+        if self.binary:
+            data = VMBytecode.encode(vmCode)
+        else:
+            data = '\n'.join(vmCode)
+            if self.instructionsWritten and vmCode:
+                data = '\n' + data
+
+        if self.output is not None:
+            self.output.write(data)
+        else:
+            if self.file is None:
+                print('Writing to new file: ', self.vmFilePath)
+                self.file = open(self.tmpFilePath, 'wb' if self.binary else 'w')
+            self.file.write(data)
+
+        self.bytesWritten += len(data)
+        self.instructionsWritten += len(vmCode)
+
+
+    """
+    close: Writes the remaining code and closes the output file / stream
+        - The output file replaces any previous one only once it is complete
     """
     def close(self) -> None:
-        vmOutput = '\n'.join(self.vmCode)
+        if self.streaming:
+            self.flush()
+        else:
+            self.vmCode = self.optimize(self.vmCode)
+            self.writeCode(self.vmCode)
 
-        vmFilePath = self.filePath.split('.')[0] + '.vm'
-        
-        with open(vmFilePath, 'w') as file:
-            print('Writing to new file: ', vmFilePath)
-            file.write(vmOutput)
\ No newline at end of file
+        if self.output is None and self.backend is None:
+            if self.file is None:
+                self.writeCode([])
+            self.file.close()
+            self.file = None
+            os.replace(self.tmpFilePath, self.vmFilePath)
+
+
+    """
+    abort: Discards the output after a failed compile, leaving any previous output file in place
+    """
+    def abort(self) -> None:
+        self.vmCode = []
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmpFilePath)
@@ -0,0 +1,223 @@
+import random
+from CodeGenerator import toInt16
+from JackCompiler import compileSource
+from VMEmulator import VMEmulator
+
+"""
+helpers module
+    - Shared by the tests: compiles Jack programs in memory, runs them in VMEmulator, and
+      generates random expression programs together with their expected output
+"""
+
+# Instruction limit of every test run, so a miscompiled loop fails instead of hanging
+MAX_INSTRUCTIONS = 2_000_000
+
+# A small program using fields, statics, strings, arrays and loops, with getters, setters and
+# leaf functions (inlined by Inliner) and functions never called (removed by DeadCodeEliminator)
+SAMPLE_PROGRAM = {
+    'Main': '''
+class Main {
+    function void main() {
+        var Counter counter;
+        var Array values;
+        var int i, total;
+        let counter = Counter.new(3);
+        let values = Array.new(10);
+        let i = 0;
+        while (i < 10) {
+            let values[i] = Counter.square(i) + (i * 7);
+            do counter.add(values[i]);
+            let i = i + 1;
+        }
+        let total = counter.getTotal();
+        do Output.printString("total ");
+        do Output.printInt(total);
+        do Output.println();
+        if (total > 100) {
+            do Output.printString("big");
+        } else {
+            do Output.printString("small");
+        }
+        do Output.println();
+        do Output.printInt(Counter.getCreated());
+        do Output.println();
+        do Output.printInt(counter.getStep() * 1000 / 7);
+        do Output.println();
+        do Output.printInt(Counter.differencePlus(9, 4));
+        do Output.println();
+        do values.dispose();
+        do counter.dispose();
+        return;
+    }
+}
+''',
+    'Counter': '''
+class Counter {
+    field int total, step;
+    static int created;
+
+    constructor Counter new(int aStep) {
+        let total = 0;
+        let step = aStep;
+        let created = created + 1;
+        return this;
+    }
+
+    method void add(int value) {
+        let total = total + (value * step);
+        return;
+    }
+
+    method int getTotal() { return total; }
+
+    method int getStep() { return step; }
+
+    method void setStep(int aStep) { let step = aStep; return; }
+
+    function int getCreated() { return created; }
+
+    function int square(int x) { return x * x; }
+
+    function int differencePlus(int x, int y) {
+        var int difference;
+        let difference = x - y;
+        return difference + x;
+    }
+
+    function int unused(int x) { return Counter.square(x) + 1; }
+
+    method void dispose() {
+        do Memory.deAlloc(this);
+        return;
+    }
+}
+''',
+}
+
+# Output of SAMPLE_PROGRAM
+SAMPLE_OUTPUT = 'total 1800\nbig\n1\n428\n14\n'
+
+
+"""
+compileProgram: Compiles Jack sources (class name -> source) in memory to a program as VMEmulator takes it
+    - options: compile options, as for JackCompiler.compileSource
+"""
+def compileProgram(sources: dict, options: dict = None) -> dict:
+    return {f'{name}.vm': compileSource(source, options).splitlines() for name, source in sources.items()}
+
+
+"""
+runProgram: Runs a program (file path -> vmCode list) in VMEmulator and returns its report
+"""
+def runProgram(program: dict) -> dict:
+    return VMEmulator(program).run(MAX_INSTRUCTIONS)
+
+
+"""
+divide: Math.divide as the Hack platform computes it -- truncated toward zero, wrapped to 16 bits
+"""
+def divide(left: int, right: int) -> int:
+    quotient = abs(left) // abs(right)
+    return toInt16(quotient if (left < 0) == (right < 0) else -quotient)
+
+
+OPERATORS = {
+    '+': lambda left, right: toInt16(left + right),
+    '-': lambda left, right: toInt16(left - right),
+    '*': lambda left, right: toInt16(left * right),
+    '/': divide,
+    '&': lambda left, right: left & right,
+    '|': lambda left, right: left | right,
+    '<': lambda left, right: -1 if left < right else 0,
+    '>': lambda left, right: -1 if left > right else 0,
+    '=': lambda left, right: -1 if left == right else 0,
+}
+
+# Constants likely to hit the edge cases of folding and strength reduction
+CONSTANTS = [0, 1, 2, 3, 7, 8, 10, 16, 255, 256, 1000, 4096, 16384, 32767]
+
+# Local variables of the generated programs and their values
+VARIABLES = {'a': 5, 'b': -3, 'c': 32767, 'd': -32768, 'e': 0}
+
+
+class ExpressionGenerator:
+    """
+    Constructor: Creates a generator of random Jack expressions, deterministic for a given seed
+        - Expressions use integer constants, the VARIABLES, unary operators, every binary operator,
+          parentheses and Math.multiply / Math.divide calls; divisors are made odd, so never zero
+    """
+    def __init__(self, seed: int, depth: int = 3):
+        self.random = random.Random(seed)
+        self.depth = depth
+
+
+    """
+    expression: Returns a random expression and the value it evaluates to on the Hack platform
+        - Jack has no operator precedence: operators apply left to right
+    """
+    def expression(self, depth: int = None):
+        depth = self.depth if depth is None else depth
+        text, value = self.term(depth)
+        for _ in range(self.random.randint(0, 3)):
+            operator = self.random.choice(list(OPERATORS))
+            right, rightValue = self.term(depth)
+            if operator == '/':
+                right, rightValue = f'({right} | 1)', rightValue | 1
+            text = f'{text} {operator} {right}'
+            value = OPERATORS[operator](value, rightValue)
+        return text, value
+
+
+    """
+    term: Returns a random term and its value
+    """
+    def term(self, depth: int):
+        rand = self.random.random()
+        if depth > 0 and rand < 0.25:
+            text, value = self.expression(depth - 1)
+            return f'({text})', value
+        if depth > 0 and rand < 0.35:
+            text, value = self.term(depth - 1)
+            if self.random.random() < 0.5:
+                return f'-{text}', toInt16(-value)
+            return f'~{text}', ~value
+        if depth > 0 and rand < 0.4:
+            left, leftValue = self.expression(depth - 1)
+            right, rightValue = self.expression(depth - 1)
+            if self.random.random() < 0.5:
+                return f'Math.multiply({left}, {right})', toInt16(leftValue * rightValue)
+            return f'Math.divide({left}, ({right}) | 1)', divide(leftValue, rightValue | 1)
+        if rand < 0.7:
+            value = self.random.choice(CONSTANTS)
+            return str(value), value
+        name = self.random.choice(list(VARIABLES))
+        return name, VARIABLES[name]
+
+
+    """
+    program: Returns the sources of a program printing count random expressions, one per line,
+    and the output it should print
+    """
+    def program(self, count: int = 10):
+        lines = [
+            'class Main {',
+            '    function void main() {',
+            f'        var int {", ".join(VARIABLES)};',
+        ]
+        for name, value in VARIABLES.items():
+            # Negative literals do not exist in Jack, and -32768 is not a negated literal either
+            if value == -32768:
+                lines.append(f'        let {name} = -32767 - 1;')
+            elif value < 0:
+                lines.append(f'        let {name} = -{-value};')
+            else:
+                lines.append(f'        let {name} = {value};')
+
+        expected = []
+        for _ in range(count):
+            text, value = self.expression()
+            lines.append(f'        do Output.printInt({text});')
+            lines.append('        do Output.println();')
+            expected.append(f'{value}\n')
+        lines += ['        return;', '    }', '}']
+        return {'Main': '\n'.join(lines) + '\n'}, ''.join(expected)
@@ -0,0 +1,72 @@
+import pytest
+from CodeGenerator import toInt16, foldOperator, foldUnary
+from tests.helpers import ExpressionGenerator, compileProgram, runProgram
+
+# Compile options under which every program must print the same output
+OPTIONS = {
+    'default': {},
+    'noFold': {'fold': False},
+    'strengthReduce4': {'strengthReduce': 4},
+    'strengthReduce30': {'strengthReduce': 30},
+    'peephole': {'peephole': True},
+    'ast': {'ast': True},
+}
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (0, 0), (32767, 32767), (32768, -32768), (-32768, -32768), (-32769, 32767),
+    (65536, 0), (65535, -1), (1000 * 1000, 16960),
+])
+def test_toInt16(value, expected):
+    assert toInt16(value) == expected
+
+
+@pytest.mark.parametrize('operator, left, right, expected', [
+    ('ADD', 32767, 1, -32768),
+    ('SUB', -32768, 1, 32767),
+    ('MULTIPLY', 256, 256, 0),
+    ('MULTIPLY', -3, 7, -21),
+    ('DIVIDE', -7, 2, -3),
+    ('DIVIDE', 7, -2, -3),
+    ('DIVIDE', 1, 0, None),
+    ('DIVIDE', -32768, -1, None),
+    ('AND', -1, 255, 255),
+    ('OR', 8, 1, 9),
+    ('EQ', 3, 3, -1),
+    ('LT', -1, 1, -1),
+    ('GT', -1, 1, 0),
+    ('LT', -32768, 1, None),
+])
+def test_foldOperator(operator, left, right, expected):
+    assert foldOperator(operator, left, right) == expected
+
+
+def test_foldUnary():
+    assert foldUnary('NEG', -32768) == -32768
+    assert foldUnary('NEG', 5) == -5
+    assert foldUnary('NOT', 0) == -1
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_expressionsMatchHackArithmetic(seed):
+    sources, expected = ExpressionGenerator(seed).program()
+    for name, options in OPTIONS.items():
+        assert runProgram(compileProgram(sources, options))['output'] == expected, name
+
+
+def test_foldingRemovesArithmetic():
+    sources = {'Main': '''
+class Main {
+    function void main() {
+        do Output.printInt((1000 * 1000) + (7 / 2) - ~3);
+        return;
+    }
+}
+'''}
+    folded = compileProgram(sources)['Main.vm']
+    unfolded = compileProgram(sources, {'fold': False})['Main.vm']
+    assert 'call Math.multiply 2' not in folded
+    assert 'call Math.multiply 2' in unfolded
+    assert runProgram({'Main.vm': folded})['output'] == runProgram({'Main.vm': unfolded})['output'] == '16967'
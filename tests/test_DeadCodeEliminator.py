@@ -0,0 +1,39 @@
+import pytest
+from DeadCodeEliminator import DeadCodeEliminator, splitFunctions
+from tests.helpers import SAMPLE_PROGRAM, SAMPLE_OUTPUT, compileProgram, runProgram
+
+
+def test_splitFunctions():
+    vmCode = ['push constant 0', 'function A.f 0', 'return', 'function A.g 1', 'return']
+    assert splitFunctions(vmCode) == [
+        (None, ['push constant 0']),
+        ('A.f', ['function A.f 0', 'return']),
+        ('A.g', ['function A.g 1', 'return']),
+    ]
+
+
+def test_removesUnreachableFunctions():
+    eliminator = DeadCodeEliminator()
+    program = eliminator.run(compileProgram(SAMPLE_PROGRAM))
+    names = {name for vmCode in program.values() for name, _ in splitFunctions(vmCode)}
+    assert set(eliminator.removed) == {'Counter.unused', 'Counter.setStep'}
+    assert {'Main.main', 'Counter.new', 'Counter.add', 'Counter.square'} <= names
+    assert not names & set(eliminator.removed)
+
+
+def test_eliminatedProgramRunsTheSame():
+    program = compileProgram(SAMPLE_PROGRAM)
+    eliminated = DeadCodeEliminator().run(program)
+    assert sum(map(len, eliminated.values())) < sum(map(len, program.values()))
+    assert runProgram(eliminated)['output'] == runProgram(program)['output'] == SAMPLE_OUTPUT
+
+
+def test_extraRootsAreKept():
+    eliminator = DeadCodeEliminator(roots=['Counter.unused'])
+    eliminator.run(compileProgram(SAMPLE_PROGRAM))
+    assert set(eliminator.removed) == {'Counter.setStep'}
+
+
+def test_needsEntryPoint():
+    with pytest.raises(RuntimeError):
+        DeadCodeEliminator().run({'Counter.vm': compileProgram(SAMPLE_PROGRAM)['Counter.vm']})
@@ -0,0 +1,44 @@
+from DeadCodeEliminator import DeadCodeEliminator
+from Inliner import Inliner
+from tests.helpers import SAMPLE_PROGRAM, SAMPLE_OUTPUT, compileProgram, runProgram
+
+
+def test_inlinesGettersAndLeafFunctions():
+    inliner = Inliner()
+    inliner.run(compileProgram(SAMPLE_PROGRAM))
+    assert {callee for _, callee in inliner.inlined} >= {'Counter.getTotal', 'Counter.getStep', 'Counter.differencePlus'}
+    # Calls to other functions and to the OS are kept
+    assert 'Main.main' not in {callee for _, callee in inliner.inlined}
+    assert not any(callee.startswith('Output.') for _, callee in inliner.inlined)
+
+
+def test_staticsOnlyInlinedIntoTheirFile():
+    inliner = Inliner()
+    inliner.run(compileProgram(SAMPLE_PROGRAM))
+    assert ('Main.main', 'Counter.getCreated') not in inliner.inlined
+
+
+def test_inlinedProgramRunsTheSame():
+    program = compileProgram(SAMPLE_PROGRAM)
+    inliner = Inliner()
+    inlined = inliner.run(program)
+    assert inliner.inlined
+
+    original = runProgram(program)
+    report = runProgram(inlined)
+    assert report['output'] == original['output'] == SAMPLE_OUTPUT
+    assert report['instructions'] < original['instructions']
+    assert 'Counter.getTotal' not in report['calls']
+
+
+def test_inlinedAndEliminatedProgramRunsTheSame():
+    # The order of JackCompiler --inline --whole-program
+    program = compileProgram(SAMPLE_PROGRAM, {'peephole': True})
+    program = DeadCodeEliminator().run(Inliner().run(program))
+    assert runProgram(program)['output'] == SAMPLE_OUTPUT
+
+
+def test_largeFunctionsAreNotInlined():
+    inliner = Inliner(maxSize=1)
+    inliner.run(compileProgram(SAMPLE_PROGRAM))
+    assert all(callee != 'Counter.square' for _, callee in inliner.inlined)
@@ -0,0 +1,70 @@
+import pytest
+import JackAST
+from JackAST import ClassNode, Expression, IntegerConstant, UnaryOp
+from JackCompiler import compileSource, compileTree
+from JackParser import JackParser
+from JackTokenizer import JackTokenizer
+from TokenStream import TokenStream
+from tests.helpers import SAMPLE_PROGRAM, ExpressionGenerator
+
+
+"""
+parse: Returns the syntax tree of the class in source
+"""
+def parse(source: str) -> ClassNode:
+    return JackParser(JackTokenizer.fromStream(TokenStream(source))).parseClass()
+
+
+"""
+sameTree: Returns whether two syntax trees have the same node types and fields
+"""
+def sameTree(left, right) -> bool:
+    if isinstance(left, list):
+        return isinstance(right, list) and len(left) == len(right) and all(map(sameTree, left, right))
+    if not isinstance(left, JackAST.Node):
+        return left == right
+    return type(left) is type(right) and all(
+        sameTree(getattr(left, name), getattr(right, name)) for name in left.__slots__
+    )
+
+
+@pytest.mark.parametrize('className', sorted(SAMPLE_PROGRAM))
+def test_dumpsLoadsRoundTrip(className):
+    tree = parse(SAMPLE_PROGRAM[className])
+    loaded = JackAST.loads(JackAST.dumps(tree))
+    assert loaded is not tree
+    assert sameTree(loaded, tree)
+
+
+@pytest.mark.parametrize('className', sorted(SAMPLE_PROGRAM))
+def test_loadedTreeCompilesToTheSameCode(className):
+    source = SAMPLE_PROGRAM[className]
+    tree = JackAST.loads(JackAST.dumps(parse(source)))
+    for options in ({}, {'fold': False}, {'peephole': True, 'poolStrings': True}):
+        assert compileTree(tree, options) == compileSource(source, options)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_expressionTreesCompileToTheSameCode(seed):
+    sources, _ = ExpressionGenerator(seed).program()
+    tree = JackAST.loads(JackAST.dumps(parse(sources['Main'])))
+    assert compileTree(tree) == compileSource(sources['Main'])
+    assert compileTree(tree, {'fold': False}) == compileSource(sources['Main'], {'fold': False})
+
+
+def test_deepTreesWithoutRecursion():
+    depth = 20000
+    node = IntegerConstant(1)
+    for _ in range(depth):
+        node = Expression([UnaryOp('NEG', node), IntegerConstant(2)], ['ADD'])
+    loaded = JackAST.loads(JackAST.dumps(node))
+    for _ in range(depth):
+        assert type(loaded) is Expression and loaded.operators == ['ADD']
+        loaded = loaded.terms[0].operand
+    assert type(loaded) is IntegerConstant and loaded.value == 1
+
+
+def test_rejectsOtherVersions():
+    data = JackAST.pickle.dumps((JackAST.AST_VERSION + 1, []))
+    with pytest.raises(RuntimeError):
+        JackAST.loads(data)
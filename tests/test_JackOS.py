@@ -0,0 +1,44 @@
+import pytest
+from JackOS import JackOS, toInt16
+from VMEmulator import RAM_SIZE
+
+
+@pytest.fixture
+def jackOS():
+    return JackOS([0] * RAM_SIZE)
+
+
+def test_toInt16():
+    assert toInt16(32768) == -32768
+    assert toInt16(-32769) == 32767
+
+
+@pytest.mark.parametrize('name, args, expected', [
+    ('Math.abs', (-5,), 5),
+    ('Math.abs', (-32768,), -32768),
+    ('Math.multiply', (300, 300), 24464),
+    ('Math.divide', (-7, 2), -3),
+    ('Math.divide', (-32768, -1), -32768),
+    ('Math.min', (3, -4), -4),
+    ('Math.max', (3, -4), 3),
+    ('Math.sqrt', (1000,), 31),
+])
+def test_math(jackOS, name, args, expected):
+    assert jackOS.functions[name](*args) == expected
+
+
+def test_divisionByZero(jackOS):
+    with pytest.raises(RuntimeError, match='division by zero'):
+        jackOS.functions['Math.divide'](1, 0)
+
+
+def test_strings(jackOS):
+    functions = jackOS.functions
+    string = functions['String.new'](5)
+    for char in 'abc':
+        functions['String.appendChar'](string, ord(char))
+    assert functions['String.length'](string) == 3
+    functions['Output.printString'](string)
+    functions['Output.printInt'](-12)
+    functions['Output.println']()
+    assert jackOS.text() == 'abc-12\n'
@@ -0,0 +1,75 @@
+import pytest
+from PeepholeOptimizer import (
+    PeepholeOptimizer, removePushPop, removeDoubleUnary, removeZeroOperand, removeNegatedZero,
+    removeJumpToNext, foldConstantBranch, foldConstantUnary, invertBranch,
+)
+from tests.helpers import SAMPLE_PROGRAM, SAMPLE_OUTPUT, ExpressionGenerator, compileProgram, runProgram
+
+
+@pytest.mark.parametrize('pattern, window, expected', [
+    (removePushPop, ['push local 0', 'pop local 0'], []),
+    (removePushPop, ['push local 0', 'pop local 1'], None),
+    (removeDoubleUnary, ['not', 'not'], []),
+    (removeDoubleUnary, ['neg', 'neg'], []),
+    (removeDoubleUnary, ['not', 'neg'], None),
+    (removeZeroOperand, ['push constant 0', 'add'], []),
+    (removeZeroOperand, ['push constant 0', 'sub'], []),
+    (removeZeroOperand, ['push constant 0', 'or'], []),
+    (removeZeroOperand, ['push constant 0', 'and'], None),
+    (removeNegatedZero, ['push constant 0', 'neg'], ['push constant 0']),
+    (removeJumpToNext, ['goto L1', 'label L1'], ['label L1']),
+    (removeJumpToNext, ['goto L1', 'label L2'], None),
+    (foldConstantBranch, ['push constant 0', 'if-goto L1'], []),
+    (foldConstantBranch, ['push constant 5', 'if-goto L1'], ['goto L1']),
+    (foldConstantUnary, ['push constant 0', 'not', 'if-goto L1'], ['goto L1']),
+    (foldConstantUnary, ['push constant 0', 'neg', 'if-goto L1'], []),
+    (foldConstantUnary, ['push constant 0', 'not', 'not'], ['push constant 0']),
+    (foldConstantUnary, ['push constant 1', 'not', 'not'], ['push constant 1']),
+    (foldConstantUnary, ['push constant 1', 'neg', 'not'], ['push constant 0']),
+    (foldConstantUnary, ['push constant 0', 'neg', 'not'], None),
+    (invertBranch, ['lt', 'if-goto T', 'goto F', 'label T'], ['lt', 'not', 'if-goto F', 'label T']),
+    (invertBranch, ['add', 'if-goto T', 'goto F', 'label T'], None),
+    (invertBranch, ['eq', 'if-goto T', 'goto F', 'label X'], None),
+])
+def test_pattern(pattern, window, expected):
+    assert pattern(window) == expected
+
+
+def test_removesUnreachableCodeAndUnusedLabels():
+    vmCode = [
+        'function Main.main 0',
+        'push constant 0',
+        'if-goto SKIP',
+        'goto END',
+        'push constant 1',
+        'pop temp 0',
+        'label END',
+        'label UNUSED',
+        'push constant 0',
+        'return',
+        'push constant 2',
+    ]
+    optimizer = PeepholeOptimizer()
+    assert optimizer.run(vmCode) == ['function Main.main 0', 'push constant 0', 'return']
+    assert optimizer.removed == 8
+
+
+def test_optimizesFunctionsSeparately():
+    vmCode = ['function A.f 0', 'goto L', 'function B.g 0', 'label L', 'push constant 0', 'return']
+    assert PeepholeOptimizer().run(vmCode) == [
+        'function A.f 0', 'goto L', 'function B.g 0', 'push constant 0', 'return',
+    ]
+
+
+def test_optimizedProgramRunsTheSame():
+    program = compileProgram(SAMPLE_PROGRAM)
+    optimized = compileProgram(SAMPLE_PROGRAM, {'peephole': True})
+    assert sum(map(len, optimized.values())) < sum(map(len, program.values()))
+    assert runProgram(optimized)['output'] == SAMPLE_OUTPUT
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_optimizedUnfoldedExpressionsRunTheSame(seed):
+    # Without folding, constant conditions and operands are left for the peephole patterns
+    sources, expected = ExpressionGenerator(seed).program()
+    assert runProgram(compileProgram(sources, {'fold': False, 'peephole': True}))['output'] == expected
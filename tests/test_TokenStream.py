@@ -0,0 +1,70 @@
+import io
+import pytest
+from TokenStream import TokenStream, iterTokens, TOKEN_TYPES
+from tests.helpers import SAMPLE_PROGRAM
+
+SOURCE = SAMPLE_PROGRAM['Counter'] + '''
+/** A block comment
+    spanning lines, longer than the smallest chunks */
+class Lexing {
+    // line comment with "quotes" and /* an opener
+    function void run() {
+        var String text;
+        let text = "a string // not a comment";
+        do Output.printInt(32767 - 12345);
+        return;
+    }
+}
+'''
+
+
+"""
+eagerTokens: Returns the (kind, text, line) of every token of source, lexed at once by TokenStream
+"""
+def eagerTokens(source: str) -> list:
+    stream = TokenStream(source)
+    return list(zip(stream.kinds, stream.texts, stream.lines))
+
+
+def test_tokenTypes():
+    stream = TokenStream('let x = "hi" + 12;')
+    assert [stream[idx] for idx in range(len(stream))] == [
+        ('KEYWORD', 'let'), ('IDENTIFIER', 'x'), ('SYMBOL', '='), ('STRING_CONST', 'hi'),
+        ('SYMBOL', '+'), ('INT_CONST', '12'), ('SYMBOL', ';'),
+    ]
+
+
+def test_peekAndReset():
+    stream = TokenStream('do f();')
+    mark = stream.mark()
+    assert stream.peek() == ('KEYWORD', 'do')
+    assert stream.peek(1) == ('IDENTIFIER', 'f')
+    stream.advance()
+    assert stream.peek(4) is None
+    stream.reset(mark)
+    assert stream.peek() == ('KEYWORD', 'do')
+
+
+@pytest.mark.parametrize('chunkSize', [1, 2, 3, 7, 16, 64, 1 << 16])
+def test_chunkedTextMatchesEager(chunkSize):
+    assert list(iterTokens(io.StringIO(SOURCE), chunkSize)) == eagerTokens(SOURCE)
+
+
+@pytest.mark.parametrize('chunkSize', [1, 5, 1 << 16])
+def test_chunkedBytesMatchEager(chunkSize):
+    source = SOURCE.replace('a string', 'a strïng with ünicode')
+    tokens = list(iterTokens(io.BytesIO(source.encode('utf-8')), chunkSize))
+    assert tokens == eagerTokens(source)
+
+
+def test_kindsAreTokenTypes():
+    kinds = {TOKEN_TYPES[kind] for kind, _, _ in iterTokens(io.StringIO(SOURCE), 4)}
+    assert kinds == set(TOKEN_TYPES)
+
+
+@pytest.mark.parametrize('source', ['let x = 32768;', 'let x = 1 # 2;', 'let x = "unterminated;'])
+def test_errors(source):
+    with pytest.raises(RuntimeError):
+        TokenStream(source)
+    with pytest.raises(RuntimeError):
+        list(iterTokens(io.StringIO(source), 3))
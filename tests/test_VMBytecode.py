@@ -0,0 +1,74 @@
+import pytest
+from VMBytecode import VMBytecode, formatInstruction
+from VMEmulator import VMEmulator
+from tests.helpers import SAMPLE_PROGRAM, SAMPLE_OUTPUT, MAX_INSTRUCTIONS, compileProgram
+
+VM_CODE = [
+    'function Main.main 2',
+    'push constant 300',
+    'pop local 1',
+    'push static 0',
+    'push that 1000000',
+    'label WHILE_EXP0',
+    'if-goto WHILE_EXP0',
+    'goto WHILE_END0',
+    'call Math.multiply 2',
+    'add', 'sub', 'neg', 'eq', 'gt', 'lt', 'and', 'or', 'not',
+    'label WHILE_END0',
+    'return',
+]
+
+
+def test_roundTrip():
+    data = VMBytecode.encode(VM_CODE)
+    assert VMBytecode.decode(data) == VM_CODE
+    assert VMBytecode.encode(VMBytecode.decode(data)) == data
+
+
+def test_instructions():
+    instructions = VMBytecode.instructions(VMBytecode.encode(VM_CODE))
+    assert instructions[:3] == [('function', 'Main.main', 2), ('push', 'constant', 300), ('pop', 'local', 1)]
+    assert instructions[-1] == ('return', None, None)
+    assert [formatInstruction(*instruction) for instruction in instructions] == VM_CODE
+
+
+def test_stringsStoredOnce():
+    once = VMBytecode.encode(['label LOOP', 'goto LOOP'])
+    twice = VMBytecode.encode(['label LOOP', 'goto LOOP', 'goto LOOP'])
+    assert len(twice) - len(once) == 2
+
+
+def test_compiledProgramRoundTrip():
+    for vmCode in compileProgram(SAMPLE_PROGRAM).values():
+        assert VMBytecode.decode(VMBytecode.encode(vmCode)) == vmCode
+
+
+@pytest.mark.parametrize('instruction', ['push', 'push nowhere 1', 'jump 3', 'add 1', 'label', 'call f'])
+def test_invalidInstructions(instruction):
+    with pytest.raises(RuntimeError):
+        VMBytecode.encode([instruction])
+
+
+def test_truncatedOrCorrupt():
+    data = VMBytecode.encode(VM_CODE)
+    for length in range(len(data)):
+        with pytest.raises(RuntimeError):
+            VMBytecode.instructions(data[:length])
+
+    corrupt = bytearray(VMBytecode.encode(['label Ä']))
+    corrupt[corrupt.index('Ä'.encode('utf-8'))] = 0xFF
+    with pytest.raises(RuntimeError, match='corrupt'):
+        VMBytecode.instructions(bytes(corrupt))
+
+
+def test_readText(tmp_path):
+    filePath = tmp_path / 'Main.vm'
+    filePath.write_text('// header\n\nfunction Main.main 0 // entry\n  push constant 0\nreturn\n')
+    assert VMBytecode.readText(str(filePath)) == ['function Main.main 0', 'push constant 0', 'return']
+
+
+def test_emulatorRunsBytecodeFiles(tmp_path):
+    for filePath, vmCode in compileProgram(SAMPLE_PROGRAM).items():
+        VMBytecode.write(str(tmp_path / (filePath + 'b')), vmCode)
+    report = VMEmulator.fromPath(str(tmp_path)).run(MAX_INSTRUCTIONS)
+    assert report['output'] == SAMPLE_OUTPUT